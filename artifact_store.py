@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+SQLite store of conversion runs and their artifacts.
+
+Every run of convert_framer_to_mdx.py records into
+.conversion/artifacts.sqlite:
+
+- runs:      one row per run (category, shard, bundle, converter
+             fingerprint, start and end time, status)
+- sources:   each distinct export, keyed by SHA-256, zlib-compressed
+- documents: per run and export, its title, mapping (category and
+             subcategory), export hash, status and MDX path and hash
+- images:    per run and article, the asset lock entries (URL, path, hash,
+             size, dimensions)
+- outputs:   per run, the MDX and image files of each document
+
+Rows are written in batches of BATCH_SIZE documents, each batch in one
+transaction, so an interrupted run leaves whole documents behind. A
+resumed run records the documents restored from its journal again, so
+every run holds the complete picture of what it produced. The "current"
+state of an export is its row in the latest run that included it.
+
+Usage:
+    python3 artifact_store.py runs                 # Recent runs
+    python3 artifact_store.py image <url|path|sha> # Articles referencing an image
+    python3 artifact_store.py changed [run]        # Exports and MDX changed since a run (default: the previous one)
+    python3 artifact_store.py document <export>    # Latest record of an export
+    python3 artifact_store.py source <export>      # Print the latest stored export
+"""
+
+import sys
+import time
+import zlib
+from pathlib import Path
+
+from run_journal import JOURNAL_DIR
+
+STORE_PATH = JOURNAL_DIR / "artifacts.sqlite"
+SCHEMA_VERSION = 1
+BATCH_SIZE = 25
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    category TEXT, shard TEXT, bundle TEXT, converter TEXT,
+    resumed INTEGER NOT NULL DEFAULT 0,
+    started_at TEXT NOT NULL, finished_at TEXT,
+    status TEXT NOT NULL DEFAULT 'running'
+);
+CREATE TABLE IF NOT EXISTS sources (
+    sha256 TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    content BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS documents (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    filename TEXT NOT NULL,
+    title TEXT, category TEXT, subcategory TEXT,
+    source_sha256 TEXT, status TEXT NOT NULL,
+    mdx_path TEXT, mdx_sha256 TEXT,
+    PRIMARY KEY (run_id, filename)
+);
+CREATE INDEX IF NOT EXISTS documents_by_filename ON documents (filename, run_id);
+CREATE INDEX IF NOT EXISTS documents_by_source ON documents (source_sha256);
+CREATE TABLE IF NOT EXISTS images (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    filename TEXT NOT NULL,
+    document TEXT NOT NULL, section TEXT NOT NULL, position INTEGER NOT NULL,
+    url TEXT NOT NULL, path TEXT NOT NULL, sha256 TEXT, size INTEGER, width INTEGER, height INTEGER
+);
+CREATE INDEX IF NOT EXISTS images_by_document ON images (run_id, filename);
+CREATE INDEX IF NOT EXISTS images_by_url ON images (url);
+CREATE INDEX IF NOT EXISTS images_by_path ON images (path);
+CREATE INDEX IF NOT EXISTS images_by_sha256 ON images (sha256);
+CREATE TABLE IF NOT EXISTS outputs (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    filename TEXT NOT NULL,
+    path TEXT NOT NULL, sha256 TEXT NOT NULL, kind TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS outputs_by_document ON outputs (run_id, filename);
+CREATE INDEX IF NOT EXISTS outputs_by_path ON outputs (path);
+CREATE VIEW IF NOT EXISTS current_documents AS
+    SELECT d.* FROM documents d
+    JOIN (SELECT filename, MAX(run_id) AS run_id FROM documents GROUP BY filename) latest
+    USING (filename, run_id);
+"""
+
+def connect(path=STORE_PATH):
+    """Open the store, creating its tables; raise ValueError for a newer schema."""
+    # Imported here: --plan and validation runs import this module without opening the store
+    import sqlite3
+
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    # Shards running side by side write to the same file
+    connection = sqlite3.connect(path, timeout=30)
+    connection.row_factory = sqlite3.Row
+    connection.execute("PRAGMA journal_mode=WAL")
+    version = connection.execute("PRAGMA user_version").fetchone()[0]
+    if version > SCHEMA_VERSION:
+        connection.close()
+        raise ValueError(f"{path} has schema version {version}; this checkout supports {SCHEMA_VERSION}")
+    with connection:
+        connection.executescript(SCHEMA)
+        connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    return connection
+
+class ArtifactStore:
+    """Records one conversion run; documents are written in batches of batch_size.
+
+    run is the run dict of the RunJournal (category, shard, bundle, converter).
+    """
+
+    def __init__(self, run, resumed=False, path=STORE_PATH, batch_size=BATCH_SIZE):
+        self.connection = connect(path)
+        self.batch_size = batch_size
+        self._pending = {}
+        with self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO runs (category, shard, bundle, converter, resumed, started_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (run.get('category'), run.get('shard'), run.get('bundle'), run.get('converter'), int(resumed),
+                 time.strftime('%Y-%m-%dT%H:%M:%S')))
+        self.run_id = cursor.lastrowid
+        self._sources = {row[0] for row in self.connection.execute("SELECT sha256 FROM sources")}
+
+    def add_document(self, document, mapping, record):
+        """Queue a document with its journal record (see RunJournal.record_document()).
+
+        Adding an export again, e.g. in the image retry pass, replaces it.
+        """
+        source = None
+        if record.get('source_sha256') and record['source_sha256'] not in self._sources:
+            source = (record['source_sha256'], document.size, zlib.compress(document.raw_bytes()))
+            self._sources.add(record['source_sha256'])
+        self._pending[record['filename']] = (document.title, mapping, record, source)
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write the queued documents in one transaction."""
+        if not self._pending:
+            return
+        run_id = self.run_id
+        documents, images, outputs, sources = [], [], [], []
+        for filename, (title, mapping, record, source) in self._pending.items():
+            documents.append((run_id, filename, title, mapping['category'], mapping['subcategory'],
+                              record.get('source_sha256'), record['status'], record.get('mdx_path'),
+                              record.get('sha256')))
+            if 'mdx_path' in record:
+                outputs.append((run_id, filename, record['mdx_path'], record['sha256'], 'mdx'))
+            for entry in record['assets']:
+                images.append((run_id, filename, entry['document'], entry['section'], entry['index'], entry['url'],
+                               entry['path'], entry.get('sha256'), entry.get('size'), entry.get('width'),
+                               entry.get('height')))
+                outputs.append((run_id, filename, entry['path'], entry['sha256'], 'image'))
+            if source is not None:
+                sources.append(source)
+        stale = [(run_id, filename) for filename in self._pending]
+        with self.connection:
+            self.connection.executemany("DELETE FROM images WHERE run_id = ? AND filename = ?", stale)
+            self.connection.executemany("DELETE FROM outputs WHERE run_id = ? AND filename = ?", stale)
+            self.connection.executemany("INSERT OR IGNORE INTO sources VALUES (?, ?, ?)", sources)
+            self.connection.executemany("INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                        documents)
+            self.connection.executemany("INSERT INTO images VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", images)
+            self.connection.executemany("INSERT INTO outputs VALUES (?, ?, ?, ?, ?)", outputs)
+        self._pending = {}
+
+    def close(self, status='completed'):
+        """Write the remaining documents and record the end of the run."""
+        self.flush()
+        with self.connection:
+            self.connection.execute("UPDATE runs SET finished_at = ?, status = ? WHERE id = ?",
+                                    (time.strftime('%Y-%m-%dT%H:%M:%S'), status, self.run_id))
+        self.connection.close()
+
+def find_image(connection, reference):
+    """Return the current articles whose images have reference as URL, path or SHA-256."""
+    return connection.execute(
+        "SELECT d.filename, i.section, i.position, i.url, i.path, d.mdx_path FROM images i "
+        "JOIN current_documents d ON d.run_id = i.run_id AND d.filename = i.filename "
+        "WHERE i.url = ? OR i.path = ? OR i.sha256 = ? ORDER BY d.filename, i.position",
+        (reference, reference.lstrip('/'), reference)).fetchall()
+
+def previous_run(connection):
+    """Return the id of the run before the latest one, or None."""
+    row = connection.execute("SELECT id FROM runs ORDER BY id DESC LIMIT 1 OFFSET 1").fetchone()
+    return row and row[0]
+
+def changes_since(connection, run_id):
+    """Return (change, filename) for exports whose export or MDX changed after run_id."""
+    rows = connection.execute(
+        "SELECT c.filename, c.source_sha256 AS source, c.mdx_sha256 AS mdx, "
+        "o.source_sha256 AS old_source, o.mdx_sha256 AS old_mdx, o.filename IS NULL AS new FROM current_documents c "
+        "LEFT JOIN documents o ON o.filename = c.filename AND o.run_id = "
+        "(SELECT MAX(run_id) FROM documents WHERE filename = c.filename AND run_id <= ?) "
+        "WHERE c.run_id > ? ORDER BY c.filename", (run_id, run_id)).fetchall()
+    changes = []
+    for row in rows:
+        if row['new']:
+            changes.append(('new', row['filename']))
+        elif row['source'] != row['old_source']:
+            changes.append(('export changed', row['filename']))
+        elif row['mdx'] != row['old_mdx']:
+            changes.append(('MDX changed', row['filename']))
+    return changes
+
+def latest_document(connection, filename):
+    return connection.execute("SELECT * FROM current_documents WHERE filename = ?", (filename,)).fetchone()
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Query the conversion artifact store.")
+    parser.add_argument('command', choices=['runs', 'image', 'changed', 'document', 'source'])
+    parser.add_argument('argument', nargs='?')
+    parser.add_argument('--limit', type=int, default=10, help='Runs to list')
+    args = parser.parse_args()
+    if args.command in ('image', 'document', 'source') and not args.argument:
+        parser.error(f"{args.command} needs an argument")
+    if not STORE_PATH.exists():
+        print(f"ERROR: No artifact store at {STORE_PATH}; run convert_framer_to_mdx.py first")
+        return 1
+    try:
+        connection = connect()
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        return 1
+
+    started = time.perf_counter()
+    if args.command == 'runs':
+        rows = connection.execute(
+            "SELECT r.*, COUNT(d.filename) AS documents FROM runs r LEFT JOIN documents d ON d.run_id = r.id "
+            "GROUP BY r.id ORDER BY r.id DESC LIMIT ?", (args.limit,)).fetchall()
+        for row in rows:
+            scope = ' '.join(filter(None, (row['category'], row['shard'] and f"shard {row['shard']}",
+                                           row['bundle'], row['resumed'] and 'resumed')))
+            print(f"  {row['id']:>4}  {row['started_at']}  {row['status']:<10} {row['documents']:>4} document(s)  {scope}")
+    elif args.command == 'image':
+        rows = find_image(connection, args.argument)
+        for row in rows:
+            print(f"  {row['filename']} ({row['section']}) image {row['position']}: {row['path']}")
+            print(f"      {row['mdx_path'] or 'no MDX'}  <- {row['url']}")
+    elif args.command == 'changed':
+        run_id = int(args.argument) if args.argument else previous_run(connection)
+        if run_id is None:
+            print("Only one run recorded; nothing to compare")
+            rows = []
+        else:
+            rows = changes_since(connection, run_id)
+            print(f"Changes since run {run_id}:")
+            for change, filename in rows:
+                print(f"  {change:<15} {filename}")
+    else:
+        row = latest_document(connection, args.argument)
+        rows = [row] if row else []
+        if row and args.command == 'source':
+            content = connection.execute("SELECT content FROM sources WHERE sha256 = ?",
+                                         (row['source_sha256'],)).fetchone()
+            rows = [content] if content else []
+            if content:
+                sys.stdout.write(zlib.decompress(content[0]).decode('utf-8', 'replace'))
+        elif row:
+            for key in row.keys():
+                print(f"  {key:<14} {row[key]}")
+            for image in connection.execute("SELECT position, url, path FROM images WHERE run_id = ? AND filename = ? "
+                                            "ORDER BY position", (row['run_id'], row['filename'])):
+                print(f"  image {image['position']:<8} {image['path']}  <- {image['url']}")
+    elapsed = (time.perf_counter() - started) * 1000
+    if args.command != 'source':
+        print(f"({len(rows)} result(s) in {elapsed:.1f} ms)")
+    connection.close()
+    return 0 if rows or args.command in ('runs', 'changed') else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
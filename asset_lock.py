@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Asset lockfile mapping Framer image URLs to local image files.
+
+assets.lock.json is committed alongside the converted output and records,
+for every image, the export it came from, its section (the output folder of
+the article, since a few exports are published in two places), its 1-based
+index in the article, the Framer URL, the local path, size, SHA-256 and
+pixel dimensions.
+
+With the lockfile, conversion:
+- takes images from their locked local copies instead of downloading them
+  again, and can run fully offline (--offline)
+- reports images that were reordered, added or removed within an article
+- renames images whose path changed (reordering, new title) by copying the
+  locked file rather than refetching it, and removes files left behind
+
+Usage:
+    python3 asset_lock.py rebuild    # Record images already under images/ for every export
+    python3 asset_lock.py verify     # Check every locked file exists with the recorded hash
+"""
+
+import hashlib
+import json
+import os
+import struct
+import sys
+from pathlib import Path
+
+LOCK_PATH = Path(__file__).parent / "assets.lock.json"
+LOCK_VERSION = 1
+
+# JPEG start-of-frame markers (every SOFn except DHT, JPG and DAC)
+JPEG_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+def image_dimensions(data):
+    """Return (width, height) from a PNG, GIF, JPEG or WebP header, or (None, None)."""
+    if data[:8] == b'\x89PNG\r\n\x1a\n' and len(data) >= 24:
+        return struct.unpack('>II', data[16:24])
+    if data[:6] in (b'GIF87a', b'GIF89a') and len(data) >= 10:
+        return struct.unpack('<HH', data[6:10])
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        chunk = data[12:16]
+        if chunk == b'VP8 ' and len(data) >= 30:
+            width, height = struct.unpack('<HH', data[26:30])
+            return width & 0x3FFF, height & 0x3FFF
+        if chunk == b'VP8L' and len(data) >= 25:
+            bits = int.from_bytes(data[21:25], 'little')
+            return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if chunk == b'VP8X' and len(data) >= 30:
+            return int.from_bytes(data[24:27], 'little') + 1, int.from_bytes(data[27:30], 'little') + 1
+    if data[:2] == b'\xff\xd8':
+        pos = 2
+        while pos + 9 <= len(data):
+            if data[pos] != 0xFF:
+                break
+            marker = data[pos + 1]
+            if marker == 0xFF:
+                pos += 1
+                continue
+            if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+                pos += 2
+                continue
+            if marker in JPEG_SOF_MARKERS:
+                height, width = struct.unpack('>HH', data[pos + 5:pos + 9])
+                return width, height
+            pos += 2 + struct.unpack('>H', data[pos + 2:pos + 4])[0]
+    return None, None
+
+class AssetLock:
+    """The asset lockfile, grouped by article.
+
+    An article is identified by (document, section): the export filename
+    (e.g. "Remittances.txt" or "Onboarding Documents/Welcome.txt") and the
+    output folder it is published in (e.g. "Billing-Workflows/Reports").
+    Paths are relative to the lockfile's folder.
+    """
+
+    def __init__(self, path=LOCK_PATH):
+        self.path = Path(path)
+        self.root = self.path.parent
+        self.articles = {}
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for entry in json.load(f).get('images', []):
+                    self.articles.setdefault((entry['document'], entry['section']), []).append(entry)
+        self._index_urls()
+        self._saved = self._serialize()
+
+    def _index_urls(self):
+        self._by_url = {}
+        for entry in self.entries():
+            self._by_url.setdefault(entry['url'], []).append(entry)
+
+    def entries(self):
+        """Return every entry, ordered by article and index."""
+        return [entry for key in sorted(self.articles)
+                for entry in sorted(self.articles[key], key=lambda e: e['index'])]
+
+    def _serialize(self):
+        return json.dumps({'version': LOCK_VERSION, 'images': self.entries()}, indent=2, ensure_ascii=False) + '\n'
+
+    def read_local(self, url):
+        """Return the bytes of a locked copy of url if one is present and intact, else None."""
+        for entry in self._by_url.get(url, ()):
+            try:
+                data = (self.root / entry['path']).read_bytes()
+            except OSError:
+                continue
+            if hashlib.sha256(data).hexdigest() == entry['sha256']:
+                return data
+        return None
+
+    def changes(self, article, urls):
+        """Describe how an article's image URLs differ from the lock, e.g. ["1 removed", "reordered"]."""
+        locked = [entry['url'] for entry in sorted(self.articles.get(article, []), key=lambda e: e['index'])]
+        if not locked or locked == urls:
+            return []
+        changes = []
+        removed = [url for url in locked if url not in urls]
+        added = [url for url in urls if url not in locked]
+        if removed:
+            changes.append(f"{len(removed)} removed")
+        if added:
+            changes.append(f"{len(added)} added")
+        if [url for url in locked if url in urls] != [url for url in urls if url in locked]:
+            changes.append("reordered")
+        return changes
+
+    def record(self, article, index, url, path, data):
+        """Return a lock entry for image data stored at path."""
+        document, section = article
+        width, height = image_dimensions(data)
+        return {
+            'document': document,
+            'section': section,
+            'index': index,
+            'url': url,
+            'path': Path(os.path.relpath(path, self.root)).as_posix(),
+            'size': len(data),
+            'sha256': hashlib.sha256(data).hexdigest(),
+            'width': width,
+            'height': height,
+        }
+
+    def update(self, article, entries):
+        """Replace an article's entries; return its previous files no longer referenced by the lock."""
+        previous = self.articles.pop(article, [])
+        if entries:
+            self.articles[article] = entries
+        self._index_urls()
+        in_use = {entry['path'] for entry in self.entries()}
+        return [self.root / entry['path'] for entry in previous if entry['path'] not in in_use]
+
+    def save(self):
+        """Write the lockfile if it changed. Returns True if written."""
+        text = self._serialize()
+        if text == self._saved:
+            return False
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        self._saved = text
+        return True
+
+def rebuild(lock):
+    """Record the images and video posters already under images/ for every mapped and onboarding export."""
+    from convert_framer_to_mdx import document_images, load_file_mapping
+    from export_sources import open_export
+
+    base_dir = Path(__file__).parent
+    input_dir = base_dir / "AAA-Framer-Export"
+    images_dir = base_dir / "images"
+    sources = [(input_dir / filename, filename, mapping["category"], mapping["subcategory"])
+               for category in ("owners-admin", "provider", "front-office", "billing")
+               for filename, mapping in load_file_mapping(category).items()]
+    sources += [(path, f"Onboarding Documents/{path.name}", "Onboarding-Documents", "")
+                for path in sorted((input_dir / "Onboarding Documents").glob("*.txt"))]
+
+    lock.articles = {}
+    missing = 0
+    for path, filename, category_path, subcategory_path in sources:
+        if not path.exists():
+            continue
+        section = '/'.join(part for part in (category_path, subcategory_path) if part)
+        article = (filename, section)
+        with open_export(path, filename) as document:
+            entries = []
+            mapping = {'category': category_path, 'subcategory': subcategory_path}
+            for index, (url, relative_path) in enumerate(document_images(document, mapping), 1):
+                image_path = images_dir / relative_path
+                if not image_path.exists():
+                    missing += 1
+                    print(f"  ✗ Missing: {image_path.relative_to(base_dir)} ({url})")
+                    continue
+                entries.append(lock.record(article, index, url, image_path, image_path.read_bytes()))
+        lock.update(article, entries)
+    print(f"Recorded {len(lock.entries())} images from {len(lock.articles)} articles ({missing} missing)")
+
+def verify(lock):
+    """Check every locked file exists with the recorded hash. Returns the number of problems."""
+    problems = 0
+    for entry in lock.entries():
+        path = lock.root / entry['path']
+        if not path.exists():
+            print(f"  ✗ Missing: {entry['path']}")
+            problems += 1
+        elif hashlib.sha256(path.read_bytes()).hexdigest() != entry['sha256']:
+            print(f"  ✗ Changed: {entry['path']}")
+            problems += 1
+    print(f"Checked {len(lock.entries())} locked images: {problems} problem(s)")
+    return problems
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Maintain the asset lockfile.")
+    parser.add_argument('command', choices=['rebuild', 'verify'])
+    parser.add_argument('--lock', default=str(LOCK_PATH), help='Lockfile path')
+    args = parser.parse_args()
+
+    lock = AssetLock(args.lock)
+    if args.command == 'rebuild':
+        rebuild(lock)
+        if lock.save():
+            print(f"✓ Wrote {lock.path}")
+        return 0
+    return 1 if verify(lock) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
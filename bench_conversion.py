@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Performance suite for the Framer-to-MDX converter.
+
+Usage:
+    python3 bench_conversion.py [suite ...] [--size-mb N] [--skip-legacy]
+
+Suites:
+    memory    Peak traced memory converting a synthetic export page,
+              whole-document path vs streaming ingestion
+    tables    Conversion time of synthetic report tables from 1,000 to
+              10,000 rows; time per row should stay flat (linear scaling),
+              and every row, multi-line cells included, must stay on one line
+    sanitizer Leftover-tag handling on documents with thousands of distinct
+              attribute-bearing tags, one-pass sanitizer vs replace-per-tag
+    redos     Adversarial malformed markup (unclosed and unterminated tags,
+              long whitespace runs, deep nesting) at growing sizes; every
+              case must scale linearly or be stopped by the document budget,
+              and convert its largest size within REDOS_TIME_LIMIT_MS
+    startup   Import time (python -X importtime) of the entry points used by
+              cached-only and validation runs, best of several runs, with
+              the slowest imports; requests and urllib3 must not be loaded
+
+With no suite names, every suite runs. tables, redos and startup are
+checks: the exit status is 1 if one of their cases or entry points misses
+its target.
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from conversion_budget import BudgetExceeded, ConversionBudget
+from convert_framer_to_mdx import extract_images, html_to_markdown, iter_markdown
+from html_sanitizer import DEFAULT_SANITIZER
+from html_tables import convert_table_html
+from export_sources import open_export
+
+# A slice of typical Framer markup, repeated to build synthetic exports
+SAMPLE_BLOCKS = (
+    '<h4>Summary</h4>'
+    '<p>The collections report provides an overview of <strong>all collected amounts</strong> '
+    'within a specific date range for your site.</p>'
+    '<img alt="" src="https://framerusercontent.com/images/NzNDvcqPTnXLlnOUB8sItFvBkAU.png">'
+    '<ul><li data-preset-tag="p"><p>Columns labeled with <code>overall_</code> are aggregated.</p>'
+    '<ul><li data-preset-tag="p"><p>Use the <a href="https://plaid.com/">amount_paid</a> column.</p></li></ul></li>'
+    '<li data-preset-tag="p"><p>Insurance payments reflect what is posted in <em>Insights</em>.</p></li></ul>'
+    '<figure><table><tbody><tr><th><p>Key</p></th><th><p>Action</p></th></tr>'
+    '<tr><td><p><strong>Esc</strong></p></td><td><p>Close palette</p></td></tr></tbody></table></figure>'
+)
+
+# Entry points of offline conversion and validation runs, and their import budget
+STARTUP_MODULES = ('convert_framer_to_mdx', 'convert_onboarding_docs', 'check_image_refs', 'asset_lock')
+STARTUP_TARGET_MS = 50
+STARTUP_RUNS = 5
+# Input sizes of the redos cases, conversions timed per size (best is kept),
+# and the time the largest size may take
+REDOS_SIZES = (1000, 2000, 4000, 8000)
+REDOS_RUNS = 3
+REDOS_TIME_LIMIT_MS = 1000
+# Only needed once an image is downloaded (see image_fetcher.py)
+NETWORK_MODULES = ('requests', 'urllib3')
+
+def write_synthetic_export(path, size_mb):
+    """Write an export file of roughly size_mb megabytes."""
+    target = size_mb * 1024 * 1024
+    block = SAMPLE_BLOCKS.encode('utf-8')
+    with open(path, 'wb') as f:
+        f.write(b'Synthetic Benchmark Page\n\n')
+        written = 0
+        while written < target:
+            f.write(block)
+            written += len(block)
+
+def measure(fn):
+    """Return (seconds, peak traced bytes) for fn.
+
+    Timing comes from an untraced run since tracemalloc slows allocation-heavy code.
+    """
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+def bench_memory(args):
+    """Compare peak memory of whole-document and streaming conversion."""
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "Synthetic Benchmark Page.txt"
+        write_synthetic_export(source, args.size_mb)
+        size = source.stat().st_size
+        print(f"  Synthetic export: {size / 1e6:.1f} MB")
+
+        def legacy():
+            with open(source, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+            html_content = ''.join(lines[2:])
+            tags = ['<img src="/images/x.png" alt="" />'] * len(extract_images(html_content))
+            html_to_markdown(html_content, tags)
+
+        def streaming():
+            with open_export(source) as document, open(os.devnull, 'w', encoding='utf-8') as out:
+                tags = ['<img src="/images/x.png" alt="" />'] * len(document.image_urls())
+                for piece in iter_markdown(document.iter_blocks(), tags):
+                    out.write(piece)
+
+        runs = [('streaming', streaming)]
+        if not args.skip_legacy:
+            runs.insert(0, ('whole-document', legacy))
+        for name, fn in runs:
+            elapsed, peak = measure(fn)
+            print(f"  {name:<15} {elapsed:7.2f}s  peak {peak / 1e6:9.1f} MB  ({peak / size:.2f}x input)")
+
+def synthetic_report_table(rows):
+    """Build a Framer-style report table like those in the Billing Reports docs."""
+    header = ('<tr><th><p>Patient</p></th><th><p>Claim ID</p></th><th><p>Date of Service</p></th>'
+              '<th><p>Payer</p></th><th><p>Amount Paid</p></th></tr>')
+    body = ''.join(
+        f'<tr><td><p>Patient {i}</p></td><td><p>{100000 + i}</p></td><td><p>2024-01-{i % 28 + 1:02d}</p></td>'
+        f'<td><p><strong>Aetna</strong> | PPO</p><p>In network</p></td><td><p>${i % 500}.00</p></td></tr>'
+        for i in range(rows)
+    )
+    return f'<figure><table><tbody>{header}{body}</tbody></table></figure>'
+
+def bench_tables(args):
+    """Time table conversion as row count grows; return False if a row is split across lines."""
+    baseline = None
+    split = False
+    for rows in (1000, 2000, 5000, 10000):
+        table = synthetic_report_table(rows)
+        timings, outputs = {}, {}
+        for name, fn in (('table engine', lambda: convert_table_html(table)),
+                         ('html_to_markdown', lambda: html_to_markdown(table, []))):
+            started = time.perf_counter()
+            outputs[name] = fn()
+            timings[name] = time.perf_counter() - started
+        # The header, separator and one line per row, multi-line cells included
+        lines = outputs['html_to_markdown'].strip().split('\n')
+        if len(lines) != rows + 2:
+            print(f"  ✗ {rows} rows converted to {len(lines)} lines")
+            split = True
+        per_row = timings['html_to_markdown'] / rows * 1e6
+        baseline = baseline or per_row
+        print(f"  {rows:>6} rows  engine {timings['table engine'] * 1000:8.1f} ms  "
+              f"html_to_markdown {timings['html_to_markdown'] * 1000:8.1f} ms  "
+              f"{per_row:6.1f} us/row ({per_row / baseline:.2f}x)")
+    return not split
+
+def replace_per_tag(html_content):
+    """The previous leftover-tag handling: one full-string replace per distinct tag."""
+    for tag in set(re.findall(r'<[^>]+>', html_content)):
+        if (tag.startswith('<img') or tag.startswith('<iframe') or
+            tag in ['<p>', '</p>', '<br>', '<br/>', '<ul>', '</ul>', '<ol>', '</ol>', '<li>', '</li>']):
+            continue
+        html_content = html_content.replace(tag, f'<!-- HTML preserved: {tag} -->')
+    return html_content
+
+def bench_sanitizer(args):
+    """Compare leftover-tag handling as the number of distinct tags grows."""
+    for tags in (1000, 4000, 16000):
+        document = ''.join(f'<span data-id="{i}">cell {i}</span> text ' for i in range(tags))
+        timings = []
+        for fn in (DEFAULT_SANITIZER.sanitize, replace_per_tag):
+            started = time.perf_counter()
+            fn(document)
+            timings.append(time.perf_counter() - started)
+        print(f"  {tags:>6} distinct tags ({len(document) / 1e6:.1f} MB)  "
+              f"one-pass {timings[0] * 1000:8.1f} ms  replace-per-tag {timings[1] * 1000:9.1f} ms")
+
+# name -> (build(n) -> HTML, previous rule on that input as (pattern, flags) or None)
+REDOS_CASES = {
+    'unclosed headings': (lambda n: '<h2>Heading ' * n, (r'<h2>(.*?)</h2>', re.DOTALL)),
+    'unclosed list items': (lambda n: '<ul>' + '<li><p>Item ' * n, (r'(<li[^>]*>)(.*?)(</li>)', re.DOTALL)),
+    'unclosed links': (lambda n: '<p>' + '<a href="https://example.com/">link ' * n + '</p>',
+                       (r'<a[^>]+href="([^"]+)"[^>]*>(.*?)</a>', 0)),
+    'unterminated tags': (lambda n: '<p>x</p>' + '<a href="https://example.com/" ' * n,
+                          (r'<a[^>]+href="([^"]+)"[^>]*>(.*?)</a>', 0)),
+    'repeated hrefs': (lambda n: '<p><a ' + 'href="x' * n + '</a></p>',
+                       (r'<a[^<>]+href="([^"<>]+)"[^<>]*>(.*?)</a>', 0)),
+    'unterminated images': (lambda n: '<p>x</p>' + '<img alt="" src="https://framerusercontent.com/images/x.png" ' * n,
+                            (r'<img[^>]+>', 0)),
+    'split inline tags': (lambda n: '<strong>bold ' * n + '\n</strong>', (r'<strong>(.*?)</strong>', 0)),
+    'stray angle brackets': (lambda n: '<p>x</p>' + 'a < b ' * n, (r'<[^>]+>', 0)),
+    'whitespace runs': (lambda n: '<p>' + ' ' * (n * 8) + 'x</p>', (r'[ \t]+\n', 0)),
+    'deeply nested lists': (lambda n: '<ul><li><p>x</p>' * (n // 10) + '</li></ul>' * (n // 10), None),
+}
+
+def convert_within_budget(document):
+    """Convert document under its budget; return (seconds, how the budget stopped it or '')."""
+    budget = ConversionBudget.for_size(len(document.encode('utf-8')))
+    started = time.perf_counter()
+    try:
+        html_to_markdown(document, [], budget=budget)
+        outcome = ''
+    except (BudgetExceeded, RecursionError) as e:
+        outcome = f"  stopped: {getattr(e, 'reason', type(e).__name__)} budget, {getattr(e, 'stage', '')} stage"
+    return time.perf_counter() - started, outcome
+
+def bench_redos(args):
+    """Check that malformed markup converts in linear time or hits the budget; return False on a miss."""
+    failed = []
+    for case, (build, previous) in REDOS_CASES.items():
+        timings = []
+        previous_elapsed = 0
+        for n in REDOS_SIZES:
+            document = build(n)
+            elapsed, outcome = min(convert_within_budget(document) for _ in range(REDOS_RUNS))
+            timings.append(elapsed)
+            line = f"  {case:<22} {len(document) / 1e3:8.1f} KB  {elapsed * 1000:8.1f} ms"
+            if previous and not args.skip_legacy:
+                # Larger inputs could take hours once the previous rule passes a second
+                if previous_elapsed > 1:
+                    line += "  previous rule   skipped"
+                else:
+                    pattern, flags = previous
+                    started = time.perf_counter()
+                    re.sub(pattern, '', document, flags=flags)
+                    previous_elapsed = time.perf_counter() - started
+                    line += f"  previous rule {previous_elapsed * 1000:9.1f} ms"
+            print(line + outcome)
+        growth = timings[-1] / max(timings[0], 1e-6)
+        linear = growth < 2 * REDOS_SIZES[-1] / REDOS_SIZES[0]
+        fast = timings[-1] * 1000 < REDOS_TIME_LIMIT_MS
+        verdict = '✓ linear' if linear else '✗ superlinear'
+        print(f"  {verdict} ({growth:.1f}x time for {REDOS_SIZES[-1] // REDOS_SIZES[0]}x input)"
+              + ('' if fast else f"  ✗ over {REDOS_TIME_LIMIT_MS} ms") + "\n")
+        if not (linear and fast):
+            failed.append(case)
+    if failed:
+        print(f"  ✗ {len(failed)} case(s) missed their target: {', '.join(failed)}")
+    return not failed
+
+def import_times(module):
+    """Import module in a fresh interpreter; return {module: (self µs, cumulative µs)}."""
+    code = f"import sys, {module}; print(' '.join(sorted(sys.modules)))"
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=Path(__file__).parent,
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        match = re.match(r'import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)', line)
+        if match:
+            times[match.group(4)] = (int(match.group(1)), int(match.group(2)))
+    return times, set(result.stdout.split())
+
+def bench_startup(args):
+    """Check that offline and validation entry points import within STARTUP_TARGET_MS; return False on a miss."""
+    failed = []
+    for module in STARTUP_MODULES:
+        runs = [import_times(module) for _ in range(STARTUP_RUNS)]
+        times, loaded = min(runs, key=lambda run: run[0][module][1])
+        total_ms = times[module][1] / 1000
+        verdict = '✓' if total_ms < STARTUP_TARGET_MS else '✗'
+        network = [name for name in NETWORK_MODULES if name in loaded]
+        print(f"  {verdict} {module:<24} {total_ms:7.1f} ms (target {STARTUP_TARGET_MS} ms)"
+              + (f"  ✗ loads {', '.join(network)}" if network else ''))
+        slowest = sorted((t for t in times.items() if t[0] != module), key=lambda t: -t[1][0])[:5]
+        for name, (own, _) in slowest:
+            print(f"      {name:<28} {own / 1000:7.1f} ms")
+        if total_ms >= STARTUP_TARGET_MS or network:
+            failed.append(module)
+    if failed:
+        print(f"  ✗ {len(failed)} entry point(s) missed their target: {', '.join(failed)}")
+    return not failed
+
+SUITES = {
+    'memory': bench_memory,
+    'tables': bench_tables,
+    'sanitizer': bench_sanitizer,
+    'redos': bench_redos,
+    'startup': bench_startup,
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Framer-to-MDX converter.")
+    parser.add_argument('suites', nargs='*', metavar='suite', help=f"Suites to run: {', '.join(SUITES)} (default: all)")
+    parser.add_argument('--size-mb', type=int, default=20, help='Size of the synthetic export for the memory suite')
+    parser.add_argument('--skip-legacy', action='store_true', help='Skip the whole-document baseline (needs ~30x input in RAM)')
+    args = parser.parse_args()
+    unknown = [name for name in args.suites if name not in SUITES]
+    if unknown:
+        parser.error(f"unknown suite(s): {', '.join(unknown)}")
+
+    failed = []
+    for name in args.suites or list(SUITES):
+        print(f"[{name}]")
+        # Checks return False on a miss; benchmarks return None
+        if SUITES[name](args) is False:
+            failed.append(name)
+        print()
+    if failed:
+        print(f"✗ Failed: {', '.join(failed)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Build every source set in one process: the four workflow categories and the
+onboarding documents.
+
+Usage:
+    python3 build.py [--offline] [--jobs N] [--time-budget SECONDS] [--step-budget N]
+                     [--resume] [--strict] [--memory]
+
+Replaces running convert_framer_to_mdx.py all and convert_onboarding_docs.py
+one after the other. Every export of every source set is a task of one task
+graph: its image downloads run on a single pool of --jobs workers, and the
+export is converted as soon as they finish. All tasks share one run (see
+ConversionRun in convert_framer_to_mdx.py): one image fetcher with its HTTP
+session, token bucket, concurrency limit and circuit breakers, one asset
+lock, one journal (--resume continues an interrupted build), heading index,
+artifact store and change report.
+
+Exports are started heaviest first (sharding.document_weight), so the
+export with the most images starts downloading at once and a build takes
+little longer than its slowest task. Conversion itself runs on the main
+thread, which owns the run's state; it is a small part of a build next to
+downloads. A build's conversion timings go to the history used by --plan
+under the category "build".
+
+Onboarding documents are converted as the category Onboarding-Documents,
+through the same image paths and tags as the workflow categories. For the
+sanitized titles in use these are the paths convert_onboarding_docs.py
+writes.
+
+The build ends with one report: a line per source set, the slowest task
+against the build's wall-clock time, and the run summary
+convert_framer_to_mdx.py prints.
+"""
+
+import sys
+import time
+from pathlib import Path
+
+from conversion_budget import DEFAULT_STEP_BUDGET, DEFAULT_TIME_BUDGET
+from convert_framer_to_mdx import ConversionRun, document_images, load_file_mapping
+from export_sources import open_export
+from run_journal import RunJournal, journal_path
+from run_planner import converter_fingerprint
+from sharding import document_weight
+
+BASE_DIR = Path(__file__).parent
+INPUT_DIR = BASE_DIR / "AAA-Framer-Export"
+IMAGES_DIR = BASE_DIR / "images"
+ONBOARDING_FOLDER = "Onboarding Documents"
+
+# Source sets in report order; the workflow categories are those of load_file_mapping()
+CATEGORIES = ('owners-admin', 'provider', 'front-office', 'billing')
+ONBOARDING = 'onboarding'
+# Exports whose images are downloaded at once; requests are also limited by the fetcher
+DEFAULT_JOBS = 8
+
+def source_tasks(input_dir=INPUT_DIR):
+    """Return (file mapping, tasks, missing) for every source set.
+
+    Tasks are (source set, export path, export filename), heaviest first; the
+    file mapping is keyed by the path's name, as ExportDocument.name is;
+    missing lists the (source set, path) of mapped exports not on disk. An
+    export mapped in several categories belongs to the last, as in
+    load_file_mapping("all").
+    """
+    file_mapping, sources = {}, {}
+    for category in CATEGORIES:
+        for filename, mapping in load_file_mapping(category).items():
+            file_mapping[filename] = mapping
+            sources[filename] = (category, Path(input_dir) / filename, filename)
+    for path in sorted((Path(input_dir) / ONBOARDING_FOLDER).glob("*.txt")):
+        file_mapping[path.name] = {"category": "Onboarding-Documents", "subcategory": "", "title": path.stem}
+        sources[path.name] = (ONBOARDING, path, f"{ONBOARDING_FOLDER}/{path.name}")
+
+    weighted, missing = [], []
+    for source_set, path, filename in sources.values():
+        if not path.exists():
+            missing.append((source_set, path))
+            continue
+        with open_export(path, filename) as document:
+            weighted.append((document_weight(document), (source_set, path, filename)))
+    tasks = [task for _, task in sorted(weighted, key=lambda item: -item[0])]
+    return file_mapping, tasks, missing
+
+def prefetch(task, mapping, lock, fetcher, offline=False):
+    """Download the images of a task's export that have no intact locked copy.
+
+    Runs on the worker pool; returns ({url: bytes or None}, seconds). Only the
+    fetcher, which is thread-safe, and read-only lookups in the asset lock
+    are used here.
+    """
+    _, path, filename = task
+    if offline:
+        return {}, 0.0
+    started = time.monotonic()
+    with open_export(path, filename) as document:
+        images = document_images(document, mapping) if document.is_valid else []
+    urls = [url for url, _ in images if lock.read_local(url) is None]
+    section = '/'.join(p for p in (mapping["category"], mapping["subcategory"]) if p)
+    fetched = fetcher.fetch_all((filename, section), urls) if urls else {}
+    return fetched, time.monotonic() - started
+
+class PrefetchedImages:
+    """Hands fetch_images() the images a prefetch task downloaded.
+
+    Follows the ImageFetcher interface fetch_images() and ConversionRun use;
+    URLs that were not prefetched are fetched by fetcher, and only their time
+    counts in download_seconds. deferred is fetcher's.
+    """
+
+    def __init__(self, fetched, fetcher):
+        self.fetched = fetched
+        self.fetcher = fetcher
+        self.download_seconds = 0.0
+
+    @property
+    def deferred(self):
+        return self.fetcher.deferred
+
+    def fetch_all(self, article, urls):
+        results = {url: self.fetched[url] for url in urls if url in self.fetched}
+        missing = [url for url in urls if url not in self.fetched]
+        if missing:
+            started = time.monotonic()
+            results.update(self.fetcher.fetch_all(article, missing))
+            self.download_seconds += time.monotonic() - started
+        return results
+
+def main():
+    import argparse
+    from collections import Counter
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    parser = argparse.ArgumentParser(description="Convert every category and the onboarding documents in one run.")
+    parser.add_argument('--offline', action='store_true',
+                        help='Use only images recorded in assets.lock.json; download nothing')
+    parser.add_argument('--jobs', type=int, default=DEFAULT_JOBS, help='Exports downloading images at once')
+    parser.add_argument('--time-budget', type=float, default=DEFAULT_TIME_BUDGET,
+                        help='Per-document conversion time limit in seconds')
+    parser.add_argument('--step-budget', type=int, default=DEFAULT_STEP_BUDGET,
+                        help='Per-document step limit, per byte of export')
+    parser.add_argument('--resume', action='store_true', help='Continue an interrupted build from its journal')
+    parser.add_argument('--strict', action='store_true',
+                        help='Exit with status 1 if a converted page is over its weight budget')
+    parser.add_argument('--memory', action='store_true',
+                        help='Report peak memory per stage and document (slower; see memory_profile.py)')
+    args = parser.parse_args()
+    if args.jobs < 1:
+        print("ERROR: --jobs must be at least 1")
+        return 1
+
+    started = time.monotonic()
+    file_mapping, tasks, missing = source_tasks()
+    for source_set, path in missing:
+        print(f"✗ File not found ({source_set}): {path}")
+    counts = Counter(source_set for source_set, _, _ in tasks)
+    print(f"Building {len(tasks)} export(s): "
+          + ', '.join(f"{source_set} {counts[source_set]}" for source_set in CATEGORIES + (ONBOARDING,)))
+    print(f"Downloading images for up to {args.jobs} export(s) at once\n")
+
+    run = {'category': 'build', 'shard': None, 'bundle': None, 'converter': converter_fingerprint()}
+    try:
+        journal = RunJournal(journal_path(), run, resume=args.resume, root=BASE_DIR)
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        return 1
+    if args.resume:
+        print(f"Resuming from {journal.path.name} ({len(journal.documents)} document(s) journaled)\n")
+    conversion = ConversionRun(file_mapping, run, journal, BASE_DIR, IMAGES_DIR, args)
+    converted = Counter()
+    task_seconds = {}
+
+    def convert(task, fetcher=None, retry=False):
+        source_set, path, filename = task
+        task_started = time.monotonic()
+        with open_export(path, filename) as document:
+            ok = conversion.convert(document, None if retry else conversion.tag_counts, retry, fetcher)
+        task_seconds[filename] = task_seconds.get(filename, 0.0) + time.monotonic() - task_started
+        if ok and not retry:
+            conversion.processed += 1
+            converted[source_set] += 1
+
+    # Exports the journal has finished need no downloads
+    pending = []
+    for task in tasks:
+        if journal.finished(task[1].name) is not None:
+            convert(task)
+        else:
+            pending.append(task)
+    with ThreadPoolExecutor(max_workers=args.jobs, thread_name_prefix='prefetch') as pool:
+        futures = {}
+        for task in pending:
+            futures[pool.submit(prefetch, task, file_mapping[task[1].name], conversion.lock, conversion.fetcher,
+                                args.offline)] = task
+        for future in as_completed(futures):
+            task = futures[future]
+            fetched, seconds = future.result()
+            task_seconds[task[2]] = seconds
+            convert(task, PrefetchedImages(fetched, conversion.fetcher))
+
+    # Convert exports with deferred images again once their hosts had time to recover
+    retry = conversion.take_retry()
+    for task in tasks:
+        if task[1].name in retry:
+            convert(task, retry=True)
+
+    conversion.finish()
+    elapsed = time.monotonic() - started
+    print("\nSource sets:")
+    for source_set in CATEGORIES + (ONBOARDING,):
+        print(f"  {source_set:<14} {converted[source_set]}/{counts[source_set]} converted")
+    if task_seconds:
+        slowest = max(task_seconds, key=task_seconds.get)
+        print(f"Wall-clock {elapsed:.1f}s; slowest task {task_seconds[slowest]:.1f}s ({slowest})")
+    over = conversion.report()
+    return 1 if over and args.strict else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
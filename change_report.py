@@ -0,0 +1,198 @@
+"""
+Structural change report of a conversion run against the previous output.
+
+Before a document is converted its MDX on disk (the previous run's output)
+is split into blocks: frontmatter, headings, paragraphs, lists, tables,
+images, code and components such as <Note>. After conversion the new MDX is
+split the same way and the two are compared section by section, a section
+being the blocks under one heading.
+
+Blocks are compared by a hash of their text, and sections by their heading
+title, with whitespace collapsed, so reflowed text is not a change. Images
+are hashed by the SHA-256 of the image file from the asset lock rather than
+by path, so images renumbered by an insertion above them only count as the
+new image.
+
+The report lists, per changed article, the sections added, removed and
+modified with counts of blocks per kind, e.g.
+
+    Billing-Workflows/Reports/ar-reports.mdx
+      ~ Summary: 1 paragraph modified, 1 image added
+      + Filter Notes (3 blocks)
+"""
+
+import difflib
+import hashlib
+import os
+import re
+from pathlib import Path
+
+FRONTMATTER_PATTERN = re.compile(r'\A---\n.*?\n---\n', re.DOTALL)
+HEADING_PATTERN = re.compile(r'#{1,6}(?:\s+(.*))?')
+IMAGE_SRC_PATTERN = re.compile(r'<img\s[^>]*src="([^"]*)"|!\[[^\]]*\]\(([^)\s]*)')
+LIST_ITEM_PATTERN = re.compile(r'(?:[-*+]|\d+\.)\s')
+PREAMBLE = '(top)'
+
+def block_kind(chunk):
+    first = chunk.lstrip()
+    if HEADING_PATTERN.fullmatch(first.split('\n', 1)[0]):
+        return 'heading'
+    if first.startswith('```'):
+        return 'code'
+    if first.startswith('|'):
+        return 'table'
+    if LIST_ITEM_PATTERN.match(first):
+        return 'list'
+    if first.startswith(('<img', '![')) and '\n' not in first.strip():
+        return 'image'
+    if first.startswith('<'):
+        return 'component'
+    return 'paragraph'
+
+def iter_chunks(body):
+    """Yield the blank-line separated chunks of an MDX body, keeping code fences whole."""
+    chunk, fenced = [], False
+    for line in body.split('\n'):
+        if line.lstrip().startswith('```'):
+            fenced = not fenced
+        if not line.strip() and not fenced:
+            if chunk:
+                yield '\n'.join(chunk)
+            chunk = []
+            continue
+        chunk.append(line)
+    if chunk:
+        yield '\n'.join(chunk)
+
+def digest(text):
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+def split_sections(mdx, images=()):
+    """Return [(heading, [(kind, hash), ...]), ...] for an MDX document.
+
+    images are asset lock entries; an image block whose path is locked is
+    hashed by the image's SHA-256.
+    """
+    by_path = {'/' + entry['path']: entry['sha256'] for entry in images}
+    sections = [(PREAMBLE, [])]
+    frontmatter = FRONTMATTER_PATTERN.match(mdx)
+    if frontmatter:
+        sections[0][1].append(('frontmatter', digest(' '.join(frontmatter.group(0).split()))))
+        mdx = mdx[frontmatter.end():]
+    for chunk in iter_chunks(mdx):
+        kind = block_kind(chunk)
+        if kind == 'heading':
+            heading, _, chunk = chunk.lstrip().partition('\n')
+            # Collapsed like block text, so a heading whose whitespace changed is the same section
+            title = ' '.join((HEADING_PATTERN.fullmatch(heading).group(1) or '').split())
+            # Framer's empty spacer headings do not start a section
+            if title:
+                sections.append((title, []))
+            if not chunk.strip():
+                continue
+            kind = block_kind(chunk)
+        if kind == 'image':
+            match = IMAGE_SRC_PATTERN.search(chunk)
+            src = match and (match.group(1) or match.group(2))
+            text = by_path.get(src) or chunk
+        else:
+            text = ' '.join(chunk.split())
+        sections[-1][1].append((kind, digest(text)))
+    return [(title, blocks) for title, blocks in sections if blocks or title != PREAMBLE]
+
+def plural(count, kind):
+    return f"{count} {kind}{'' if count == 1 else 's'}"
+
+def diff_blocks(old, new):
+    """Return {(kind, change): count} for two block lists, change being added, removed or modified."""
+    counts = {}
+
+    def count(blocks, change):
+        for kind, _ in blocks:
+            counts[(kind, change)] = counts.get((kind, change), 0) + 1
+
+    matcher = difflib.SequenceMatcher(None, old, new, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            continue
+        removed, added = old[i1:i2], new[j1:j2]
+        if tag == 'replace':
+            paired = min(len(removed), len(added))
+            count(added[:paired], 'modified')
+            removed, added = removed[paired:], added[paired:]
+        count(removed, 'removed')
+        count(added, 'added')
+    return counts
+
+def diff_sections(old, new):
+    """Return the report lines for two split_sections() results; [] if nothing changed."""
+    def keyed(sections):
+        # Repeated headings are told apart by occurrence
+        seen, result = {}, {}
+        for title, blocks in sections:
+            seen[title] = seen.get(title, 0) + 1
+            result[(title, seen[title])] = blocks
+        return result
+
+    old_sections, new_sections = keyed(old), keyed(new)
+    lines = []
+    for key, blocks in new_sections.items():
+        title = key[0] if key[1] == 1 else f"{key[0]} ({key[1]})"
+        if key not in old_sections:
+            lines.append(f"+ {title} ({plural(len(blocks), 'block')})")
+        elif old_sections[key] != blocks:
+            counts = diff_blocks(old_sections[key], blocks)
+            lines.append(f"~ {title}: " + ', '.join(f"{plural(count, kind)} {change}"
+                                                     for (kind, change), count in sorted(counts.items())))
+    for key, blocks in old_sections.items():
+        if key not in new_sections:
+            title = key[0] if key[1] == 1 else f"{key[0]} ({key[1]})"
+            lines.append(f"- {title} ({plural(len(blocks), 'block')})")
+    if not lines and list(old_sections) != list(new_sections):
+        lines.append("sections reordered")
+    return lines
+
+class ChangeReport:
+    """Collects the old and new structure of the articles converted in a run.
+
+    Articles are keyed by MDX path; adding one again (the image retry pass)
+    keeps the structure it had before the run.
+    """
+
+    def __init__(self):
+        self.articles = {}
+
+    def before(self, path, images=()):
+        """Record an article's MDX on disk before it is converted."""
+        if path in self.articles:
+            return
+        old = split_sections(path.read_text(encoding='utf-8'), images) if path.exists() else None
+        self.articles[path] = (old, None)
+
+    def after(self, path, images=()):
+        """Record an article's MDX once converted."""
+        old, _ = self.articles.get(path, (None, None))
+        self.articles[path] = (old, split_sections(path.read_text(encoding='utf-8'), images))
+
+    def lines(self, root):
+        """Return the report as lines; paths are shown relative to root."""
+        changed, new, unchanged = [], [], 0
+        for path, (old, current) in self.articles.items():
+            if current is None:
+                continue
+            relative = Path(os.path.relpath(path, root)).as_posix()
+            if old is None:
+                new.append(relative)
+                continue
+            differences = diff_sections(old, current)
+            if differences:
+                changed.append((relative, differences))
+            else:
+                unchanged += 1
+        lines = [f"Changes against the previous output: {len(changed)} article(s) changed, "
+                 f"{len(new)} new, {unchanged} unchanged"]
+        for relative, differences in sorted(changed):
+            lines.append(f"  {relative}")
+            lines.extend(f"    {line}" for line in differences)
+        lines.extend(f"  + {relative} (new)" for relative in sorted(new))
+        return lines
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Differential conformance harness for HTML-to-MDX conversion engines.
+
+Usage:
+    python3 check_conformance.py snapshot
+    python3 check_conformance.py compare [--engine module:function] [--jobs N]
+    python3 check_conformance.py fuzz [--engine module:function] [--count N] [--seed S]
+
+An engine is any callable engine(html_content, image_tags) -> markdown with
+the same contract as convert_framer_to_mdx.html_to_markdown.
+
+Conversion runs convert an export block by block (iter_markdown over
+ExportDocument.iter_blocks), not with html_to_markdown, so the corpus is also
+checked through that streaming path (STREAMING_ENGINE), with a block cut at
+every top-level element.
+
+- snapshot: record the current html_to_markdown output for every export in
+  AAA-Framer-Export/ (including Onboarding Documents/) as the golden corpus
+  in conformance/golden.jsonl, reporting exports the streaming path
+  converts differently
+- compare: run a candidate engine and the streaming path over the golden
+  corpus in parallel and report, per file, the normalized diff against the
+  golden output and the candidate's speedup over the reference engine
+- fuzz: generate Framer-style HTML and report inputs on which the candidate
+  and reference engines disagree, or the candidate splits a pipe-table row
+  across lines
+
+Image tags are derived deterministically from the file mapping, so the
+corpus does not depend on downloaded images.
+"""
+
+import argparse
+import difflib
+import hashlib
+import importlib
+import json
+import os
+import random
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent
+INPUT_DIR = BASE_DIR / "AAA-Framer-Export"
+GOLDEN_PATH = BASE_DIR / "conformance" / "golden.jsonl"
+REFERENCE_ENGINE = "convert_framer_to_mdx:html_to_markdown"
+STREAMING_ENGINE = "check_conformance:stream_markdown"
+# Cut a block at every top-level element, so every cut point is exercised
+STREAMING_BATCH_SIZE = 1
+ONBOARDING_FOLDER = "Onboarding Documents"
+
+def load_engine(spec):
+    """Import an engine given as "module:function"."""
+    module_name, _, function_name = spec.partition(':')
+    if not function_name:
+        raise SystemExit(f"ERROR: Engine must be given as module:function, got '{spec}'")
+    return getattr(importlib.import_module(module_name), function_name)
+
+def list_exports():
+    """Return export paths relative to AAA-Framer-Export/, sorted."""
+    names = [p.name for p in INPUT_DIR.glob("*.txt")]
+    names += [f"{ONBOARDING_FOLDER}/{p.name}" for p in (INPUT_DIR / ONBOARDING_FOLDER).glob("*.txt")]
+    return sorted(names)
+
+def read_export(name):
+    """Return (source bytes, title, html) for an export."""
+    data = (INPUT_DIR / name).read_bytes()
+    lines = data.decode('utf-8').replace('\r\n', '\n').splitlines(keepends=True)
+    return data, lines[0].strip(), ''.join(lines[2:])
+
+def conformance_image_tags(name, title, html_content):
+    """Deterministic local image tags for an export, as process_file would emit them."""
+    from convert_framer_to_mdx import (create_image_tag, extract_images, image_location,
+                                       load_file_mapping, sanitize_filename)
+
+    file_mapping = load_file_mapping("all")
+    if name.startswith(f"{ONBOARDING_FOLDER}/"):
+        category_path, subcategory_path = "Onboarding-Documents", ""
+    elif name in file_mapping:
+        category_path = file_mapping[name]["category"]
+        subcategory_path = file_mapping[name]["subcategory"]
+    else:
+        category_path, subcategory_path = "Unmapped", ""
+    sanitized_title = sanitize_filename(title)
+    return [
+        create_image_tag(image_location(category_path, subcategory_path, sanitized_title, i)[1])
+        for i in range(1, len(extract_images(html_content)) + 1)
+    ]
+
+def stream_markdown(html_content, image_tags):
+    """Convert html_content the way conversion runs do, block by block."""
+    from convert_framer_to_mdx import iter_markdown
+    from export_sources import ExportDocument
+
+    document = ExportDocument('conformance.txt', b'Conformance\n\n' + html_content.encode('utf-8'))
+    return ''.join(iter_markdown(document.iter_blocks(STREAMING_BATCH_SIZE), image_tags))
+
+def normalize(markdown):
+    """Normalize insignificant differences: line endings, trailing spaces, blank-line runs."""
+    markdown = markdown.replace('\r\n', '\n')
+    markdown = re.sub(r'[ \t]+$', '', markdown, flags=re.MULTILINE)
+    markdown = re.sub(r'\n{3,}', '\n\n', markdown)
+    return markdown.strip()
+
+def split_table_rows(markdown):
+    """Return the lines of markdown that start a pipe-table row without ending one, or the reverse."""
+    return [line for line in markdown.split('\n') if line.startswith('| ') != line.endswith(' |')]
+
+def load_golden(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def snapshot(args):
+    """Write the golden corpus from the reference engine."""
+    engine = load_engine(REFERENCE_ENGINE)
+    streaming = load_engine(STREAMING_ENGINE)
+    path = Path(args.golden)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    diverging = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for name in list_exports():
+            data, title, html_content = read_export(name)
+            image_tags = conformance_image_tags(name, title, html_content)
+            record = {
+                'file': name,
+                'source_sha256': hashlib.sha256(data).hexdigest(),
+                'mdx': engine(html_content, image_tags),
+            }
+            if normalize(streaming(html_content, image_tags)) != normalize(record['mdx']):
+                diverging += 1
+                print(f"✗ Streaming conversion differs: {name}")
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+    print(f"Wrote {len(list_exports())} golden outputs to {path}")
+    if diverging:
+        print(f"{diverging} export(s) convert differently block by block; "
+              f"run 'compare --engine {STREAMING_ENGINE}' for diffs")
+        return 1
+    return 0
+
+_engines = {}
+
+def _time_engine(spec, html_content, image_tags, repeat):
+    engine = _engines.get(spec) or _engines.setdefault(spec, load_engine(spec))
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        output = engine(html_content, image_tags)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return output, best
+
+def _compare_one(task):
+    """Worker: run reference and candidate on one golden record."""
+    record, candidate, repeat = task
+    data, title, html_content = read_export(record['file'])
+    image_tags = conformance_image_tags(record['file'], title, html_content)
+    _, reference_time = _time_engine(REFERENCE_ENGINE, html_content, image_tags, repeat)
+    try:
+        output, candidate_time = _time_engine(candidate, html_content, image_tags, repeat)
+    except Exception as e:
+        return record['file'], 'error', f"{type(e).__name__}: {e}", reference_time, None
+    stale = hashlib.sha256(data).hexdigest() != record['source_sha256']
+    expected, actual = normalize(record['mdx']), normalize(output)
+    if expected != actual:
+        diff = '\n'.join(difflib.unified_diff(
+            expected.split('\n'), actual.split('\n'), 'golden', 'candidate', lineterm='', n=1))
+        return record['file'], 'diff', diff, reference_time, candidate_time
+    # The candidate conforms; the streaming path conversion runs use must too
+    if candidate != STREAMING_ENGINE:
+        streamed, _ = _time_engine(STREAMING_ENGINE, html_content, image_tags, 1)
+        streamed = normalize(streamed)
+        if streamed != expected:
+            diff = '\n'.join(difflib.unified_diff(
+                expected.split('\n'), streamed.split('\n'), 'golden', 'streaming', lineterm='', n=1))
+            return record['file'], 'stream', diff, reference_time, candidate_time
+    return record['file'], 'stale' if stale else 'match', '', reference_time, candidate_time
+
+def compare(args):
+    """Run a candidate engine against the golden corpus."""
+    golden = load_golden(args.golden)
+    if args.only:
+        golden = [r for r in golden if args.only.lower() in r['file'].lower()]
+    tasks = [(record, args.engine, args.repeat) for record in golden]
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        results = list(pool.map(_compare_one, tasks))
+
+    counts = {}
+    total_reference = total_candidate = 0.0
+    print(f"{'status':<7} {'ref ms':>8} {'cand ms':>8} {'speedup':>8}  file")
+    for name, status, detail, reference_time, candidate_time in results:
+        counts[status] = counts.get(status, 0) + 1
+        total_reference += reference_time
+        if candidate_time is not None:
+            total_candidate += candidate_time
+            speedup = f"{reference_time / candidate_time:7.2f}x" if candidate_time else '     inf'
+            timing = f"{candidate_time * 1000:8.2f} {speedup}"
+        else:
+            timing = f"{'-':>8} {'-':>8}"
+        if status != 'match' or args.verbose:
+            print(f"{status:<7} {reference_time * 1000:8.2f} {timing}  {name}")
+            if detail and status in ('diff', 'stream', 'error'):
+                print('\n'.join('    ' + line for line in detail.split('\n')[:args.diff_lines]))
+
+    print(f"\n{len(results)} files: " + ', '.join(f"{count} {status}" for status, count in sorted(counts.items())))
+    if total_candidate:
+        print(f"Total: reference {total_reference * 1000:.1f} ms, candidate {total_candidate * 1000:.1f} ms "
+              f"({total_reference / total_candidate:.2f}x)")
+    if counts.get('stale'):
+        print("Note: stale files changed since the snapshot; re-run 'snapshot' to refresh the corpus")
+    if counts.get('stream'):
+        print("Note: stream files match when converted whole but not block by block (see iter_blocks)")
+    return 1 if counts.get('diff') or counts.get('stream') or counts.get('error') else 0
+
+# Vocabulary for generated documents
+WORDS = ("claim patient payer remittance denial posting report chart note the a of to "
+         "eligibility insurance schedule appointment provider balance copay PR").split()
+ENTITIES = ('&amp;', '&nbsp;', '&lt;', '&gt;', '&#39;', '&quot;', '—')
+
+def _text(rng):
+    words = [rng.choice(WORDS) for _ in range(rng.randint(1, 8))]
+    if rng.random() < 0.2:
+        words.insert(rng.randrange(len(words) + 1), rng.choice(ENTITIES))
+    return ' '.join(words)
+
+def _inline(rng, depth=0):
+    parts = []
+    for _ in range(rng.randint(1, 4)):
+        roll = rng.random()
+        if depth < 2 and roll < 0.15:
+            parts.append(f'<strong>{_inline(rng, depth + 1)}</strong>')
+        elif depth < 2 and roll < 0.25:
+            parts.append(f'<em>{_inline(rng, depth + 1)}</em>')
+        elif roll < 0.32:
+            parts.append(f'<code>{rng.choice(WORDS)}_{rng.choice(WORDS)}</code>')
+        elif roll < 0.40:
+            parts.append(f'<a href="https://example.com/{rng.choice(WORDS)}">{_text(rng)}</a>')
+        elif roll < 0.43:
+            parts.append('<br>')
+        else:
+            parts.append(_text(rng))
+    return ' '.join(parts)
+
+def _list(rng, depth=0):
+    tag = rng.choice(('ul', 'ol'))
+    items = []
+    for _ in range(rng.randint(1, 4)):
+        nested = _list(rng, depth + 1) if depth < 2 and rng.random() < 0.3 else ''
+        items.append(f'<li data-preset-tag="p"><p>{_inline(rng)}</p>{nested}</li>')
+    return f'<{tag}>{"".join(items)}</{tag}>'
+
+def _cell(rng):
+    # Some cells have several paragraphs, which must stay on the row's line
+    return ''.join(f'<p>{_inline(rng)}</p>' for _ in range(rng.choice((1, 1, 2, 3))))
+
+def _table(rng):
+    columns = rng.randint(1, 4)
+    rows = [''.join(f'<th><p>{_text(rng)}</p></th>' for _ in range(columns))]
+    for _ in range(rng.randint(1, 5)):
+        rows.append(''.join(f'<td>{_cell(rng)}</td>' for _ in range(columns)))
+    table = '<table><tbody>' + ''.join(f'<tr>{r}</tr>' for r in rows) + '</tbody></table>'
+    return f'<figure>{table}</figure>' if rng.random() < 0.7 else table
+
+def generate_document(rng, malformed=0.0):
+    """Generate a Framer-style HTML body.
+
+    malformed is the chance of dropping a closing tag or, as often, adding a
+    stray one.
+    """
+    blocks = []
+    for _ in range(rng.randint(3, 25)):
+        roll = rng.random()
+        if roll < 0.35:
+            blocks.append(f'<p>{_inline(rng)}</p>')
+        elif roll < 0.5:
+            level = rng.randint(2, 6)
+            blocks.append(f'<h{level}>{_text(rng)}</h{level}>')
+        elif roll < 0.65:
+            blocks.append(_list(rng))
+        elif roll < 0.75:
+            blocks.append(f'<img alt="" src="https://framerusercontent.com/images/{rng.getrandbits(64):x}.png">')
+        elif roll < 0.82:
+            blocks.append(_table(rng))
+        elif roll < 0.86:
+            blocks.append('<iframe src="https://www.youtube.com/embed/J5VRrfTz8kM?rel=0&amp;mute=1" '
+                          'frameborder="0" allow="autoplay"></iframe>')
+        elif roll < 0.90:
+            blocks.append(f'<blockquote><p>{_inline(rng)}</p></blockquote>')
+        else:
+            blocks.append('<p><br></p>')
+    document = ''.join(blocks)
+    if malformed and rng.random() < malformed:
+        closers = list(re.finditer(r'</[a-z0-9]+>', document))
+        if closers:
+            closer = rng.choice(closers)
+            if rng.random() < 0.5:
+                document = document[:closer.start()] + document[closer.end():]
+            else:
+                start = rng.choice([m.start() for m in re.finditer('<', document)])
+                document = document[:start] + rng.choice(closers).group(0) + document[start:]
+    return document
+
+def fuzz(args):
+    """Look for inputs where candidate and reference engines disagree or table rows are split."""
+    from convert_framer_to_mdx import create_image_tag, extract_images
+
+    reference = load_engine(args.reference)
+    candidate = load_engine(args.engine)
+    rng = random.Random(args.seed)
+    divergences = 0
+    save_dir = Path(args.save_dir) if args.save_dir else None
+    for case in range(args.count):
+        document = generate_document(rng, args.malformed)
+        image_tags = [create_image_tag(f"/images/Fuzz/case/case-{i}.png")
+                      for i in range(1, len(extract_images(document)) + 1)]
+        expected = normalize(reference(document, image_tags))
+        try:
+            actual = normalize(candidate(document, image_tags))
+        except Exception as e:
+            actual = f"<engine raised {type(e).__name__}: {e}>"
+        split_rows = split_table_rows(actual)
+        if expected == actual and not split_rows:
+            continue
+        divergences += 1
+        if split_rows:
+            print(f"✗ Case {case} splits a table row ({len(document)} bytes): {split_rows[0]!r}")
+        else:
+            print(f"✗ Case {case} diverges ({len(document)} bytes)")
+        if save_dir:
+            save_dir.mkdir(parents=True, exist_ok=True)
+            (save_dir / f"case-{args.seed}-{case}.txt").write_text(f"Fuzz case {case}\n\n{document}", encoding='utf-8')
+        if divergences <= args.show:
+            diff = difflib.unified_diff(expected.split('\n'), actual.split('\n'), 'reference', 'candidate', lineterm='', n=1)
+            print('\n'.join('    ' + line for line in list(diff)[:args.diff_lines]))
+    print(f"\n{args.count} generated documents (seed {args.seed}): {divergences} divergences")
+    return 1 if divergences else 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Conformance harness for HTML-to-MDX engines.")
+    parser.add_argument('--golden', default=str(GOLDEN_PATH), help='Golden corpus path')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    commands.add_parser('snapshot', help='Record reference output for every export')
+
+    compare_parser = commands.add_parser('compare', help='Check a candidate engine against the golden corpus')
+    compare_parser.add_argument('--engine', default=REFERENCE_ENGINE, help='Candidate engine as module:function')
+    compare_parser.add_argument('--jobs', type=int, default=os.cpu_count(), help='Parallel worker processes')
+    compare_parser.add_argument('--repeat', type=int, default=3, help='Timing runs per file (best is kept)')
+    compare_parser.add_argument('--only', help='Only files whose name contains this text')
+    compare_parser.add_argument('--diff-lines', type=int, default=30, help='Diff lines shown per file')
+    compare_parser.add_argument('-v', '--verbose', action='store_true', help='Also list matching files')
+
+    fuzz_parser = commands.add_parser('fuzz', help='Compare engines on generated Framer-style HTML')
+    fuzz_parser.add_argument('--engine', default=REFERENCE_ENGINE, help='Candidate engine as module:function')
+    fuzz_parser.add_argument('--reference', default=REFERENCE_ENGINE, help='Reference engine as module:function')
+    fuzz_parser.add_argument('--count', type=int, default=500, help='Documents to generate')
+    fuzz_parser.add_argument('--seed', type=int, default=0)
+    fuzz_parser.add_argument('--malformed', type=float, default=0.1, help='Chance of a dropped or stray closing tag per document')
+    fuzz_parser.add_argument('--save-dir', help='Write diverging inputs here as export files')
+    fuzz_parser.add_argument('--show', type=int, default=3, help='Diverging cases to print diffs for')
+    fuzz_parser.add_argument('--diff-lines', type=int, default=30)
+
+    args = parser.parse_args()
+    sys.path.insert(0, str(BASE_DIR))
+    if args.command == 'snapshot':
+        return snapshot(args)
+    if args.command == 'compare':
+        return compare(args)
+    return fuzz(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
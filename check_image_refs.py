@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Check that image references in the MDX pages resolve to files under images/.
+
+Usage:
+    python3 check_image_refs.py [--prune] [--jobs N]
+
+The asset tree is indexed once in memory and every .mdx file (plus
+docs.json) is scanned in parallel for <img src="...">, <YouTubeFacade
+poster="..."> and ![](...) references. The two conversion scripts write paths differently
+(convert_framer_to_mdx.py dash-escapes spaces and &, convert_onboarding_docs.py
+URL-encodes them), so each reference is decoded and also compared in a
+normalized form. Reports:
+- missing: references with no matching file
+- normalized only: references that match a file only after normalizing
+  spaces, dashes and &; the file exists but the URL as written will not load
+- orphaned: files under images/ that nothing references
+
+--prune deletes orphaned files and drops them from assets.lock.json.
+"""
+
+import argparse
+import os
+import re
+import sys
+from pathlib import Path
+from urllib.parse import unquote
+
+BASE_DIR = Path(__file__).parent
+IMAGES_DIR = BASE_DIR / "images"
+# Folders that hold no published pages
+SKIP_DIRS = {'.git', 'node_modules', 'images', 'AAA-Framer-Export', '.conversion', '__pycache__'}
+
+# img sources, YouTubeFacade posters and Markdown images
+REFERENCE_PATTERN = re.compile(r'''<(?:img|YouTubeFacade)[^<>]*?\s(?:src|poster)=["']([^"']+)["']|!\[[^\]]*\]\(([^)\s]+)''')
+
+def normalize(path):
+    """Canonical form of an image path: decoded, with both dash conventions applied."""
+    path = unquote(path).replace('-&-', '&').replace(' ', '-').replace('&', '-&-')
+    return re.sub(r'-{2,}', '-', path).lower()
+
+def index_assets(images_dir):
+    """Return {path relative to the repo: size} for every file under images_dir."""
+    assets = {}
+    for root, _, files in os.walk(images_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            assets[Path(os.path.relpath(path, BASE_DIR)).as_posix()] = os.path.getsize(path)
+    return assets
+
+def scan_page(path):
+    """Return (page, [(line, reference)]) for the local image references in a page."""
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    references = []
+    for match in REFERENCE_PATTERN.finditer(text):
+        reference = match.group(1) or match.group(2)
+        if reference.startswith('/images/') or reference.startswith('images/'):
+            references.append((text.count('\n', 0, match.start()) + 1, reference))
+    return Path(os.path.relpath(path, BASE_DIR)).as_posix(), references
+
+def find_pages():
+    pages = [BASE_DIR / "docs.json"] if (BASE_DIR / "docs.json").exists() else []
+    for root, dirs, files in os.walk(BASE_DIR):
+        dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS)
+        pages += [Path(root) / name for name in sorted(files) if name.endswith('.mdx')]
+    return pages
+
+def check(jobs):
+    """Return (assets, missing, normalized_only, referenced asset paths)."""
+    # Imported here: it loads multiprocessing, which would slow down importing this module
+    from concurrent.futures import ProcessPoolExecutor
+
+    assets = index_assets(IMAGES_DIR)
+    by_normalized = {}
+    for asset in assets:
+        by_normalized.setdefault(normalize(asset), asset)
+
+    pages = find_pages()
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        scanned = list(pool.map(scan_page, pages, chunksize=16))
+
+    missing, normalized_only, referenced = [], [], set()
+    total = 0
+    for page, references in scanned:
+        for line, reference in references:
+            total += 1
+            decoded = unquote(reference).lstrip('/')
+            if decoded in assets:
+                referenced.add(decoded)
+            elif normalize(decoded) in by_normalized:
+                asset = by_normalized[normalize(decoded)]
+                referenced.add(asset)
+                normalized_only.append((page, line, reference, asset))
+            else:
+                missing.append((page, line, reference))
+    size = sum(assets.values())
+    print(f"Indexed {len(assets)} files under images/ ({size / 1e6:.1f} MB); "
+          f"scanned {len(pages)} pages with {total} image references")
+    return assets, missing, normalized_only, referenced
+
+def prune(orphans):
+    """Delete orphaned files and their asset lock entries."""
+    from asset_lock import AssetLock
+
+    for asset in orphans:
+        (BASE_DIR / asset).unlink()
+    # Remove folders left empty, deepest first
+    for root, dirs, files in os.walk(IMAGES_DIR, topdown=False):
+        if root != str(IMAGES_DIR) and not os.listdir(root):
+            os.rmdir(root)
+    lock = AssetLock()
+    for article, entries in list(lock.articles.items()):
+        lock.update(article, [entry for entry in entries if entry['path'] not in orphans])
+    if lock.save():
+        print(f"✓ Dropped pruned files from {lock.path.name}")
+    print(f"✓ Pruned {len(orphans)} orphaned files")
+
+def main():
+    parser = argparse.ArgumentParser(description="Check MDX image references against images/.")
+    parser.add_argument('--prune', action='store_true', help='Delete orphaned files under images/')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help='Parallel scan processes')
+    parser.add_argument('--limit', type=int, default=50, help='Entries listed per report section (0 for all)')
+    args = parser.parse_args()
+
+    assets, missing, normalized_only, referenced = check(args.jobs)
+    orphans = sorted(set(assets) - referenced)
+    limit = args.limit or None
+
+    def report(title, rows):
+        print(f"\n{title}: {len(rows)}")
+        for row in rows[:limit]:
+            print(f"  {row}")
+        if limit and len(rows) > limit:
+            print(f"  ... {len(rows) - limit} more")
+
+    report("✗ Missing", [f"{page}:{line} {reference}" for page, line, reference in missing])
+    report("! Resolves only after normalization",
+           [f"{page}:{line} {reference} -> {asset}" for page, line, reference, asset in normalized_only])
+    orphan_size = sum(assets[asset] for asset in orphans)
+    report(f"Orphaned ({orphan_size / 1e6:.1f} MB)", orphans)
+
+    if args.prune and orphans:
+        print()
+        prune(set(orphans))
+    return 1 if missing or normalized_only else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
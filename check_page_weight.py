@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Page payload report and per-category weight budgets.
+
+Usage:
+    python3 check_page_weight.py [--budget CATEGORY=MB ...] [--top N] [--strict]
+
+For every page in docs.json the payload is the MDX size, plus the size of
+every local image it references (counted once per page), plus IFRAME_WEIGHT
+for each embedded iframe; pages that import snippets (see
+duplicate_content.py) also carry the snippets' MDX, images and iframes.
+Image references are resolved like check_image_refs.py does, including
+those that only match after normalizing dashes; references to /snippets/
+(e.g. the offline video poster) are files of the checkout. Remote images
+are listed but have no known size.
+
+Each page is checked against the budget of its category (the first folder
+of its path, e.g. Onboarding-Documents), from PAGE_BUDGETS or --budget,
+and the heaviest pages and every page over budget are printed. With
+--strict the exit status is 1 if any page is over budget.
+"""
+
+import re
+import sys
+from pathlib import Path
+from urllib.parse import unquote
+
+from check_image_refs import IMAGES_DIR, REFERENCE_PATTERN, index_assets, normalize
+
+BASE_DIR = Path(__file__).parent
+MB = 1_000_000
+
+# Payload budget per category in bytes; categories not listed use 'default'
+PAGE_BUDGETS = {
+    'default': 5 * MB,
+    # Onboarding guides walk through the whole product with many screenshots
+    'Onboarding-Documents': 10 * MB,
+}
+# Scripts and player assets a video iframe (e.g. Loom) loads before playback; YouTube
+# embeds are click-to-load facades whose posters count as images
+IFRAME_WEIGHT = 1 * MB
+
+IFRAME_PATTERN = re.compile(r'<iframe\b')
+SNIPPET_IMPORT_PATTERN = re.compile(r"^import \w+ from '(/snippets/[^']+\.mdx)';", re.MULTILINE)
+
+class PagePayload:
+    """The payload of one page: MDX bytes, local image bytes, iframes and remote images."""
+
+    def __init__(self, page):
+        self.page = page
+        self.mdx = 0
+        self.images = {}   # Path relative to the checkout: size
+        self.missing = []
+        self.remote = []
+        self.iframes = 0
+
+    @property
+    def category(self):
+        return self.page.split('/', 1)[0]
+
+    @property
+    def total(self):
+        return self.mdx + sum(self.images.values()) + self.iframes * IFRAME_WEIGHT
+
+def image_sizes(images_dir=IMAGES_DIR):
+    """Return {normalized path: (path, size)} for the files under images_dir."""
+    return {normalize(path): (path, size) for path, size in index_assets(images_dir).items()}
+
+def measure_page(page, images, root=BASE_DIR):
+    """Return the PagePayload of a page name (its path without .mdx); images is from image_sizes()."""
+    payload = PagePayload(page)
+    pending, seen = [Path(root) / f"{page}.mdx"], set()
+    while pending:
+        path = pending.pop()
+        if path in seen or not path.exists():
+            continue
+        seen.add(path)
+        text = path.read_text(encoding='utf-8')
+        payload.mdx += len(text.encode('utf-8'))
+        payload.iframes += len(IFRAME_PATTERN.findall(text))
+        for match in REFERENCE_PATTERN.finditer(text):
+            reference = match.group(1) or match.group(2)
+            if reference.startswith(('http://', 'https://')):
+                payload.remote.append(reference)
+                continue
+            relative = unquote(reference).lstrip('/')
+            if normalize(relative) in images:
+                image_path, size = images[normalize(relative)]
+                payload.images[image_path] = size
+            elif relative.startswith('snippets/') and (Path(root) / relative).is_file():
+                payload.images[relative] = (Path(root) / relative).stat().st_size
+            else:
+                payload.missing.append(relative)
+        pending += [Path(root) / snippet.lstrip('/') for snippet in SNIPPET_IMPORT_PATTERN.findall(text)]
+    return payload
+
+def budget_for(category, budgets):
+    return budgets.get(category, budgets['default'])
+
+def parse_budget(value):
+    """Parse CATEGORY=MB into (category, bytes)."""
+    category, _, size = value.partition('=')
+    try:
+        return category, int(float(size) * MB)
+    except ValueError:
+        raise ValueError(f"Budget must be given as CATEGORY=MB, got '{value}'") from None
+
+def format_payload(payload, budget):
+    parts = [f"MDX {payload.mdx / 1000:.0f} KB", f"{len(payload.images)} image(s) {sum(payload.images.values()) / MB:.1f} MB"]
+    if payload.iframes:
+        parts.append(f"{payload.iframes} iframe(s)")
+    if payload.remote:
+        parts.append(f"{len(payload.remote)} remote image(s)")
+    return f"{payload.total / MB:6.1f} MB / {budget / MB:.0f} MB  {payload.page}  ({', '.join(parts)})"
+
+def measure_pages(pages, root=BASE_DIR):
+    """Return the PagePayloads of pages, heaviest first."""
+    images = image_sizes(Path(root) / "images")
+    return sorted((measure_page(page, images, root) for page in pages), key=lambda p: (-p.total, p.page))
+
+def over_budget(payloads, budgets=PAGE_BUDGETS):
+    return [p for p in payloads if p.total > budget_for(p.category, budgets)]
+
+def print_over_budget(over, budgets=PAGE_BUDGETS, limit=None):
+    print(f"{'✗' if over else '✓'} {len(over)} page(s) over budget")
+    for payload in over[:limit]:
+        print(f"  {format_payload(payload, budget_for(payload.category, budgets))}")
+    if limit and len(over) > limit:
+        print(f"  ... {len(over) - limit} more")
+
+def main():
+    import argparse
+
+    from duplicate_content import published_pages
+
+    parser = argparse.ArgumentParser(description="Report page payloads and check them against budgets.")
+    parser.add_argument('--budget', action='append', default=[], metavar='CATEGORY=MB',
+                        help="Payload budget for a category ('default' for the rest)")
+    parser.add_argument('--top', type=int, default=10, help='Heaviest pages to list')
+    parser.add_argument('--strict', action='store_true', help='Exit with status 1 if a page is over budget')
+    args = parser.parse_args()
+    budgets = dict(PAGE_BUDGETS)
+    try:
+        budgets.update(parse_budget(value) for value in args.budget)
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        return 1
+
+    payloads = measure_pages(published_pages())
+    total = sum(payload.total for payload in payloads)
+    print(f"{len(payloads)} page(s), {total / MB:.1f} MB in total\n")
+    print(f"Heaviest {min(args.top, len(payloads))}:")
+    for payload in payloads[:args.top]:
+        print(f"  {format_payload(payload, budget_for(payload.category, budgets))}")
+
+    over = over_budget(payloads, budgets)
+    print()
+    print_over_budget(over, budgets)
+    missing = [(p.page, image) for p in payloads for image in p.missing]
+    if missing:
+        print(f"\n! {len(missing)} referenced image(s) not found (see check_image_refs.py)")
+    return 1 if over and args.strict else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Crash test for resumable conversion runs (see run_journal.py).
+
+Usage:
+    python3 check_resume.py [--category all] [--kills N] [--seed S] [--online]
+
+Copies the checkout into two scratch folders. One gets a clean conversion
+run; in the other the run is killed with SIGKILL at random points, resumed
+with --resume after every kill, and finally allowed to finish. The MDX,
+images and assets.lock.json of the two folders must be identical.
+
+Runs are --offline by default, so images come from the asset lock and the
+check needs no network.
+"""
+
+import argparse
+import filecmp
+import os
+import random
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent
+# Not copied into the scratch checkouts
+IGNORED = shutil.ignore_patterns('.git', '.conversion', '__pycache__')
+
+def converter_command(args, resume):
+    command = [sys.executable, 'convert_framer_to_mdx.py', args.category]
+    if not args.online:
+        command.append('--offline')
+    if resume:
+        command.append('--resume')
+    return command
+
+def run(command, cwd, kill_after=None):
+    """Run command in cwd; kill it with SIGKILL after kill_after seconds. Returns True if it finished."""
+    process = subprocess.Popen(command, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    try:
+        _, stderr = process.communicate(timeout=kill_after)
+    except subprocess.TimeoutExpired:
+        process.send_signal(signal.SIGKILL)
+        process.wait()
+        return False
+    if process.returncode:
+        raise SystemExit(f"ERROR: {' '.join(command)} failed in {cwd}:\n{stderr.decode('utf-8', 'replace')}")
+    return True
+
+def tree_files(root):
+    """Return the paths of the files under root, relative to it, skipping ignored folders."""
+    files = set()
+    for folder, dirs, names in os.walk(root):
+        dirs[:] = [d for d in dirs if d not in ('.git', '.conversion', '__pycache__')]
+        files.update(Path(folder, name).relative_to(root).as_posix() for name in names)
+    return files
+
+def differences(clean, resumed):
+    """Return the paths that are missing from or differ between two checkouts."""
+    clean_files, resumed_files = tree_files(clean), tree_files(resumed)
+    found = clean_files ^ resumed_files
+    found.update(path for path in clean_files & resumed_files
+                 if not filecmp.cmp(clean / path, resumed / path, shallow=False))
+    return sorted(found)
+
+def main():
+    parser = argparse.ArgumentParser(description="Kill conversion runs at random points and check resumed output.")
+    parser.add_argument('--category', default='all')
+    parser.add_argument('--kills', type=int, default=5, help='Times to kill the run before letting it finish')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--online', action='store_true', help='Allow image downloads')
+    parser.add_argument('--keep', action='store_true', help='Keep the scratch folders')
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    scratch = Path(tempfile.mkdtemp(prefix='check-resume-'))
+    clean, resumed = scratch / 'clean', scratch / 'resumed'
+    try:
+        print(f"Copying checkout to {scratch}")
+        shutil.copytree(BASE_DIR, clean, ignore=IGNORED, symlinks=True)
+        shutil.copytree(BASE_DIR, resumed, ignore=IGNORED, symlinks=True)
+
+        started = time.perf_counter()
+        run(converter_command(args, resume=False), clean)
+        duration = time.perf_counter() - started
+        print(f"Clean run: {duration:.1f}s")
+
+        finished = False
+        for attempt in range(1, args.kills + 1):
+            delay = rng.uniform(0.05, duration)
+            resume = attempt > 1
+            finished = run(converter_command(args, resume), resumed, kill_after=delay)
+            print(f"  Run {attempt}{' (resumed)' if resume else ''}: "
+                  f"{'finished' if finished else f'killed after {delay:.2f}s'}")
+            if finished:
+                break
+        if not finished:
+            run(converter_command(args, resume=True), resumed)
+            print("  Final resumed run finished")
+
+        found = differences(clean, resumed)
+        for path in found:
+            print(f"  ✗ Differs: {path}")
+        print(f"{'✓ Resumed output matches the clean run' if not found else f'{len(found)} difference(s)'}")
+        return 1 if found else 0
+    finally:
+        if args.keep:
+            print(f"Kept {scratch}")
+        else:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+if __name__ == "__main__":
+    os.chdir(BASE_DIR)
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""
+Per-document time and step budgets for conversion.
+
+Conversion stages charge a ConversionBudget with the number of characters
+they are about to scan. When a document runs over its wall-clock time or
+step limit, BudgetExceeded is raised, the document is copied to
+.conversion/quarantine/ with a JSON diagnostic, and the batch moves on.
+
+Budgets are checked between stages, not inside a regular expression, so a
+stage that is already running is never interrupted: every rewrite rule must
+itself run in linear time (see sub_closed() in rule_pipeline.py and the
+redos suite in bench_conversion.py).
+"""
+
+import json
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Wall-clock seconds per document
+DEFAULT_TIME_BUDGET = 30.0
+# Characters scanned by conversion stages per byte of export; exports in
+# AAA-Framer-Export/ peak below 20
+DEFAULT_STEP_BUDGET = 400
+# Small documents still get this many steps
+MIN_STEPS = 1_000_000
+
+QUARANTINE_DIR = Path(__file__).parent / ".conversion" / "quarantine"
+
+class BudgetExceeded(Exception):
+    """A document ran out of conversion time or steps."""
+
+    def __init__(self, reason, stage, elapsed, steps):
+        super().__init__(f"{reason} budget exceeded in {stage} stage "
+                         f"after {elapsed:.2f}s and {steps:,} steps")
+        self.reason = reason
+        self.stage = stage
+        self.elapsed = elapsed
+        self.steps = steps
+
+class ConversionBudget:
+    """Time and step limits for converting one document.
+
+    seconds: wall-clock limit counted from construction, or None
+    max_steps: limit on characters scanned by conversion stages, or None
+    """
+
+    def __init__(self, seconds=DEFAULT_TIME_BUDGET, max_steps=None):
+        self.seconds = seconds
+        self.max_steps = max_steps
+        self.steps = 0
+        self.started = time.perf_counter()
+
+    @classmethod
+    def for_size(cls, size, seconds=DEFAULT_TIME_BUDGET, steps_per_byte=DEFAULT_STEP_BUDGET):
+        """Return a budget for an export of size bytes."""
+        max_steps = None if steps_per_byte is None else max(steps_per_byte * size, MIN_STEPS)
+        return cls(seconds, max_steps)
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def charge(self, stage, steps):
+        """Record steps for stage, raising BudgetExceeded once a limit is passed."""
+        self.steps += steps
+        if self.max_steps is not None and self.steps > self.max_steps:
+            raise BudgetExceeded('step', stage, self.elapsed(), self.steps)
+        if self.seconds is not None and self.elapsed() > self.seconds:
+            raise BudgetExceeded('time', stage, self.elapsed(), self.steps)
+
+def quarantine_document(document, error, budget, quarantine_dir=QUARANTINE_DIR):
+    """Copy an export that could not be converted into quarantine_dir.
+
+    The export is written unchanged under its filename, next to a
+    <filename>.json diagnostic. Returns the diagnostic path.
+    """
+    target = Path(quarantine_dir) / document.filename
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_bytes(document.raw_bytes())
+    diagnostic = {
+        'file': document.filename,
+        'title': document.title,
+        'exported_at': document.exported_at,
+        'size': document.size,
+        'reason': getattr(error, 'reason', type(error).__name__),
+        'stage': getattr(error, 'stage', None),
+        'error': str(error),
+        'elapsed_seconds': round(budget.elapsed(), 3),
+        'steps': budget.steps,
+        'budget': {'seconds': budget.seconds, 'steps': budget.max_steps},
+        'quarantined_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+    }
+    diagnostic_path = target.with_name(target.name + '.json')
+    with open(diagnostic_path, 'w', encoding='utf-8') as f:
+        json.dump(diagnostic, f, indent=2, ensure_ascii=False)
+        f.write('\n')
+    return diagnostic_path
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Long-running conversion service: html_to_markdown over a local HTTP API.
+
+Usage:
+    python3 conversion_service.py [--host 127.0.0.1] [--port 8766]
+    python3 conversion_service.py --socket /tmp/framer-mdx.sock
+
+Keeps the interpreter, the compiled rewrite rules, the file mapping index
+and the asset lock's image index resident, so each request pays only for
+the conversion itself. With --socket the same API is served over a Unix
+socket (e.g. curl --unix-socket /tmp/framer-mdx.sock http://localhost/health).
+
+Endpoints (JSON in and out):
+- POST /convert   {"html": ..., "image_tags": [...], "filename": ..., "title": ...}
+                  image_tags is optional; by default Framer images with a
+                  locked local copy (assets.lock.json) get their local path
+                  and the rest keep their remote URL. A mapped filename adds
+                  the output mdx_path, and a title adds full MDX with frontmatter.
+- POST /batch     {"documents": [<convert request>, ...]}
+- GET  /stats     Request counts and latency percentiles per endpoint, and
+                  runs, skips and time per rewrite rule
+- GET  /health
+- POST /reload    Reload the file mapping and asset lock after a conversion run
+
+Every conversion runs under the per-document budget (see conversion_budget.py);
+documents over budget get a 422 response with the diagnostic.
+"""
+
+import argparse
+import json
+import os
+import socketserver
+import threading
+import time
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from asset_lock import AssetLock
+from conversion_budget import DEFAULT_STEP_BUDGET, DEFAULT_TIME_BUDGET, BudgetExceeded, ConversionBudget
+from convert_framer_to_mdx import (
+    DEFAULT_PIPELINE,
+    create_image_tag,
+    extract_images,
+    html_to_markdown,
+    load_file_mapping,
+    mdx_header,
+    sanitize_filename,
+)
+from html_sanitizer import format_tag_counts
+
+# Latency samples kept per endpoint for percentiles
+LATENCY_WINDOW = 10000
+# Largest accepted request body
+MAX_BODY_BYTES = 64 * 1024 * 1024
+
+WARMUP_HTML = (
+    '<h2>Warm-up</h2><p>Compile <strong>every</strong> <em>rule</em> <code>once</code>, '
+    '<a href="https://example.com">link</a>.</p><ul><li data-preset-tag="p"><p>Item</p></li></ul>'
+    '<figure><table><tbody><tr><th><p>A</p></th></tr><tr><td><p>1</p></td></tr></tbody></table></figure>'
+    '<iframe src="https://www.youtube.com/embed/xxxxxxxxxxx"></iframe><blockquote><p>Quote</p></blockquote><p><br></p>'
+)
+
+class LatencyStats:
+    """Thread-safe request counts and latency percentiles per endpoint."""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self._samples = {}
+        self._counts = Counter()
+        self._lock = threading.Lock()
+        self.window = window
+
+    def record(self, endpoint, seconds):
+        with self._lock:
+            self._counts[endpoint] += 1
+            self._samples.setdefault(endpoint, deque(maxlen=self.window)).append(seconds)
+
+    def summary(self):
+        """Return {endpoint: {"count", "p50_ms", "p90_ms", "p99_ms", "max_ms"}}."""
+        with self._lock:
+            samples = {endpoint: sorted(values) for endpoint, values in self._samples.items()}
+            counts = dict(self._counts)
+        summary = {}
+        for endpoint, values in samples.items():
+            def percentile(p):
+                return round(values[min(len(values) - 1, int(p / 100 * len(values)))] * 1000, 3)
+            summary[endpoint] = {'count': counts[endpoint], 'p50_ms': percentile(50), 'p90_ms': percentile(90),
+                                 'p99_ms': percentile(99), 'max_ms': round(values[-1] * 1000, 3)}
+        return summary
+
+class ConversionService:
+    """Resident state shared by all request threads.
+
+    The mapping index and image index are replaced wholesale on reload, so
+    readers never see a half-built index.
+    """
+
+    def __init__(self, time_budget=DEFAULT_TIME_BUDGET, step_budget=DEFAULT_STEP_BUDGET):
+        self.time_budget = time_budget
+        self.step_budget = step_budget
+        self.stats = LatencyStats()
+        self.started = time.time()
+        self.reload()
+        # Compile every rewrite rule before the first request
+        html_to_markdown(WARMUP_HTML, [])
+
+    def reload(self):
+        """Load the file mapping and the asset lock's URL -> local image index."""
+        lock = AssetLock()
+        self.image_index = {entry['url']: f"/{entry['path']}" for entry in lock.entries()}
+        self.file_mapping = load_file_mapping("all")
+
+    def image_tags(self, html_content):
+        tags = []
+        for url in extract_images(html_content):
+            local_path = self.image_index.get(url)
+            tags.append(create_image_tag(local_path) if local_path else f'<img src="{url}" alt="" />')
+        return tags
+
+    def convert(self, request):
+        """Convert one request dict. Returns (HTTP status, response dict)."""
+        html_content = request.get('html')
+        if not isinstance(html_content, str):
+            return 400, {'error': 'Missing "html" string'}
+        image_tags = request.get('image_tags')
+        if image_tags is None:
+            image_tags = self.image_tags(html_content)
+        tag_counts = Counter()
+        budget = ConversionBudget.for_size(len(html_content.encode('utf-8')), self.time_budget, self.step_budget)
+        started = time.perf_counter()
+        try:
+            markdown = html_to_markdown(html_content, image_tags, tag_counts, budget)
+        except (BudgetExceeded, RecursionError) as e:
+            return 422, {'error': str(e), 'reason': getattr(e, 'reason', type(e).__name__),
+                         'stage': getattr(e, 'stage', None), 'steps': budget.steps}
+        response = {
+            'markdown': markdown,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 3),
+            'leftover_html': format_tag_counts(tag_counts),
+        }
+        title = request.get('title')
+        mapping = self.file_mapping.get(request.get('filename'))
+        if mapping:
+            title = title or mapping['title']
+            response['mdx_path'] = (f"{mapping['category']}/{mapping['subcategory']}/"
+                                    f"{sanitize_filename(title)}.mdx")
+        if title:
+            response['mdx'] = mdx_header(title, '<YouTubeFacade' in markdown) + markdown
+        return 200, response
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        started = time.perf_counter()
+        service = self.server.service
+        if self.path == '/health':
+            self.send_json(200, {'status': 'ok'})
+        elif self.path == '/stats':
+            self.send_json(200, {'uptime_seconds': round(time.time() - service.started),
+                                 'mapped_files': len(service.file_mapping),
+                                 'locked_images': len(service.image_index),
+                                 'endpoints': service.stats.summary(),
+                                 'rules': DEFAULT_PIPELINE.timings()})
+        else:
+            return self.send_json(404, {'error': 'Not found'})
+        service.stats.record(f"GET {self.path}", time.perf_counter() - started)
+
+    def do_POST(self):
+        started = time.perf_counter()
+        service = self.server.service
+        # Read the body first so the connection stays usable after an error
+        try:
+            request = self.read_json()
+        except ValueError as e:
+            return self.send_json(400, {'error': str(e)})
+        if self.path not in ('/convert', '/batch', '/reload'):
+            return self.send_json(404, {'error': 'Not found'})
+
+        if self.path == '/convert':
+            status, response = service.convert(request)
+        elif self.path == '/batch':
+            documents = request.get('documents')
+            if not isinstance(documents, list):
+                return self.send_json(400, {'error': 'Missing "documents" list'})
+            results = []
+            for document in documents:
+                document_status, result = service.convert(document if isinstance(document, dict) else {})
+                results.append(dict(result, status=document_status))
+            status, response = 200, {'results': results}
+        else:
+            service.reload()
+            status, response = 200, {'mapped_files': len(service.file_mapping),
+                                     'locked_images': len(service.image_index)}
+        self.send_json(status, response)
+        service.stats.record(f"POST {self.path}", time.perf_counter() - started)
+
+    def read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY_BYTES:
+            # The body is left unread, so this connection cannot be reused
+            self.close_connection = True
+            raise ValueError(f"Request body over {MAX_BODY_BYTES} bytes")
+        try:
+            request = json.loads(self.rfile.read(length) or b'{}')
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON: {e}")
+        if not isinstance(request, dict):
+            raise ValueError("Request body must be a JSON object")
+        return request
+
+    def send_json(self, status, payload):
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def address_string(self):
+        # Unix socket clients have no host address
+        return self.client_address[0] if isinstance(self.client_address, tuple) else 'unix'
+
+    def log_message(self, format, *args):
+        if os.environ.get('SERVICE_VERBOSE'):
+            super().log_message(format, *args)
+
+class ConversionHTTPServer(ThreadingHTTPServer):
+    def __init__(self, address, service):
+        super().__init__(address, ServiceHandler)
+        self.service = service
+
+class UnixConversionServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, service):
+        super().__init__(path, ServiceHandler)
+        self.service = service
+
+def main():
+    """Start the conversion service."""
+    parser = argparse.ArgumentParser(description="Serve Framer HTML to MDX conversion over HTTP.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--socket', help='Serve on this Unix socket path instead of TCP')
+    parser.add_argument('--time-budget', type=float, default=DEFAULT_TIME_BUDGET,
+                        help='Per-document conversion time limit in seconds')
+    parser.add_argument('--step-budget', type=int, default=DEFAULT_STEP_BUDGET,
+                        help='Per-document step limit, per byte of HTML')
+    args = parser.parse_args()
+
+    service = ConversionService(args.time_budget, args.step_budget)
+    if args.socket:
+        if os.path.exists(args.socket):
+            os.unlink(args.socket)
+        server = UnixConversionServer(args.socket, service)
+        print(f"Conversion service listening on unix:{args.socket}")
+    else:
+        server = ConversionHTTPServer((args.host, args.port), service)
+        print(f"Conversion service listening on http://{args.host}:{args.port}/")
+    print(f"  {len(service.file_mapping)} mapped files, {len(service.image_index)} locked images")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopped")
+    finally:
+        server.server_close()
+        if args.socket and os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+if __name__ == "__main__":
+    main()
@@ -4,10 +4,38 @@ Universal script to convert Framer-exported HTML documents to Mintlify MDX forma
 Handles all workflow categories: Provider, Front Office, Billing, and Owners & Administration.
 
 Usage:
-    python3 convert_framer_to_mdx.py <category>
+    python3 convert_framer_to_mdx.py <category> [--bundle PATH] [--offline] [--time-budget SECONDS] [--step-budget N]
+                                     [--shard i/N] [--resume] [--plan] [--strict] [--memory]
     
 Categories: owners-admin, provider, front-office, billing, all
 
+Exports are read from AAA-Framer-Export/, or from a single .zip or .jsonl
+bundle with --bundle (see export_sources.py for the bundle format).
+Images recorded in assets.lock.json are taken from their local copies
+instead of being downloaded again; --offline never downloads (see asset_lock.py).
+Documents that exceed the per-document time or step budget are copied to
+.conversion/quarantine/ with a diagnostic and the run continues.
+With --shard i/N only the i-th of N weight-balanced shards of the mapping is
+converted and a partial manifest is written for sharding.py merge.
+Every run keeps a write-ahead journal in .conversion/; --resume continues an
+interrupted run without converting or downloading finished documents again
+(see run_journal.py). --plan only reports what a run would download, convert,
+write and delete and how long it would take (see run_planner.py).
+At the end of a run the sections added, removed or modified in each converted
+article are listed (see change_report.py), and the headings and anchors of
+the converted pages are indexed in .conversion/headings.json (see
+heading_index.py). Converted pages whose payload (MDX, images, iframes) is over
+their category's budget are listed, and with --strict fail the run (see
+check_page_weight.py).
+Runs, exports, MDX and images are also recorded in .conversion/artifacts.sqlite
+for queries (see artifact_store.py). --memory traces allocations and samples
+RSS, reports peak memory per stage and document and the top allocation sites,
+and records them in .conversion/memory.jsonl (see memory_profile.py).
+YouTube embeds become a click-to-load <YouTubeFacade> (snippets/youtube-facade.jsx)
+that shows the video's thumbnail, fetched with the images, and loads the player
+only when clicked; offline, or if the thumbnail cannot be fetched,
+snippets/youtube-poster.svg is shown instead.
+
 The script will:
 1. Parse .txt files from AAA-Framer-Export/
 2. Extract and download images from Framer URLs
@@ -19,16 +47,41 @@ The script will:
 
 import os
 import re
-import requests
 from pathlib import Path
 from html import unescape
 import html
 from urllib.parse import quote
-import urllib3
 import json
+import time
+from collections import Counter
+
+from artifact_store import ArtifactStore
+from asset_lock import AssetLock
+from change_report import ChangeReport
+from conversion_budget import (DEFAULT_STEP_BUDGET, DEFAULT_TIME_BUDGET, BudgetExceeded,
+                               ConversionBudget, quarantine_document)
+from export_sources import is_bundle, iter_bundle, open_export
+from heading_index import HeadingIndex, page_name
+from html_sanitizer import DEFAULT_SANITIZER, format_tag_counts
+from html_tables import convert_table_html
+from image_fetcher import default_fetcher
+from memory_profile import DEFAULT_PROFILE, print_memory_report, record_memory
+from output_files import DEFAULT_WRITER
+from rule_pipeline import Rule, RuleContext, RulePipeline, format_timings, load_rule_modules, sub_closed
+from run_journal import RunJournal, journal_path
+from run_planner import converter_fingerprint, plan_run, print_plan, record_history
 
-# Disable SSL warnings
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+# Attribute runs stop at < and > so an unterminated tag is scanned only up to
+# the next tag, never to the end of the document. The lookahead only checks
+# that the tag has an href; capturing it there would backtrack over every
+# href=" of an unterminated tag, so it is taken from the attributes afterwards.
+LINK_PATTERN = r'<a\b(?=[^<>]*href="[^"<>]+")([^<>]*)>(.*?)</a>'
+# The last href in a link's attributes
+HREF_PATTERN = re.compile(r'.*href="([^"<>]+)"', re.DOTALL)
+YOUTUBE_PATTERN = r'https://(?:www\.)?(?:youtube(?:-nocookie)?\.com/embed/|youtu\.be/)([\w-]{11})'
+FACADE_IMPORT = "import { YouTubeFacade } from '/snippets/youtube-facade.jsx';"
+# Poster shown when a video's thumbnail is not available locally
+POSTER_FIXTURE = '/snippets/youtube-poster.svg'
 
 def sanitize_filename(name):
     """Convert title to sanitized filename."""
@@ -39,32 +92,64 @@ def sanitize_filename(name):
 
 def extract_images(html_content):
     """Extract all image URLs from HTML content."""
-    pattern = r'<img[^>]+src="(https://framerusercontent\.com/images/[^"]+)"'
+    pattern = r'<img[^<>]+src="(https://framerusercontent\.com/images/[^"]+)"'
     images = re.findall(pattern, html_content)
     return images
 
-def download_image(url, save_path):
-    """Download an image from URL to save_path."""
-    try:
-        response = requests.get(url, timeout=30, verify=False, headers={
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
-        response.raise_for_status()
-        os.makedirs(os.path.dirname(save_path), exist_ok=True)
-        with open(save_path, 'wb') as f:
-            f.write(response.content)
-        return True
-    except Exception as e:
-        print(f"    ✗ Error downloading {url}: {e}")
-        return False
-
-def create_image_tag(local_path):
-    """Create HTML img tag with dash-separated path for Mintlify compatibility.
+def fetch_images(article, images, images_dir, lock=None, offline=False, fetcher=None):
+    """Put each (url, path relative to images_dir) image of an article in place.
     
-    Paths use dashes instead of spaces to avoid URL encoding (%20) in URLs.
-    Spaces are replaced with dashes, and & is replaced with -&- for readability.
+    article is the asset lock key, (export filename, output section). Images
+    with an intact copy in the asset lock are copied from it, so reordered or
+    renamed images are not downloaded again; with offline=True nothing is
+    downloaded. The rest are downloaded concurrently by fetcher (an
+    ImageFetcher, default_fetcher() if None; see image_fetcher.py). Returns a
+    list with True for each image now available locally.
     """
-    # Replace spaces with dashes and handle special characters
+    local = {}
+    if lock is not None:
+        changes = lock.changes(article, [url for url, _ in images])
+        if changes:
+            print(f"  Images changed since the asset lock: {', '.join(changes)}")
+        # Read every locked copy first, since renames within an article may swap files
+        local = {url: lock.read_local(url) for url, _ in images}
+    
+    fetched = {}
+    missing = [url for url, _ in images if local.get(url) is None]
+    if missing and not offline:
+        fetched = (fetcher or default_fetcher()).fetch_all(article, missing)
+    
+    available = []
+    entries = []
+    for index, (url, relative_path) in enumerate(images, 1):
+        save_path = Path(images_dir) / relative_path
+        data = local.get(url)
+        if data is not None:
+            DEFAULT_WRITER.write_bytes(save_path, data, 'image')
+            print(f"    ✓ From asset lock: {save_path.name}")
+        elif offline:
+            print(f"    ✗ Not in asset lock (offline): {url}")
+        elif fetched.get(url) is not None:
+            data = fetched[url]
+            DEFAULT_WRITER.write_bytes(save_path, data, 'image')
+            print(f"    ✓ Downloaded: {save_path.name}")
+        available.append(data is not None)
+        if data is not None and lock is not None:
+            entries.append(lock.record(article, index, url, save_path, data))
+    
+    if lock is not None:
+        targets = {Path(images_dir) / relative_path for _, relative_path in images}
+        for stale_path in lock.update(article, entries):
+            if stale_path not in targets and stale_path.exists():
+                stale_path.unlink()
+                print(f"    ✓ Removed stale image: {stale_path.name}")
+                # Drop the article's old image folder once it is empty
+                if not any(stale_path.parent.iterdir()):
+                    stale_path.parent.rmdir()
+    return available
+
+def dash_path(local_path):
+    """Return local_path with dashes instead of spaces, and & replaced with -&-."""
     parts = local_path.split('/')
     dash_parts = [parts[0]]  # Keep the leading empty part or '/images'
     for part in parts[1:]:
@@ -72,162 +157,267 @@ def create_image_tag(local_path):
             # Replace spaces with dashes, and & with -&-
             part = part.replace(' ', '-').replace('&', '-&-')
             dash_parts.append(part)
-    dash_path = '/'.join(dash_parts)
-    return f'<img src="{dash_path}" alt="" />'
+    return '/'.join(dash_parts)
 
-def html_to_markdown(html_content, image_tags):
-    """Convert HTML to markdown, replacing images with HTML img tags.
+def create_image_tag(local_path):
+    """Create HTML img tag with dash-separated path for Mintlify compatibility.
     
-    IMPORTANT: Images are replaced with HTML img tags (not markdown syntax) because:
-    1. Mintlify handles dash-separated paths in HTML tags
-    2. Dash-separated paths work better in HTML tags
+    Paths use dashes instead of spaces to avoid URL encoding (%20) in URLs.
+    Spaces are replaced with dashes, and & is replaced with -&- for readability.
     """
-    # Replace images first - need to track which image we're on
-    image_index = 0
+    return f'<img src="{dash_path(local_path)}" alt="" />'
+
+def image_folder(category_path, subcategory_path, sanitized_title):
+    """Return the folder of an article's images, relative to images/."""
+    return '/'.join(part for part in (category_path, subcategory_path, sanitized_title) if part)
+
+def image_location(category_path, subcategory_path, sanitized_title, index):
+    """Return (path relative to images/, path for MDX) of an article's index-th image."""
+    relative_path = f"{image_folder(category_path, subcategory_path, sanitized_title)}/{sanitized_title}-{index}.png"
+    return relative_path, f"/images/{relative_path}"
+
+def youtube_thumbnail(video_id):
+    return f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg"
+
+def youtube_posters(video_ids, folder):
+    """Return (thumbnail URL, path relative to images/) of the poster of each video.
+    
+    Posters are stored with the article's images in folder and fetched with
+    them, through the same fetch_images() call and asset lock entries.
+    """
+    return [(youtube_thumbnail(video_id), f"{folder}/video-{video_id}.jpg") for video_id in video_ids]
+
+def document_images(document, mapping):
+    """Return (url, path relative to images/) of a mapped document's images, then its video posters."""
+    sanitized_title = sanitize_filename(document.title)
+    category_path, subcategory_path = mapping["category"], mapping["subcategory"]
+    images = [(url, image_location(category_path, subcategory_path, sanitized_title, index)[0])
+              for index, url in enumerate(document.image_urls(), 1)]
+    return images + youtube_posters(document.youtube_ids(),
+                                    image_folder(category_path, subcategory_path, sanitized_title))
+
+def poster_sources(video_ids, posters, available, image_path):
+    """Return {video ID: poster src for the MDX}, falling back to POSTER_FIXTURE.
     
+    available are fetch_images() results for posters; image_path turns a
+    path under /images/ into the src the converter uses for images.
+    """
+    return {video_id: image_path(f"/images/{relative_path}") if is_local else POSTER_FIXTURE
+            for video_id, (_, relative_path), is_local in zip(video_ids, posters, available)}
+
+def mdx_header(title, videos=False):
+    """Return the frontmatter of a page, plus the facade import if it embeds videos."""
+    header = f'---\ntitle: "{title}"\n---\n\n'
+    return header + f"{FACADE_IMPORT}\n\n" if videos else header
+
+def convert_images(text, context):
+    """Replace img tags (with or without alt) with the context's image tags."""
     def replace_img(match):
-        nonlocal image_index
-        if image_index < len(image_tags):
-            tag = image_tags[image_index]
-            image_index += 1
+        if context.image_index < len(context.image_tags):
+            tag = context.image_tags[context.image_index]
+            context.image_index += 1
             return f'\n\n{tag}\n\n'
         return match.group(0)
     
-    # Replace img tags (handle both with and without alt)
-    html_content = re.sub(r'<img[^>]+>', replace_img, html_content)
-    
-    # Convert headings (h2, h3, h4, h5, h6)
-    html_content = re.sub(r'<h2>(.*?)</h2>', r'\n\n## \1\n\n', html_content, flags=re.DOTALL)
-    html_content = re.sub(r'<h3>(.*?)</h3>', r'\n\n### \1\n\n', html_content, flags=re.DOTALL)
-    html_content = re.sub(r'<h4>(.*?)</h4>', r'\n\n#### \1\n\n', html_content, flags=re.DOTALL)
-    html_content = re.sub(r'<h5>(.*?)</h5>', r'\n\n##### \1\n\n', html_content, flags=re.DOTALL)
-    html_content = re.sub(r'<h6>(.*?)</h6>', r'\n\n###### \1\n\n', html_content, flags=re.DOTALL)
-    
-    # Convert nested lists - process from innermost to outermost
+    return re.sub(r'<img[^<>]+>', replace_img, text)
+
+def convert_headings(text, context):
+    """Convert h2-h6 headings."""
+    for level in range(2, 7):
+        text = sub_closed(rf'<h{level}>(.*?)</h{level}>', rf'\n\n{"#" * level} \1\n\n', text, f'</h{level}>',
+                          flags=re.DOTALL)
+    return text
+
+def convert_lists(text, context):
+    """Convert nested lists, processing from innermost to outermost."""
     def process_lists(text):
         max_depth = 10
         for d in range(max_depth, 0, -1):
-            pattern = r'(<li[^>]*>)(.*?)(</li>)'
+            if '<li' not in text:
+                break
+            context.charge('lists', text)
+            pattern = r'(<li[^<>]*>)(.*?)(</li>)'
             def replace_li(match):
                 content = match.group(2)
                 if '<ul>' in content or '<ol>' in content:
                     content = process_lists(content)
                     return f'- {content}\n'
                 else:
-                    content = re.sub(r'<p>(.*?)</p>', r'\1', content, flags=re.DOTALL)
-                    content = re.sub(r'<strong>(.*?)</strong>', r'**\1**', content)
-                    content = re.sub(r'<em>(.*?)</em>', r'*\1*', content)
-                    content = re.sub(r'<code>(.*?)</code>', r'`\1`', content)
-                    content = re.sub(r'<a[^>]+href="([^"]+)"[^>]*>(.*?)</a>', r'[\2](\1)', content)
+                    content = sub_closed(r'<p>(.*?)</p>', r'\1', content, '</p>', flags=re.DOTALL)
+                    content = sub_closed(r'<strong>(.*?)</strong>', r'**\1**', content, '</strong>')
+                    content = sub_closed(r'<em>(.*?)</em>', r'*\1*', content, '</em>')
+                    content = sub_closed(r'<code>(.*?)</code>', r'`\1`', content, '</code>')
+                    content = sub_closed(LINK_PATTERN, convert_link, content, '</a>')
                     content = html.unescape(content).strip()
                     return f'- {content}\n'
             
-            text = re.sub(pattern, replace_li, text, flags=re.DOTALL)
+            text = sub_closed(pattern, replace_li, text, '</li>', flags=re.DOTALL)
         
         text = re.sub(r'</?ul[^>]*>', '', text)
         text = re.sub(r'</?ol[^>]*>', '', text)
         return text
     
-    html_content = process_lists(html_content)
-    
-    # Convert paragraphs (but not those already in lists)
-    html_content = re.sub(r'<p>(.*?)</p>', r'\1\n\n', html_content, flags=re.DOTALL)
-    
-    # Convert strong and em
-    html_content = re.sub(r'<strong>(.*?)</strong>', r'**\1**', html_content)
-    html_content = re.sub(r'<em>(.*?)</em>', r'*\1*', html_content)
-    
-    # Convert code
-    html_content = re.sub(r'<code>(.*?)</code>', r'`\1`', html_content)
-    
-    # Convert links
-    html_content = re.sub(r'<a[^>]+href="([^"]+)"[^>]*>(.*?)</a>', r'[\2](\1)', html_content)
+    return process_lists(text)
+
+def convert_paragraphs(text, context):
+    """Convert paragraphs (those in lists are already converted)."""
+    return sub_closed(r'<p>(.*?)</p>', r'\1\n\n', text, '</p>', flags=re.DOTALL)
+
+def convert_inline(text, context):
+    """Convert strong, em and code."""
+    text = sub_closed(r'<strong>(.*?)</strong>', r'**\1**', text, '</strong>')
+    text = sub_closed(r'<em>(.*?)</em>', r'*\1*', text, '</em>')
+    return sub_closed(r'<code>(.*?)</code>', r'`\1`', text, '</code>')
+
+def convert_link(match):
+    """Return a LINK_PATTERN match as a markdown link."""
+    return f'[{match.group(2)}]({HREF_PATTERN.match(match.group(1)).group(1)})'
+
+def convert_links(text, context):
+    return sub_closed(LINK_PATTERN, convert_link, text, '</a>')
+
+def convert_tables(text, context):
+    """Convert HTML tables to markdown tables, one pass per table.
     
-    # Convert HTML tables to markdown tables
+    Handles both <table> and <figure><table> patterns.
+    """
     def convert_table(match):
-        table_html = match.group(0)
-        rows = []
-        # Extract table rows
-        row_matches = re.findall(r'<tr[^>]*>(.*?)</tr>', table_html, flags=re.DOTALL)
-        for row_html in row_matches:
-            cells = []
-            # Check if it's a header row
-            is_header = '<th>' in row_html or '<th ' in row_html
-            cell_tag = 'th' if is_header else 'td'
-            cell_matches = re.findall(rf'<{cell_tag}[^>]*>(.*?)</{cell_tag}>', row_html, flags=re.DOTALL)
-            for cell_html in cell_matches:
-                # Clean up cell content
-                cell_content = cell_html
-                cell_content = re.sub(r'<p>(.*?)</p>', r'\1', cell_content, flags=re.DOTALL)
-                cell_content = re.sub(r'<strong>(.*?)</strong>', r'**\1**', cell_content)
-                cell_content = re.sub(r'<em>(.*?)</em>', r'*\1*', cell_content)
-                cell_content = re.sub(r'<code>(.*?)</code>', r'`\1`', cell_content)
-                cell_content = html.unescape(cell_content).strip()
-                cells.append(cell_content)
-            if cells:
-                rows.append(cells)
-        
-        if not rows:
+        markdown_table = convert_table_html(match.group(0))
+        if markdown_table is None:
             return match.group(0)
-        
-        # Build markdown table
-        markdown_table = []
-        # Header row
-        if rows:
-            header = rows[0]
-            markdown_table.append('| ' + ' | '.join(header) + ' |')
-            markdown_table.append('| ' + ' | '.join(['---'] * len(header)) + ' |')
-            # Data rows
-            for row in rows[1:]:
-                markdown_table.append('| ' + ' | '.join(row) + ' |')
-        
-        return '\n\n' + '\n'.join(markdown_table) + '\n\n'
+        return '\n\n' + markdown_table + '\n\n'
     
-    # Convert tables (handle both <table> and <figure><table> patterns)
-    html_content = re.sub(r'<figure>\s*<table[^>]*>(.*?)</table>\s*</figure>', convert_table, html_content, flags=re.DOTALL)
-    html_content = re.sub(r'<table[^>]*>(.*?)</table>', convert_table, html_content, flags=re.DOTALL)
+    return sub_closed(r'(?:<figure>\s*)?<table[^<>]*>.*?</table>(?:\s*</figure>)?', convert_table,
+                      text, ('</table>', '</figure>'), flags=re.DOTALL)
+
+def convert_iframes(text, context):
+    """Convert YouTube embeds to a click-to-load facade; other iframes are kept.
     
-    # Convert iframes (YouTube embeds) to proper Mintlify format
+    The facade (snippets/youtube-facade.jsx) shows the poster from
+    context.posters, or the remote thumbnail, and swaps in the player iframe
+    when clicked, so pages do not load the player for every embed.
+    """
     def convert_iframe(match):
         src = match.group(1) if match.group(1) else ''
-        # Extract YouTube video ID if it's a YouTube URL
-        if 'youtube.com' in src or 'youtu.be' in src:
-            # Format as Mintlify iframe
-            return f'''<iframe
-  className="w-full aspect-video rounded-xl"
-  src="{src}"
-  title="YouTube video player"
-  frameBorder="0"
-  allow="accelerometer; autoplay; clipboard-write; encrypted-media; gyroscope; picture-in-picture"
-  allowFullScreen
-></iframe>'''
+        video = re.match(YOUTUBE_PATTERN, src)
+        if video:
+            video_id = video.group(1)
+            poster = context.posters.get(video_id, youtube_thumbnail(video_id))
+            return f'<YouTubeFacade id="{video_id}" title="YouTube video player" poster="{poster}" />'
         return match.group(0)
     
-    html_content = re.sub(r'<iframe[^>]+src="([^"]+)"[^>]*>.*?</iframe>', convert_iframe, html_content, flags=re.DOTALL)
+    return sub_closed(r'<iframe[^<>]+src="([^"<>]+)"[^<>]*>.*?</iframe>', convert_iframe,
+                      text, '</iframe>', flags=re.DOTALL)
+
+def convert_breaks(text, context):
+    """Clean up br tags, except the <br /> joining multi-line cells of pipe-table rows."""
+    lines = text.split('\n')
+    for i, line in enumerate(lines):
+        if '<br' in line and not (line.startswith('| ') and line.endswith(' |')):
+            lines[i] = re.sub(r'<br\s*/?>', '\n', line)
+    return '\n'.join(lines)
+
+# The built-in rewrite rules, in order. Rule names are also the budget stages.
+# Mintlify component mappings and other extra rules are registered from the
+# modules in RULE_MODULES, without editing this list.
+DEFAULT_RULES = (
+    Rule('images', convert_images, consumes={'img'}, produces={'img'}),
+    Rule('headings', convert_headings, consumes={'h2', 'h3', 'h4', 'h5', 'h6'}),
+    Rule('lists', convert_lists, consumes={'li', 'ul', 'ol'}),
+    Rule('paragraphs', convert_paragraphs, consumes={'p'}),
+    Rule('inline', convert_inline, consumes={'strong', 'em', 'code'}),
+    Rule('links', convert_links, consumes={'a'}),
+    Rule('tables', convert_tables, consumes={'table'}),
+    Rule('iframes', convert_iframes, consumes={'iframe'}, produces={'iframe', 'YouTubeFacade'}),
+    Rule('breaks', convert_breaks, consumes={'br'}),
+)
+RULE_MODULES = ('mintlify_rules',)
+
+DEFAULT_PIPELINE = RulePipeline(DEFAULT_RULES, sanitizer=DEFAULT_SANITIZER)
+load_rule_modules(DEFAULT_PIPELINE, RULE_MODULES)
+
+def convert_fragment(html_content, image_tags, image_index=0, budget=None, posters=None):
+    """Convert the elements of an HTML fragment to markdown.
     
-    # Clean up br tags
-    html_content = re.sub(r'<br\s*/?>', '\n', html_content)
-    html_content = re.sub(r'<br>', '\n', html_content)
+    Images are replaced with image_tags starting at image_index, and YouTube
+    embeds use the poster src in posters ({video ID: src}). Returns the
+    converted text and the index of the next unused image tag. Whitespace
+    cleanup, leftover tags and entities are handled by finish_markdown() so
+    a document can be converted one top-level element at a time.
     
-    # Clean up extra whitespace
-    html_content = re.sub(r'\n{3,}', '\n\n', html_content)
-    html_content = re.sub(r'[ \t]+\n', '\n', html_content)
+    The rules of DEFAULT_PIPELINE run in order (see rule_pipeline.py). If
+    budget is a ConversionBudget, each rule is charged for the text it
+    scans and BudgetExceeded is raised when the budget runs out.
+    """
+    context = RuleContext(image_tags, image_index, budget, posters)
+    html_content = DEFAULT_PIPELINE.run(html_content, context)
+    return html_content, context.image_index
+
+def normalize_whitespace(text):
+    """Collapse runs of blank lines and strip trailing spaces from lines."""
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    # The lookbehind starts matches only at the beginning of a run of spaces,
+    # so long runs not followed by a newline are scanned once, not once per space
+    text = re.sub(r'(?<![ \t])[ \t]+\n', '\n', text)
+    return text
+
+def finish_markdown(html_content, tag_counts=None):
+    """Apply tag policies to leftover HTML tags and unescape entities.
     
-    # Remove any remaining HTML tags (preserve with comment)
-    # CRITICAL: Preserve img and iframe tags - they're needed for Mintlify display
-    remaining_html = re.findall(r'<[^>]+>', html_content)
-    if remaining_html:
-        for tag in set(remaining_html):
-            # Preserve img tags, iframe tags, and common formatting tags
-            if (tag.startswith('<img') or tag.startswith('<iframe') or 
-                tag in ['<p>', '</p>', '<br>', '<br/>', '<ul>', '</ul>', '<ol>', '</ol>', '<li>', '</li>']):
-                continue
-            html_content = html_content.replace(tag, f'<!-- HTML preserved: {tag} -->')
+    CRITICAL: img and iframe tags are kept - they're needed for Mintlify display.
+    Other leftover tags are preserved as comments (see html_sanitizer.py).
+    """
+    html_content = DEFAULT_SANITIZER.sanitize(html_content, tag_counts)
     
     # Unescape HTML entities
-    html_content = html.unescape(html_content)
+    return html.unescape(html_content)
+
+def html_to_markdown(html_content, image_tags, tag_counts=None, budget=None, posters=None):
+    """Convert HTML to markdown, replacing images with HTML img tags.
+    
+    IMPORTANT: Images are replaced with HTML img tags (not markdown syntax) because:
+    1. Mintlify handles dash-separated paths in HTML tags
+    2. Dash-separated paths work better in HTML tags
     
-    return html_content.strip()
+    If tag_counts is a Counter it receives counts of leftover tags by action.
+    If budget is a ConversionBudget the conversion stops with BudgetExceeded
+    once it runs out. posters are passed to convert_fragment().
+    """
+    markdown, _ = convert_fragment(html_content, image_tags, budget=budget, posters=posters)
+    if budget is not None:
+        budget.charge('finish', len(markdown))
+    return finish_markdown(normalize_whitespace(markdown), tag_counts).strip()
+
+def iter_markdown(blocks, image_tags, tag_counts=None, budget=None, posters=None):
+    """Convert top-level HTML blocks one at a time, yielding markdown pieces.
+    
+    Joining the pieces gives the same text as html_to_markdown() on the whole
+    document, but only one block and its output are held in memory at a time.
+    Trailing whitespace is held back until the next block shows whether it is
+    interior (and must be normalized) or the end of the document (and stripped).
+    A budget (ConversionBudget) is charged for every block.
+    """
+    image_index = 0
+    pending = ''  # Unnormalized whitespace at the end of the previous block
+    held = ''     # Finished whitespace not yet known to be interior
+    started = False
+    for block in blocks:
+        markdown, image_index = convert_fragment(block, image_tags, image_index, budget, posters)
+        combined = pending + markdown
+        body = combined.rstrip(' \t\n')
+        pending = combined[len(body):]
+        if not body:
+            continue
+        if budget is not None:
+            budget.charge('finish', len(body))
+        piece = held + finish_markdown(normalize_whitespace(body), tag_counts)
+        if not started:
+            piece = piece.lstrip()
+            started = bool(piece)
+        content = piece.rstrip()
+        held = piece[len(content):]
+        if content:
+            yield content
 
 def process_file(input_file, file_mapping, output_dir, images_dir):
     """Process a single .txt file and convert to MDX."""
@@ -235,21 +425,37 @@ def process_file(input_file, file_mapping, output_dir, images_dir):
     if filename not in file_mapping:
         return False
     
-    mapping = file_mapping[filename]
+    # Memory-map the export; the body is converted one top-level element at a time
+    with open_export(input_file) as document:
+        return process_document(document, file_mapping, output_dir, images_dir)
+
+def process_document(document, file_mapping, output_dir, images_dir, tag_counts=None,
+                     time_budget=DEFAULT_TIME_BUDGET, step_budget=DEFAULT_STEP_BUDGET, quarantined=None,
+                     lock=None, offline=False, fetcher=None):
+    """Convert one ExportDocument (loose file or bundle record) to MDX.
     
-    # Read file
-    with open(input_file, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
+    If tag_counts is a Counter it accumulates this document's leftover HTML tags.
+    Images are fetched through the AssetLock lock if given and by fetcher
+    (see fetch_images()).
+    A document that runs over time_budget seconds or step_budget steps per byte
+    is quarantined instead (see conversion_budget.py), its filename is appended
+    to the quarantined list if one is given, and any existing MDX is kept.
+    """
+    filename = document.name
+    if filename not in file_mapping:
+        return False
+    
+    mapping = file_mapping[filename]
     
-    if len(lines) < 2:
+    if not document.is_valid:
         print(f"  ✗ Skipping {filename} - invalid format")
         return False
     
-    title = lines[0].strip()
-    html_content = ''.join(lines[2:])  # Skip title and empty line
+    title = document.title
     
-    # Extract images
-    image_urls = extract_images(html_content)
+    # Extract images and embedded videos
+    image_urls = document.image_urls()
+    video_ids = document.youtube_ids()
     
     # Create image paths and download
     sanitized_title = sanitize_filename(title)
@@ -257,41 +463,56 @@ def process_file(input_file, file_mapping, output_dir, images_dir):
     
     category_path = mapping["category"]
     subcategory_path = mapping["subcategory"]
-    image_base_dir = Path(images_dir) / category_path / subcategory_path / sanitized_title
-    image_base_path = f"/images/{category_path}/{subcategory_path}/{sanitized_title}"
     
-    print(f"  Processing {len(image_urls)} images...")
-    for i, url in enumerate(image_urls, 1):
-        image_filename = f"{sanitized_title}-{i}.png"
-        local_image_path = image_base_dir / image_filename
-        image_path_for_mdx = f"{image_base_path}/{sanitized_title}-{i}.png"
-        
-        if download_image(url, local_image_path):
+    print(f"  Processing {len(image_urls)} images{f' and {len(video_ids)} video posters' if video_ids else ''}...")
+    locations = [image_location(category_path, subcategory_path, sanitized_title, i)
+                 for i in range(1, len(image_urls) + 1)]
+    posters = youtube_posters(video_ids, image_folder(category_path, subcategory_path, sanitized_title))
+    article = (document.filename, '/'.join(p for p in (category_path, subcategory_path) if p))
+    with DEFAULT_PROFILE.stage('images'):
+        available = fetch_images(article, [(url, relative_path) for url, (relative_path, _)
+                                           in zip(image_urls, locations)] + posters, images_dir, lock, offline,
+                                 fetcher)
+    poster_srcs = poster_sources(video_ids, posters, available[len(image_urls):], dash_path)
+    for url, (_, image_path_for_mdx), is_local in zip(image_urls, locations, available):
+        if is_local:
             # Use HTML img tag with dash-separated path
             image_tags.append(create_image_tag(image_path_for_mdx))
-            print(f"    ✓ Downloaded: {image_filename}")
         else:
             # Keep original URL if download fails (will be converted later)
             image_tags.append(f'<img src="{url}" alt="" />')
     
-    # Convert HTML to markdown (images will be replaced with HTML img tags)
-    markdown_content = html_to_markdown(html_content, image_tags)
-    
-    # Create output directory
+    # Create output directory (once per folder per run)
     output_path = Path(output_dir) / category_path / subcategory_path
-    output_path.mkdir(parents=True, exist_ok=True)
+    DEFAULT_WRITER.ensure_dir(output_path)
     
-    # Write MDX file
+    # Write MDX file, streaming the converted markdown (images are HTML img tags)
     mdx_filename = f"{sanitized_title}.mdx"
     mdx_path = output_path / mdx_filename
     
-    with open(mdx_path, 'w', encoding='utf-8') as f:
-        f.write('---\n')
-        f.write(f'title: "{title}"\n')
-        f.write('---\n\n')
-        f.write(markdown_content)
+    document_tag_counts = Counter()
+    budget = ConversionBudget.for_size(document.size, time_budget, step_budget)
+    temp_path = mdx_path.with_name(mdx_filename + '.tmp')
+    try:
+        with DEFAULT_PROFILE.stage('markdown'), open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(mdx_header(title, bool(video_ids)))
+            for piece in iter_markdown(document.iter_blocks(), image_tags, document_tag_counts, budget, poster_srcs):
+                f.write(piece)
+    except (BudgetExceeded, RecursionError) as e:
+        temp_path.unlink(missing_ok=True)
+        diagnostic_path = quarantine_document(document, e, budget)
+        print(f"  ✗ Quarantined: {e} (see {diagnostic_path})")
+        if quarantined is not None:
+            quarantined.append(document.filename)
+        return False
+    # Only replace the MDX if its content changed, so unchanged pages keep their mtime
+    written = DEFAULT_WRITER.commit(temp_path, mdx_path, 'mdx')
     
-    print(f"  ✓ Created: {mdx_path}")
+    if document_tag_counts:
+        print(f"  Leftover HTML: {format_tag_counts(document_tag_counts)}")
+        if tag_counts is not None:
+            tag_counts.update(document_tag_counts)
+    print(f"  ✓ {'Created' if written else 'Unchanged'}: {mdx_path}")
     return True
 
 def load_file_mapping(category):
@@ -1212,29 +1433,252 @@ def load_file_mapping(category):
     
     return mappings.get(category, {})
 
+# Pages over their weight budget listed at the end of a run (see check_page_weight.py)
+WEIGHT_OFFENDERS = 10
+
+def print_usage():
+    print("Usage: python3 convert_framer_to_mdx.py <category> [--bundle PATH] [--offline] [--time-budget SECONDS] [--step-budget N]")
+    print("                                       [--shard i/N] [--resume] [--plan] [--strict] [--memory]")
+    print("\nCategories:")
+    print("  owners-admin    - Owners & Administration")
+    print("  provider        - Provider Workflows")
+    print("  front-office    - Front Office Workflows")
+    print("  billing         - Billing Workflows")
+    print("  all             - All categories")
+    print("\nOptions:")
+    print("  --bundle PATH   Read exports from a .zip or .jsonl bundle instead of AAA-Framer-Export/")
+    print("  --offline       Use only images recorded in assets.lock.json; download nothing")
+    print(f"  --time-budget SECONDS  Per-document conversion time limit (default: {DEFAULT_TIME_BUDGET:g})")
+    print(f"  --step-budget N        Per-document step limit, per byte of export (default: {DEFAULT_STEP_BUDGET})")
+    print("  --shard i/N            Convert only shard i of N; merge with: python3 sharding.py merge")
+    print("  --resume               Continue an interrupted run from its journal in .conversion/")
+    print("  --plan                 Report what the run would do and its estimated time; change nothing")
+    print("  --strict               Exit with status 1 if a converted page is over its weight budget")
+    print("  --memory               Report peak memory per stage and document (slower; see memory_profile.py)")
+    print("\nDocuments over budget are copied to .conversion/quarantine/ with a diagnostic.")
+    print("\nNote: File mappings must be defined in load_file_mapping() function")
+    print("based on the IA structure in .cursor/rules.md")
+
+def parse_args(argv):
+    """Parse command-line options."""
+    import argparse
+    
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('category', nargs='?')
+    parser.add_argument('--bundle')
+    parser.add_argument('--offline', action='store_true')
+    parser.add_argument('--time-budget', type=float, default=DEFAULT_TIME_BUDGET)
+    parser.add_argument('--step-budget', type=int, default=DEFAULT_STEP_BUDGET)
+    parser.add_argument('--shard')
+    parser.add_argument('--resume', action='store_true')
+    parser.add_argument('--plan', action='store_true')
+    parser.add_argument('--strict', action='store_true')
+    parser.add_argument('--memory', action='store_true')
+    parser.add_argument('-h', '--help', action='store_true')
+    return parser.parse_args(argv)
+
+def iter_documents(file_mapping, input_dir, bundle=None):
+    """Yield ExportDocuments for the mapped files, from loose files or a bundle.
+    
+    Loose files are opened one at a time in mapping order. Bundle records are
+    streamed in bundle order; records that are not in the mapping are skipped
+    and mapped files missing from the bundle are reported at the end.
+    """
+    if bundle is None:
+        for filename in file_mapping:
+            input_file = input_dir / filename
+            if not input_file.exists():
+                print(f"✗ File not found: {input_file}\n")
+                continue
+            with open_export(input_file) as document:
+                yield document
+        return
+    
+    seen = set()
+    for document in iter_bundle(bundle):
+        if document.name in file_mapping and document.name not in seen:
+            seen.add(document.name)
+            yield document
+    for filename in file_mapping:
+        if filename not in seen:
+            print(f"✗ File not found in bundle: {filename}\n")
+
+class ConversionRun:
+    """The state the documents of one conversion run share, and its end-of-run report.
+    
+    A run has one journal, artifact store, asset lock, image fetcher, change
+    report and heading index. options are the parsed command-line options
+    (time_budget, step_budget, offline, resume, memory). With a
+    sharding.ShardManifest, converted documents are added to the manifest
+    (order maps filenames to their mapping order) and the asset lock and
+    heading index are left to sharding.py merge. build.py runs every source
+    set as one ConversionRun.
+    """
+    
+    def __init__(self, file_mapping, run, journal, output_dir, images_dir, options, manifest=None, order=None):
+        self.file_mapping = file_mapping
+        self.run = run
+        self.journal = journal
+        self.output_dir = output_dir
+        self.images_dir = images_dir
+        self.options = options
+        self.manifest = manifest
+        self.order = order
+        DEFAULT_WRITER.journal = journal
+        self.store = ArtifactStore(run, resumed=options.resume)
+        if options.memory:
+            DEFAULT_PROFILE.start()
+        self.processed = 0
+        self.tag_counts = Counter()
+        self.quarantined = []
+        self.lock = AssetLock()
+        self.fetcher = default_fetcher()
+        self.changes = ChangeReport()
+        self.headings = HeadingIndex()
+        self.converted_pages = {}
+        self.missing = set(file_mapping)
+        # Conversion work (excluding downloads) for the timing history used by --plan
+        self.converted_documents = self.converted_bytes = 0
+        self.conversion_seconds = 0.0
+    
+    def convert(self, document, counts, retry=False, fetcher=None):
+        """Convert one mapped document unless the journal has it finished. Returns True if converted.
+        
+        Leftover HTML is added to counts unless it is None (the retry pass).
+        Images are fetched by fetcher, the run's fetcher if None.
+        """
+        fetcher = fetcher or self.fetcher
+        print(f"Processing: {document.name}")
+        mapping = self.file_mapping[document.name]
+        section = '/'.join(p for p in (mapping["category"], mapping["subcategory"]) if p)
+        article = (document.filename, section)
+        mdx_path = (Path(self.output_dir) / mapping["category"] / mapping["subcategory"]
+                    / f"{sanitize_filename(document.title)}.mdx")
+        record = None if retry else self.journal.finished(document.name)
+        if record is not None:
+            # Finished before the interruption: restore what converting it did to the run
+            self.lock.update(article, record['assets'])
+            if counts is not None:
+                counts.update({(name, action): count for name, action, count in record['leftover']})
+            if record['status'] == 'quarantined':
+                self.quarantined.append(document.filename)
+            status, converted = record['status'], record['status'] == 'converted'
+            print(f"  ✓ Already {status} (journal)")
+        else:
+            self.changes.before(mdx_path, self.lock.articles.get(article, []))
+            document_counts = Counter()
+            started, download_seconds = time.perf_counter(), fetcher.download_seconds
+            with DEFAULT_PROFILE.document(document.name):
+                converted = process_document(document, self.file_mapping, self.output_dir, self.images_dir,
+                                             document_counts, self.options.time_budget, self.options.step_budget,
+                                             self.quarantined, self.lock, self.options.offline, fetcher)
+            self.converted_documents += 1
+            self.converted_bytes += document.size
+            self.conversion_seconds += (time.perf_counter() - started
+                                        - (fetcher.download_seconds - download_seconds))
+            if counts is not None:
+                counts.update(document_counts)
+            if not converted:
+                status = 'quarantined' if document.filename in self.quarantined else 'invalid'
+            # Copied first: build.py's prefetch threads may be adding articles
+            elif any(filename == document.filename for filename, _ in list(fetcher.deferred)):
+                status = 'deferred'
+            else:
+                status = 'converted'
+            if converted:
+                self.changes.after(mdx_path, self.lock.articles.get(article, []))
+        if not converted:
+            mdx_path = None
+        else:
+            self.converted_pages[document.name] = page_name(mdx_path, self.output_dir)
+            if not self.manifest:
+                # A sharded run's pages are indexed by the merge
+                self.headings.update(mdx_path)
+        if record is None:
+            record = self.journal.record_document(document.name, status, mdx_path,
+                                                  self.lock.articles.get(article, []), document_counts,
+                                                  document.sha256())
+        self.store.add_document(document, mapping, record)
+        if self.manifest:
+            self.missing.discard(document.name)
+            if converted:
+                self.manifest.add(document.name, mapping, self.order[document.name], 'converted', mdx_path,
+                                  self.lock.articles.get(article, []))
+            else:
+                self.manifest.add(document.name, mapping, self.order[document.name], status)
+        print()
+        return converted
+    
+    def take_retry(self):
+        """Return the names of documents with deferred images, to convert again with retry=True."""
+        retry = {filename.rsplit('/', 1)[-1] for filename, _ in self.fetcher.take_deferred()}
+        retry -= {filename.rsplit('/', 1)[-1] for filename in self.quarantined}
+        if retry:
+            print(f"Retrying {len(retry)} document(s) with deferred images\n")
+        return retry
+    
+    def finish(self):
+        """Save the asset lock and heading index (or the shard manifest) and close the journal and store."""
+        if self.manifest:
+            for filename in self.missing:
+                self.manifest.add(filename, self.file_mapping[filename], self.order[filename], 'missing')
+            # Shards share assets.lock.json; their entries are applied by the merge
+            print(f"Wrote shard manifest: {self.manifest.save()}")
+        else:
+            if self.lock.save():
+                print(f"Updated asset lock: {self.lock.path.name} ({len(self.lock.entries())} images)")
+            if self.headings.save():
+                print(f"Updated heading index: {self.headings.path.name} ({len(self.headings.pages)} pages)")
+        self.journal.close()
+        self.store.close()
+        if self.converted_documents:
+            record_history(self.run['category'], self.converted_documents, self.converted_bytes,
+                           self.conversion_seconds, self.fetcher.downloads, self.fetcher.download_seconds,
+                           instrumented=self.options.memory)
+    
+    def report(self):
+        """Print the run summary. Returns the converted pages over their weight budget."""
+        print(f"Completed: {self.processed}/{len(self.file_mapping)} files processed")
+        if DEFAULT_WRITER.counts:
+            print(f"Output: {DEFAULT_WRITER.summary()}")
+        if self.tag_counts:
+            print(f"Leftover HTML: {format_tag_counts(self.tag_counts)}")
+        if self.quarantined:
+            print(f"Quarantined: {len(self.quarantined)} file(s) over budget: {', '.join(self.quarantined)}")
+        print('\n'.join(self.changes.lines(self.output_dir)))
+        # Imported here: only the summary at the end of a run needs it
+        from check_page_weight import measure_pages, over_budget, print_over_budget
+        
+        over = over_budget(measure_pages(self.converted_pages.values(), self.output_dir))
+        print_over_budget(over, limit=WEIGHT_OFFENDERS)
+        print(f"Rule timings:\n{format_timings(DEFAULT_PIPELINE.timings())}")
+        if self.options.memory:
+            memory = DEFAULT_PROFILE.stop()
+            print_memory_report(memory)
+            record_memory(memory, self.run['category'])
+        self.fetcher.report()
+        return over
+
 def main():
     """Main conversion function."""
     import sys
     
-    if len(sys.argv) < 2:
-        print("Usage: python3 convert_framer_to_mdx.py <category>")
-        print("\nCategories:")
-        print("  owners-admin    - Owners & Administration")
-        print("  provider        - Provider Workflows")
-        print("  front-office    - Front Office Workflows")
-        print("  billing         - Billing Workflows")
-        print("  all             - All categories")
-        print("\nNote: File mappings must be defined in load_file_mapping() function")
-        print("based on the IA structure in .cursor/rules.md")
-        sys.exit(1)
+    args = parse_args(sys.argv[1:])
+    if args.help or not args.category:
+        print_usage()
+        sys.exit(0 if args.help else 1)
     
-    category_arg = sys.argv[1].lower()
+    category_arg = args.category.lower()
     
     base_dir = Path(__file__).parent
     input_dir = base_dir / "AAA-Framer-Export"
     output_dir = base_dir
     images_dir = base_dir / "images"
     
+    if args.bundle and not (is_bundle(args.bundle) and os.path.isfile(args.bundle)):
+        print(f"ERROR: Bundle must be an existing .zip or .jsonl file: {args.bundle}")
+        sys.exit(1)
+    
     # Load file mapping for the category
     file_mapping = load_file_mapping(category_arg)
     
@@ -1244,21 +1688,58 @@ def main():
         print("based on the IA structure in .cursor/rules.md")
         sys.exit(1)
     
+    manifest = None
+    shard = order = None
+    if args.shard:
+        from sharding import ShardManifest, export_weights, parse_shard, partition
+        
+        try:
+            shard, count = parse_shard(args.shard)
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            sys.exit(1)
+        order = {filename: i for i, filename in enumerate(file_mapping)}
+        assignment, plan = partition(export_weights(file_mapping, input_dir, args.bundle), count)
+        file_mapping = {filename: mapping for filename, mapping in file_mapping.items()
+                        if assignment[filename] == shard}
+        manifest = ShardManifest(shard, count, category_arg, plan, base_dir)
+    
     print(f"Processing category: {category_arg}")
+    if args.bundle:
+        print(f"Reading exports from bundle: {args.bundle}")
+    if manifest:
+        print(f"Shard {manifest.shard}/{manifest.count} (plan {manifest.plan})")
     print(f"Found {len(file_mapping)} files to process\n")
     
-    processed = 0
-    for filename, mapping in file_mapping.items():
-        input_file = input_dir / filename
-        if input_file.exists():
-            print(f"Processing: {filename}")
-            if process_file(input_file, file_mapping, output_dir, images_dir):
-                processed += 1
-            print()
-        else:
-            print(f"✗ File not found: {input_file}\n")
+    if args.plan:
+        print_plan(plan_run(file_mapping, input_dir, output_dir, images_dir, args.bundle), args.offline)
+        return
+    
+    run = {'category': category_arg, 'shard': args.shard, 'bundle': args.bundle, 'converter': converter_fingerprint()}
+    try:
+        journal = RunJournal(journal_path(shard and (shard, count)), run, resume=args.resume, root=base_dir)
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+    if args.resume:
+        print(f"Resuming from {journal.path.name} ({len(journal.documents)} document(s) journaled)\n")
+    conversion = ConversionRun(file_mapping, run, journal, output_dir, images_dir, args, manifest, order)
     
-    print(f"Completed: {processed}/{len(file_mapping)} files processed")
+    for document in iter_documents(file_mapping, input_dir, args.bundle):
+        if conversion.convert(document, conversion.tag_counts):
+            conversion.processed += 1
+    
+    # Convert documents with deferred images again once their hosts had time to recover
+    retry = conversion.take_retry()
+    if retry:
+        for document in iter_documents({name: m for name, m in file_mapping.items() if name in retry},
+                                       input_dir, args.bundle):
+            conversion.convert(document, None, retry=True)
+    
+    conversion.finish()
+    over = conversion.report()
+    if over and args.strict:
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
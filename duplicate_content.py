@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate content across the published pages, and snippet extraction.
+
+Usage:
+    python3 duplicate_content.py report [--threshold 0.8]
+    python3 duplicate_content.py extract [--threshold 0.8]
+
+The pages listed in docs.json are split into units: the whole page body and
+each section (the text between one heading and the next). Every unit of at
+least MIN_WORDS words is shingled into overlapping SHINGLE_SIZE-word runs
+and summarised by a one-permutation MinHash signature of NUM_BINS bins.
+Units that agree in every row of some LSH band are candidates, and
+candidates whose exact shingle Jaccard similarity reaches the threshold
+are near-duplicates (whole pages are compared with whole pages and
+sections with sections). Near-duplicates are grouped transitively; groups
+within one page, and section groups whose pages already duplicate each
+other as a whole, are not reported.
+
+report lists each group with its pages, similarity and size. extract
+moves every group whose text is identical (apart from whitespace) on at
+least two pages into snippets/<name>.mdx and replaces each occurrence with
+the snippet component, importing it below the frontmatter:
+
+    import FeaturesNotSupported from '/snippets/features-not-supported.mdx';
+
+Occurrences that are only similar are left in place and listed. Converting
+a page again writes its content back inline, so run extract after a
+conversion run.
+"""
+
+import hashlib
+import json
+import re
+import sys
+from pathlib import Path
+
+from heading_index import index_page, iter_headings, slugify
+from output_files import DEFAULT_WRITER
+
+BASE_DIR = Path(__file__).parent
+SNIPPETS_DIR = BASE_DIR / "snippets"
+
+SHINGLE_SIZE = 5
+NUM_BINS = 64
+# NUM_BINS = BANDS * ROWS; with 16 bands of 4 rows, units with Jaccard
+# similarity 0.8 become candidates with probability above 0.99
+BANDS = 16
+ROWS = 4
+DEFAULT_THRESHOLD = 0.8
+MIN_WORDS = 40
+
+FRONTMATTER_PATTERN = re.compile(rb'\A---\n.*?\n---\n', re.DOTALL)
+IMPORT_PATTERN = re.compile(rb"^import (?:\w+|\{[^{}]*\}) from '[^']+';\n", re.MULTILINE)
+WORD_PATTERN = re.compile(r'\w+')
+
+def published_pages(docs_path=BASE_DIR / "docs.json"):
+    """Return the page names in docs.json navigation, in order."""
+    with open(docs_path, 'r', encoding='utf-8') as f:
+        navigation = json.load(f)['navigation']
+    pages = []
+
+    def collect(node):
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if key == 'pages':
+                    pages.extend(page for page in value if isinstance(page, str))
+                collect(value)
+        elif isinstance(node, list):
+            for item in node:
+                collect(item)
+
+    collect(navigation)
+    return list(dict.fromkeys(pages))
+
+class Unit:
+    """A page body or section: its page, heading (None for a whole page) and byte span in the MDX."""
+
+    def __init__(self, page, heading, start, end, text):
+        self.page = page
+        self.heading = heading
+        self.start = start
+        self.end = end
+        self.text = text
+        self.normalized = ' '.join(text.split())
+        self.shingles = shingles(text)
+
+    def label(self):
+        return f"{self.page}#{slugify(self.heading)}" if self.heading else self.page
+
+def shingles(text):
+    """Return the set of 64-bit hashes of the SHINGLE_SIZE-word runs of text."""
+    words = WORD_PATTERN.findall(text.lower())
+    runs = (' '.join(words[i:i + SHINGLE_SIZE]) for i in range(max(1, len(words) - SHINGLE_SIZE + 1)))
+    return {int.from_bytes(hashlib.blake2b(run.encode('utf-8'), digest_size=8).digest(), 'big') for run in runs}
+
+def signature(hashes):
+    """One-permutation MinHash: the smallest hash in each of NUM_BINS bins (None if empty)."""
+    bins = [None] * NUM_BINS
+    for value in hashes:
+        index, rest = value % NUM_BINS, value // NUM_BINS
+        if bins[index] is None or rest < bins[index]:
+            bins[index] = rest
+    return bins
+
+def split_units(page, data):
+    """Return the units of a page's MDX bytes: its body and each section with enough text."""
+    frontmatter = FRONTMATTER_PATTERN.match(data)
+    body_start = frontmatter.end() if frontmatter else 0
+    # Imports (the video facade, snippets of an earlier extract) are not content
+    for match in IMPORT_PATTERN.finditer(data, body_start):
+        if data[body_start:match.start()].strip():
+            break
+        body_start = match.end()
+    units = [(None, body_start, len(data))]
+    tree, _ = index_page(data)
+    headings = list(iter_headings(tree))
+    for heading, following in zip(headings, headings[1:] + [None]):
+        start = data.index(b'\n', heading['offset']) + 1 if b'\n' in data[heading['offset']:] else len(data)
+        units.append((heading['text'], start, following['offset'] if following else len(data)))
+    result = []
+    for heading, start, end in units:
+        text = data[start:end].decode('utf-8')
+        if len(WORD_PATTERN.findall(text)) >= MIN_WORDS:
+            # Spans exclude surrounding blank lines, so replacements keep the page layout
+            stripped = text.strip()
+            start += len(text[:len(text) - len(text.lstrip())].encode('utf-8'))
+            result.append(Unit(page, heading, start, start + len(stripped.encode('utf-8')), stripped))
+    return result
+
+def find_groups(units, threshold=DEFAULT_THRESHOLD):
+    """Return groups (lists of units) of near-duplicates spanning at least two pages, largest first."""
+    signatures = [signature(unit.shingles) for unit in units]
+    buckets = {}
+    for position, bins in enumerate(signatures):
+        for band in range(BANDS):
+            rows = tuple(bins[band * ROWS:(band + 1) * ROWS])
+            if all(row is None for row in rows):
+                continue
+            buckets.setdefault((band, rows), []).append(position)
+
+    parent = list(range(len(units)))
+
+    def find(position):
+        while parent[position] != position:
+            parent[position] = parent[parent[position]]
+            position = parent[position]
+        return position
+
+    checked = set()
+    for members in buckets.values():
+        for i, first in enumerate(members):
+            for second in members[i + 1:]:
+                pair = (first, second)
+                # Whole pages are only compared with whole pages, sections with sections
+                if (pair in checked or units[first].page == units[second].page
+                        or (units[first].heading is None) != (units[second].heading is None)):
+                    continue
+                checked.add(pair)
+                a, b = units[first].shingles, units[second].shingles
+                if len(a & b) >= threshold * len(a | b):
+                    parent[find(first)] = find(second)
+
+    groups = {}
+    for position, unit in enumerate(units):
+        groups.setdefault(find(position), []).append(unit)
+    groups = [group for group in groups.values() if len({unit.page for unit in group}) > 1]
+
+    # Sections of pages that duplicate each other as a whole add nothing
+    duplicated_pages = {}
+    for group in groups:
+        if group[0].heading is None:
+            pages = frozenset(unit.page for unit in group)
+            for page in pages:
+                duplicated_pages[page] = pages
+    groups = [group for group in groups if group[0].heading is None or not all(
+        unit.page in duplicated_pages and duplicated_pages[unit.page] >= {u.page for u in group} for unit in group)]
+    return sorted(groups, key=lambda group: (-sum(len(unit.text) for unit in group), group[0].label()))
+
+def similarity(group):
+    """Return the lowest shingle Jaccard similarity between the first unit and the others."""
+    first = group[0].shingles
+    return min(len(first & unit.shingles) / len(first | unit.shingles) for unit in group[1:])
+
+def load_units(root=BASE_DIR):
+    units = []
+    for page in published_pages(Path(root) / "docs.json"):
+        path = Path(root) / f"{page}.mdx"
+        if path.exists():
+            units.extend(split_units(page, path.read_bytes()))
+    return units
+
+def component_name(slug):
+    name = ''.join(part.capitalize() for part in re.split(r'[^A-Za-z0-9]+', slug) if part)
+    return name if name[:1].isalpha() else f"Snippet{name}"
+
+def plan_snippets(groups, snippets_dir=SNIPPETS_DIR):
+    """Return [(snippet path, component, text, units replaced, units left)] for groups with identical text."""
+    plans = []
+    names = set()
+    for group in groups:
+        variants = {}
+        for unit in group:
+            variants.setdefault(unit.normalized, []).append(unit)
+        identical = max(variants.values(), key=len)
+        if len({unit.page for unit in identical}) < 2:
+            continue
+        slug = slugify(identical[0].heading) if identical[0].heading else identical[0].page.rsplit('/', 1)[-1]
+        slug = slug.strip('-') or 'snippet'
+        base, number = slug, 1
+        while slug in names:
+            number += 1
+            slug = f"{base}-{number}"
+        names.add(slug)
+        left = [unit for unit in group if unit not in identical]
+        plans.append((Path(snippets_dir) / f"{slug}.mdx", component_name(slug), identical[0].text, identical, left))
+    return plans
+
+def apply_snippets(plans, root=BASE_DIR):
+    """Write the snippets and replace their occurrences in the pages. Returns the pages changed."""
+    replacements = {}
+    for path, component, text, units, _ in plans:
+        DEFAULT_WRITER.write_bytes(path, (text + '\n').encode('utf-8'), 'snippet')
+        import_line = f"import {component} from '/{Path(path).relative_to(root).as_posix()}';\n"
+        for unit in units:
+            replacements.setdefault(unit.page, []).append((unit.start, unit.end, f"<{component} />", import_line))
+
+    for page, edits in replacements.items():
+        path = Path(root) / f"{page}.mdx"
+        data = path.read_bytes()
+        for start, end, tag, _ in sorted(edits, reverse=True):
+            data = data[:start] + tag.encode('utf-8') + data[end:]
+        frontmatter = FRONTMATTER_PATTERN.match(data)
+        position = frontmatter.end() if frontmatter else 0
+        body = data[position:].lstrip(b'\n')
+        imports = {line for *_, line in edits}
+        match = IMPORT_PATTERN.match(body)
+        while match:
+            imports.add(match.group(0).decode('utf-8'))
+            body = body[match.end():]
+            match = IMPORT_PATTERN.match(body)
+        data = data[:position] + b'\n' + ''.join(sorted(imports)).encode('utf-8') + b'\n' + body.lstrip(b'\n')
+        DEFAULT_WRITER.write_bytes(path, data, 'mdx')
+    return sorted(replacements)
+
+def report(groups):
+    for group in groups:
+        heading = f"section \"{group[0].heading}\"" if group[0].heading else "whole page"
+        size = sum(len(unit.text.encode('utf-8')) for unit in group)
+        print(f"  {heading}: {len(group)} occurrence(s), similarity >= {similarity(group):.2f}, {size / 1000:.1f} KB")
+        for unit in group:
+            print(f"      {unit.label()}")
+    print(f"{len(groups)} group(s) of near-duplicate content")
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Find near-duplicate content and extract it into snippets.")
+    parser.add_argument('command', choices=['report', 'extract'])
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Jaccard similarity of word shingles at which content counts as duplicated')
+    args = parser.parse_args()
+
+    units = load_units()
+    groups = find_groups(units, args.threshold)
+    print(f"Compared {len(units)} page bodies and sections of {len({unit.page for unit in units})} page(s)")
+    if args.command == 'report':
+        report(groups)
+        return 0
+
+    plans = plan_snippets(groups)
+    for path, component, _, replaced, left in plans:
+        print(f"  ✓ {path.relative_to(BASE_DIR)} <{component} />: {len(replaced)} occurrence(s)")
+        for unit in left:
+            print(f"      ✗ Similar but not identical, left in place: {unit.label()}")
+    pages = apply_snippets(plans)
+    print(f"Extracted {len(plans)} snippet(s), updated {len(pages)} page(s)")
+    if DEFAULT_WRITER.counts:
+        print(f"Output: {DEFAULT_WRITER.summary()}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
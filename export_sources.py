@@ -0,0 +1,204 @@
+"""
+Reading Framer exports without loading whole documents into memory.
+
+An export file is a title line, an empty line, then the article HTML. The
+body is memory-mapped and split into top-level elements, so conversion only
+ever holds one element (plus its output) in memory at a time.
+
+Exports can come from loose .txt files in AAA-Framer-Export/ or from a single
+bundle file, which makes an export snapshot one atomic artifact:
+- .zip: one member per article in the loose-file format (folders allowed)
+- .jsonl: one JSON record per line with "title", "html", "exported_at" and
+  optionally "filename" (defaults to the title with "/" replaced by "_")
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import re
+from datetime import datetime, timezone
+
+# Elements that never have a closing tag
+VOID_ELEMENTS = {
+    b'area', b'base', b'br', b'col', b'embed', b'hr', b'img', b'input',
+    b'link', b'meta', b'param', b'source', b'track', b'wbr',
+}
+
+TAG_PATTERN = re.compile(rb'<(/?)([A-Za-z][A-Za-z0-9]*)[^<>]*>')
+# Tags and comments (Framer does not export comments)
+BLOCK_TOKEN_PATTERN = re.compile(rb'<!--.*?(?:-->|\Z)|' + TAG_PATTERN.pattern, re.DOTALL)
+# Adjacent top-level elements are converted together up to this many bytes
+BLOCK_BATCH_SIZE = 64 * 1024
+
+IMAGE_PATTERN = re.compile(rb'<img[^<>]+src="(https://framerusercontent\.com/images/[^"]+)"')
+VIDEO_PATTERN = re.compile(rb'<iframe[^<>]+src="https://(?:www\.)?(?:youtube(?:-nocookie)?\.com/embed/|youtu\.be/)'
+                           rb'([\w-]{11})')
+
+def _line_end(buffer, start):
+    """Return the offset just past the line starting at start (universal newlines)."""
+    lf = buffer.find(b'\n', start)
+    cr = buffer.find(b'\r', start)
+    if lf == -1 and cr == -1:
+        return len(buffer)
+    if cr == -1 or (lf != -1 and lf < cr):
+        return lf + 1
+    return cr + 2 if buffer[cr + 1:cr + 2] == b'\n' else cr + 1
+
+def _decode(data):
+    """Decode a slice of the export the way text-mode reading would."""
+    return data.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+
+class ExportDocument:
+    """A Framer export backed by a bytes-like buffer (usually a memory map).
+
+    filename is the path relative to the export root, e.g. "Remittances.txt"
+    or "Onboarding Documents/Getting Started as a Biller.txt".
+    """
+
+    def __init__(self, filename, buffer, exported_at=None, on_close=None):
+        self.filename = filename
+        self.name = filename.rsplit('/', 1)[-1]
+        self.exported_at = exported_at
+        self.size = len(buffer)
+        self._buffer = buffer
+        self._on_close = on_close
+        title_end = _line_end(buffer, 0)
+        # Matches readlines(): the title line plus at least one more line
+        self.is_valid = title_end < len(buffer)
+        self.title = _decode(buffer[:title_end]).strip()
+        self.body_start = _line_end(buffer, title_end)
+
+    def image_urls(self):
+        """Return Framer image URLs in document order."""
+        return [m.group(1).decode('utf-8') for m in IMAGE_PATTERN.finditer(self._buffer, self.body_start)]
+
+    def youtube_ids(self):
+        """Return the IDs of embedded YouTube videos in document order, without repeats."""
+        return list(dict.fromkeys(m.group(1).decode('ascii')
+                                  for m in VIDEO_PATTERN.finditer(self._buffer, self.body_start)))
+
+    def iter_blocks(self, batch_size=BLOCK_BATCH_SIZE):
+        """Yield the body as runs of complete top-level elements.
+
+        Adjacent elements are batched up to batch_size bytes so small elements
+        do not each pay the per-call conversion overhead; a single element
+        larger than that is yielded on its own. Batches are only cut where a
+        closing tag closes the outermost open element. Unclosed elements
+        extend to the end of the document, and nothing is split after a
+        closing tag that does not match the innermost open element or after a
+        comment, so malformed markup degrades to whole-document conversion
+        rather than being split mid-element.
+        """
+        buffer = self._buffer
+        batch_start = self.body_start
+        open_tags = []
+        for match in BLOCK_TOKEN_PATTERN.finditer(buffer, self.body_start):
+            if match.group(2) is None:
+                # A comment: the rules still see the tags in it, which may pair with any tag around it
+                break
+            tag = match.group(2).lower()
+            if match.group(1) != b'/':
+                # <p/> still opens a p: the rules pair it with the next </p>
+                if tag not in VOID_ELEMENTS:
+                    open_tags.append(tag)
+                continue
+            if not open_tags or open_tags[-1] != tag:
+                # A stray or misnested closing tag: element boundaries are unknown from here on
+                break
+            open_tags.pop()
+            # A top-level element just ended; the batch may be cut here
+            if not open_tags and match.end() - batch_start >= batch_size:
+                yield _decode(buffer[batch_start:match.end()])
+                batch_start = match.end()
+        if batch_start < len(buffer):
+            yield _decode(buffer[batch_start:])
+
+    def read_body(self):
+        """Return the whole body as a string."""
+        return _decode(self._buffer[self.body_start:])
+
+    def raw_bytes(self):
+        """Return the export exactly as stored, title line included."""
+        return bytes(self._buffer)
+
+    def sha256(self):
+        """Return the SHA-256 hex digest of the export as stored."""
+        return hashlib.sha256(self._buffer).hexdigest()
+
+    def close(self):
+        if self._on_close:
+            self._on_close()
+            self._on_close = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def _timestamp(seconds):
+    return datetime.fromtimestamp(seconds, tz=timezone.utc).isoformat()
+
+def open_export(path, filename=None):
+    """Memory-map an export file and return it as an ExportDocument."""
+    filename = filename or os.path.basename(path)
+    f = open(path, 'rb')
+    exported_at = _timestamp(os.fstat(f.fileno()).st_mtime)
+    try:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except ValueError:
+        # Empty files cannot be mapped
+        f.close()
+        return ExportDocument(filename, b'', exported_at)
+
+    def close():
+        buffer.close()
+        f.close()
+
+    return ExportDocument(filename, buffer, exported_at, on_close=close)
+
+def is_bundle(path):
+    """Return True if path is a bundle file rather than an export folder."""
+    return str(path).lower().endswith(('.zip', '.jsonl'))
+
+def iter_bundle(path):
+    """Yield ExportDocuments from a .zip or .jsonl bundle, one record at a time.
+
+    Nothing is unpacked to disk; only the current record is held in memory.
+    """
+    if str(path).lower().endswith('.zip'):
+        yield from _iter_zip(path)
+    else:
+        yield from _iter_jsonl(path)
+
+def _iter_zip(path):
+    # Imported here: only bundle runs need it
+    import zipfile
+
+    with zipfile.ZipFile(path) as bundle:
+        for info in bundle.infolist():
+            if info.is_dir() or not info.filename.lower().endswith('.txt'):
+                continue
+            filename = info.filename
+            # Bundles zipped from the repo root keep the export folder prefix
+            if filename.startswith('AAA-Framer-Export/'):
+                filename = filename[len('AAA-Framer-Export/'):]
+            exported_at = datetime(*info.date_time, tzinfo=timezone.utc).isoformat()
+            yield ExportDocument(filename, bundle.read(info), exported_at)
+
+def _iter_jsonl(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                title = record['title']
+                body = record['html']
+            except (ValueError, KeyError) as e:
+                print(f"  ✗ Skipping bundle record {line_number} - invalid format ({e})")
+                continue
+            filename = record.get('filename') or f"{title.replace('/', '_')}.txt"
+            buffer = f"{title}\n\n{body}".encode('utf-8')
+            yield ExportDocument(filename, buffer, record.get('exported_at'))
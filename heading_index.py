@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Index of the headings and anchors of every MDX page.
+
+.conversion/headings.json maps each page (its path without .mdx, as in
+docs.json) to the SHA-256 of its MDX and its heading tree. Each heading has
+its level, text, anchor slug, the byte offset of the heading line and the
+byte offset where its section ends (the next heading of the same or a
+higher level, or the end of the page), and its subheadings. Pages with
+repeated headings list the anchors under "duplicates".
+
+Anchors follow the github-slugger rules used by Mintlify: the heading text
+without Markdown formatting, lowercased, with punctuation removed and
+spaces turned into dashes. An anchor already taken on the page gets -1,
+-2, ... appended until it is free, and the suffixed anchor is then taken
+too, so ## Foo, ## Foo and ## Foo-1 get foo, foo-1 and foo-1-1.
+
+Conversion runs update the entries of the pages they convert, re-reading
+only pages whose MDX hash changed; a sharded run's pages are indexed by
+sharding.py merge.
+
+Usage:
+    python3 heading_index.py rebuild   # Index every .mdx page in the checkout
+    python3 heading_index.py check     # Report duplicate anchors and links to missing anchors
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent
+INDEX_PATH = BASE_DIR / ".conversion" / "headings.json"
+# Version 2: suffixed anchors are taken too (github-slugger)
+INDEX_VERSION = 2
+
+HEADING_PATTERN = re.compile(rb'^(#{1,6})[ \t]+(.+?)[ \t#]*$', re.MULTILINE)
+FENCE_PATTERN = re.compile(rb'^[ \t]*```', re.MULTILINE)
+# Markdown and HTML formatting removed before slugging
+FORMATTING_PATTERNS = (
+    (re.compile(r'!?\[([^\]]*)\]\([^)]*\)'), r'\1'),
+    (re.compile(r'<[^<>]+>'), ''),
+    (re.compile(r'(\*\*|__|\*|_|`|~~)(.+?)\1'), r'\2'),
+)
+SLUG_REMOVE_PATTERN = re.compile(r'[^\w\- ]')
+# Links to an anchor in the same page (#anchor) or another page (/page#anchor)
+ANCHOR_LINK_PATTERN = re.compile(r'''\]\((/[^)\s#]*)?#([^)\s]+)\)|href=["'](/[^"'#]*)?#([^"']+)["']''')
+
+def heading_text(markdown):
+    """Return the plain text of a Markdown heading."""
+    for pattern, replacement in FORMATTING_PATTERNS:
+        markdown = pattern.sub(replacement, markdown)
+    return markdown.strip()
+
+def slugify(text):
+    return SLUG_REMOVE_PATTERN.sub('', text.lower()).replace(' ', '-')
+
+def index_page(data):
+    """Return (heading tree, duplicate anchors) for the bytes of an MDX page."""
+    fences = [match.start() for match in FENCE_PATTERN.finditer(data)]
+
+    def in_code(offset):
+        return sum(1 for fence in fences if fence < offset) % 2 == 1
+
+    headings = []
+    counts = {}  # Anchor taken on the page: suffixes tried for it
+    duplicates = []
+    for match in HEADING_PATTERN.finditer(data):
+        text = heading_text(match.group(2).decode('utf-8', 'replace'))
+        # Framer's empty spacer headings ("####") have no text and no anchor
+        if not text or in_code(match.start()):
+            continue
+        slug = anchor = slugify(text)
+        while anchor in counts:
+            counts[slug] += 1
+            anchor = f"{slug}-{counts[slug]}"
+        if anchor != slug:
+            duplicates.append(anchor)
+        counts[anchor] = 0
+        headings.append({'level': len(match.group(1)), 'text': text, 'anchor': anchor,
+                         'offset': match.start(), 'end': len(data), 'children': []})
+
+    tree, stack = [], []
+    for heading in headings:
+        while stack and stack[-1]['level'] >= heading['level']:
+            stack.pop()['end'] = heading['offset']
+        (stack[-1]['children'] if stack else tree).append(heading)
+        stack.append(heading)
+    return tree, duplicates
+
+def iter_headings(tree):
+    for heading in tree:
+        yield heading
+        yield from iter_headings(heading['children'])
+
+def page_name(path, root=BASE_DIR):
+    """Return the docs.json page name of an MDX file."""
+    return Path(os.path.relpath(path, root)).as_posix()[:-len('.mdx')]
+
+class HeadingIndex:
+    """The heading index, keyed by page name."""
+
+    def __init__(self, path=INDEX_PATH, root=BASE_DIR):
+        self.path = Path(path)
+        self.root = Path(root)
+        self.pages = {}
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            if index.get('version') == INDEX_VERSION:
+                self.pages = index['pages']
+        self._saved = self._serialize()
+
+    def _serialize(self):
+        return json.dumps({'version': INDEX_VERSION, 'pages': dict(sorted(self.pages.items()))},
+                          indent=2, ensure_ascii=False) + '\n'
+
+    def update(self, mdx_path):
+        """Index an MDX file unless its hash is unchanged. Returns True if it was read again."""
+        data = Path(mdx_path).read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+        name = page_name(mdx_path, self.root)
+        if self.pages.get(name, {}).get('sha256') == digest:
+            return False
+        tree, duplicates = index_page(data)
+        self.pages[name] = {'sha256': digest, 'headings': tree}
+        if duplicates:
+            self.pages[name]['duplicates'] = duplicates
+        return True
+
+    def anchors(self, name):
+        return {heading['anchor'] for heading in iter_headings(self.pages.get(name, {}).get('headings', []))}
+
+    def save(self):
+        """Write the index if it changed. Returns True if written."""
+        text = self._serialize()
+        if text == self._saved:
+            return False
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        self._saved = text
+        return True
+
+def rebuild(index):
+    """Index every published .mdx page and drop pages that no longer exist."""
+    # Imported here: only rebuilds need it
+    from check_image_refs import SKIP_DIRS
+
+    names = set()
+    for folder, dirs, files in os.walk(index.root):
+        dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS)
+        for name in sorted(files):
+            if name.endswith('.mdx'):
+                path = Path(folder) / name
+                index.update(path)
+                names.add(page_name(path, index.root))
+    for name in set(index.pages) - names:
+        del index.pages[name]
+
+def check(index):
+    """Print duplicate anchors and links to anchors that do not exist; return the number found."""
+    problems = 0
+    for name, page in sorted(index.pages.items()):
+        for anchor in page.get('duplicates', ()):
+            print(f"  ✗ {name}.mdx: duplicate heading, anchor #{anchor}")
+            problems += 1
+        text = (index.root / f"{name}.mdx").read_text(encoding='utf-8')
+        for match in ANCHOR_LINK_PATTERN.finditer(text):
+            target = (match.group(1) or match.group(3) or f"/{name}").strip('/')
+            anchor = match.group(2) or match.group(4)
+            if target in index.pages and anchor not in index.anchors(target):
+                line = text.count('\n', 0, match.start()) + 1
+                print(f"  ✗ {name}.mdx:{line}: link to missing anchor {target}#{anchor}")
+                problems += 1
+    headings = sum(1 for page in index.pages.values() for _ in iter_headings(page['headings']))
+    print(f"{len(index.pages)} page(s), {headings} heading(s): "
+          f"{'✓ no problems' if not problems else f'{problems} problem(s)'}")
+    return problems
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Maintain the heading and anchor index.")
+    parser.add_argument('command', choices=['rebuild', 'check'])
+    args = parser.parse_args()
+
+    index = HeadingIndex()
+    rebuild(index)
+    if index.save():
+        print(f"✓ Wrote {index.path}")
+    if args.command == 'check':
+        return 1 if check(index) else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
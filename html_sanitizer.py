@@ -0,0 +1,125 @@
+"""
+One-pass handling of HTML tags left over after markdown conversion.
+
+Every remaining tag gets one of these policies:
+- keep:     left as-is (img and iframe tags Mintlify renders directly)
+- comment:  wrapped as <!-- HTML preserved: <tag> --> for manual review
+- strip:    removed, keeping the surrounding text
+- map:      renamed to a Mintlify component, e.g. <blockquote> -> <Note>
+
+Decisions are made per distinct tag string in a single substitution over the
+document, so the cost is linear in document length no matter how many
+distinct tags it contains.
+"""
+
+import re
+
+KEEP = 'keep'
+COMMENT = 'comment'
+STRIP = 'strip'
+MAP = 'map'
+
+# A '<' not followed by a tag name, '/' or '!' is text (e.g. an unescaped &lt;)
+TAG_PATTERN = re.compile(r'<[A-Za-z/!][^<>]*>')
+TAG_NAME_PATTERN = re.compile(r'<(/?)([A-Za-z][A-Za-z0-9-]*)')
+
+# Tags Mintlify renders directly
+DEFAULT_ALLOWLIST = frozenset({'img', 'iframe'})
+# Formatting tags kept only in their bare form (<p>, </p>, <br />, ...)
+DEFAULT_BARE_ALLOWLIST = frozenset({'p', 'br', 'ul', 'ol', 'li'})
+# Elements without content: bare as <br>, <br/> or <br />, while </br> is stray
+VOID_TAGS = frozenset({'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+                       'link', 'meta', 'param', 'source', 'track', 'wbr'})
+
+def bare_forms(name):
+    """Return the attribute-free forms of a tag, e.g. ('<p>', '</p>') or ('<br>', '<br/>', '<br />')."""
+    if name in VOID_TAGS:
+        return f'<{name}>', f'<{name}/>', f'<{name} />'
+    return f'<{name}>', f'</{name}>'
+
+class Sanitizer:
+    """Apply per-tag policies to the HTML tags left in converted markdown.
+
+    allowlist: tag names always kept
+    bare_allowlist: tag names kept in their exact bare forms (see bare_forms())
+    denylist: tag names stripped (markup removed, content kept)
+    policies: tag name -> KEEP, COMMENT, STRIP or (MAP, "Component");
+        overrides the lists above
+    default: policy for every other tag
+    """
+
+    def __init__(self, allowlist=DEFAULT_ALLOWLIST, bare_allowlist=DEFAULT_BARE_ALLOWLIST,
+                 denylist=(), policies=None, default=COMMENT):
+        self.allowlist = frozenset(allowlist)
+        self.bare_allowlist = frozenset(bare_allowlist)
+        self.denylist = frozenset(denylist)
+        self.policies = dict(policies or {})
+        self.default = default
+        for policy in list(self.policies.values()) + [default]:
+            action = policy[0] if isinstance(policy, tuple) else policy
+            if action not in (KEEP, COMMENT, STRIP, MAP):
+                raise ValueError(f"Unknown tag policy: {policy!r}")
+
+    def keep(self, *names):
+        """Add tag names (e.g. Mintlify components emitted by a rule) to the allowlist."""
+        self.allowlist = self.allowlist | {name.lower() for name in names}
+
+    def policy_for(self, tag):
+        """Return (tag name or None, policy) for a tag string."""
+        match = TAG_NAME_PATTERN.match(tag)
+        if not match:
+            return None, self.default
+        name = match.group(2).lower()
+        if name in self.policies:
+            return name, self.policies[name]
+        if name in self.denylist:
+            return name, STRIP
+        if name in self.allowlist:
+            return name, KEEP
+        if name in self.bare_allowlist and tag in bare_forms(name):
+            return name, KEEP
+        return name, self.default
+
+    def replacement(self, tag):
+        """Return (name, action, replacement text) for a tag string."""
+        name, policy = self.policy_for(tag)
+        if isinstance(policy, tuple):
+            action, component = policy
+            closing = TAG_NAME_PATTERN.match(tag).group(1)
+            return name, action, f'<{closing}{component}>'
+        if policy == KEEP:
+            return name, policy, tag
+        if policy == STRIP:
+            return name, policy, ''
+        return name, policy, f'<!-- HTML preserved: {tag} -->'
+
+    def sanitize(self, text, counts=None):
+        """Apply tag policies to text in one pass.
+
+        If counts is a Counter, it is updated with (tag name, action) pairs
+        for every tag that was not kept.
+        """
+        decisions = {}
+
+        def replace(match):
+            tag = match.group(0)
+            decision = decisions.get(tag)
+            if decision is None:
+                decision = decisions[tag] = self.replacement(tag)
+            name, action, replacement = decision
+            if counts is not None and action != KEEP:
+                counts[(name or tag, action)] += 1
+            return replacement
+
+        # A tag ends with '>', so a stray '<' after the last one cannot start a
+        # match; bounding the search keeps each stray '<' from rescanning the rest
+        end = text.rfind('>') + 1
+        return TAG_PATTERN.sub(replace, text[:end]) + text[end:]
+
+def format_tag_counts(counts):
+    """Summarize a (tag name, action) Counter, e.g. "blockquote ×6 commented"."""
+    labels = {COMMENT: 'commented', STRIP: 'stripped', MAP: 'mapped'}
+    return ', '.join(f"{name} ×{count} {labels.get(action, action)}"
+                     for (name, action), count in sorted(counts.items(), key=lambda item: (-item[1], item[0])))
+
+DEFAULT_SANITIZER = Sanitizer()
@@ -0,0 +1,161 @@
+"""
+Single-pass conversion of HTML tables to markdown pipe tables.
+
+Each table is tokenized once into sections, rows and cells, then laid out on
+a grid so colspan/rowspan keep columns aligned. Handles:
+- <thead>/<tbody>/<tfoot>; the first <thead> row (else the first row) is the header
+- colspan/rowspan, filled with empty cells since markdown cannot span
+- column alignment from align="..." or style="text-align: ..." on header cells
+- multi-line cells (paragraphs, <br>), joined with <br /> to stay on one row
+- literal pipes in cells, escaped as \|
+"""
+
+import html
+import re
+
+TOKEN_PATTERN = re.compile(r'<(/?)([A-Za-z][A-Za-z0-9]*)([^<>]*)>|[^<]+|<')
+ATTR_PATTERN = re.compile(r'''([A-Za-z_:][-A-Za-z0-9_:.]*)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))''')
+TEXT_ALIGN_PATTERN = re.compile(r'text-align\s*:\s*(left|center|right)', re.IGNORECASE)
+
+SECTION_TAGS = {'thead', 'tbody', 'tfoot'}
+CELL_TAGS = {'th', 'td'}
+INLINE_MARKERS = {'strong': '**', 'b': '**', 'em': '*', 'i': '*', 'code': '`'}
+BLOCK_TAGS = {'p', 'div'}
+# Tags that carry no content of their own and are dropped
+IGNORED_TAGS = {'table', 'colgroup', 'col', 'caption', 'figure'}
+SEPARATORS = {None: '---', 'left': ':---', 'center': ':---:', 'right': '---:'}
+
+class Cell:
+    __slots__ = ('parts', 'colspan', 'rowspan', 'align')
+
+    def __init__(self, attrs):
+        self.parts = []
+        self.colspan = _span(attrs.get('colspan'))
+        self.rowspan = _span(attrs.get('rowspan'))
+        align = attrs.get('align')
+        if not align:
+            style = TEXT_ALIGN_PATTERN.search(attrs.get('style', ''))
+            align = style.group(1) if style else None
+        self.align = align.lower() if align and align.lower() in SEPARATORS else None
+
+    def text(self):
+        """Return the cell content as a single markdown table cell."""
+        lines = (line.strip() for line in ''.join(self.parts).split('\n'))
+        content = '<br />'.join(line for line in lines if line)
+        if '|' in content:
+            content = re.sub(r'(?<!\\)\|', r'\\|', content)
+        return content
+
+def _span(value):
+    try:
+        return max(1, min(int(value), 1000))
+    except (TypeError, ValueError):
+        return 1
+
+def _attrs(attr_text):
+    return {m.group(1).lower(): html.unescape(m.group(2) or m.group(3) or m.group(4) or '')
+            for m in ATTR_PATTERN.finditer(attr_text)}
+
+def parse_table(table_html):
+    """Return (head_rows, body_rows) as lists of rows of Cells."""
+    head_rows, body_rows = [], []
+    section = None
+    row = None
+    cell = None
+    links = []
+
+    for match in TOKEN_PATTERN.finditer(table_html):
+        name = match.group(2)
+        if name is None:
+            if cell is not None:
+                text = match.group(0)
+                cell.parts.append(html.unescape(text) if '&' in text else text)
+            continue
+        name = name.lower()
+        closing = match.group(1) == '/'
+
+        if name in SECTION_TAGS:
+            cell = row = None
+            section = None if closing else name
+        elif name == 'tr':
+            cell = row = None
+            if not closing:
+                row = []
+                (head_rows if section == 'thead' else body_rows).append(row)
+        elif name in CELL_TAGS:
+            cell = None
+            if not closing:
+                if row is None:
+                    row = []
+                    (head_rows if section == 'thead' else body_rows).append(row)
+                cell = Cell(_attrs(match.group(3)))
+                row.append(cell)
+        elif cell is None or name in IGNORED_TAGS:
+            continue
+        elif name in INLINE_MARKERS:
+            cell.parts.append(INLINE_MARKERS[name])
+        elif name in BLOCK_TAGS or name == 'br':
+            cell.parts.append('\n')
+        elif name == 'a':
+            if closing:
+                href = links.pop() if links else None
+                cell.parts.append(f']({href})' if href else '')
+            else:
+                href = _attrs(match.group(3)).get('href')
+                links.append(href)
+                cell.parts.append('[' if href else '')
+        else:
+            # Keep anything else (e.g. already-converted <img /> tags) verbatim
+            cell.parts.append(match.group(0))
+
+    return head_rows, body_rows
+
+def layout(rows):
+    """Place rows of Cells on a grid, expanding colspan/rowspan with empty cells.
+
+    Returns (grid of cell texts, alignment per column from the first row).
+    """
+    grid = []
+    alignments = []
+    carried = {}  # column -> rows still covered by a rowspan from above
+    for row_index, row in enumerate(rows):
+        out = []
+
+        def fill_carried():
+            while carried.get(len(out), 0) > 0:
+                carried[len(out)] -= 1
+                out.append('')
+
+        fill_carried()
+        for cell in row:
+            fill_carried()
+            start = len(out)
+            out.append(cell.text())
+            out.extend([''] * (cell.colspan - 1))
+            if cell.rowspan > 1:
+                for column in range(start, start + cell.colspan):
+                    carried[column] = cell.rowspan - 1
+            if row_index == 0:
+                alignments.extend([cell.align] * cell.colspan)
+        fill_carried()
+        grid.append(out)
+    return grid, alignments
+
+def convert_table_html(table_html):
+    """Convert one HTML table to a markdown table, or return None if it has no cells."""
+    head_rows, body_rows = parse_table(table_html)
+    rows = [r for r in head_rows + body_rows if r]
+    if not rows:
+        return None
+
+    grid, alignments = layout(rows)
+    width = max(len(r) for r in grid)
+    alignments += [None] * (width - len(alignments))
+
+    lines = []
+    for index, cells in enumerate(grid):
+        cells = cells + [''] * (width - len(cells))
+        lines.append('| ' + ' | '.join(cells) + ' |')
+        if index == 0:
+            lines.append('| ' + ' | '.join(SEPARATORS[a] for a in alignments) + ' |')
+    return '\n'.join(lines)
@@ -0,0 +1,318 @@
+"""
+Fetching Framer images without letting a slow or throttling CDN stall a run.
+
+- Requests are paced by a token bucket (DEFAULT_RATE per second, bursts of
+  DEFAULT_BURST) and pause for a 429 response's Retry-After.
+- Connect and read timeouts are separate, so an unreachable host fails in
+  seconds instead of waiting out one long timeout per image.
+- Concurrency adapts AIMD-style: it grows by one request per window of
+  successes and halves on 429, 5xx or a latency spike.
+- Each host has a circuit breaker. After FAILURE_THRESHOLD consecutive
+  retryable failures it opens and further images fail fast for COOLDOWN
+  seconds, then a single trial request decides whether it closes again.
+
+Images that fail with a retryable error (timeouts, connection errors, 429,
+5xx, open breaker) are deferred; the conversion scripts retry their
+documents once at the end of the run and list every image still left as a
+remote URL in the MDX.
+
+requests and urllib3 are imported when the first request is made, so runs
+that take every image from the asset lock never load them.
+"""
+
+import threading
+import time
+from urllib.parse import urlparse
+
+CONNECT_TIMEOUT = 5.0
+READ_TIMEOUT = 20.0
+# Requests per second and burst size of the token bucket
+DEFAULT_RATE = 10.0
+DEFAULT_BURST = 10
+MIN_CONCURRENCY = 1
+MAX_CONCURRENCY = 8
+# A response slower than this multiple of the average latency is a spike
+LATENCY_SPIKE = 3.0
+# Consecutive retryable failures that open a host's circuit breaker
+FAILURE_THRESHOLD = 5
+# Seconds a breaker stays open before a trial request
+COOLDOWN = 30.0
+# Longest Retry-After honoured, in seconds
+MAX_RETRY_AFTER = 60.0
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+class FetchError(Exception):
+    """An image could not be fetched. retryable errors defer the image to the retry pass."""
+
+    def __init__(self, message, retryable):
+        super().__init__(message)
+        self.retryable = retryable
+
+class TokenBucket:
+    """Allow rate acquisitions per second on average, up to burst at once."""
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available and take it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                wait = self._paused_until - now
+                if wait <= 0:
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Hand out no tokens for the next seconds (e.g. a 429's Retry-After)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+class AIMDLimiter:
+    """A concurrency limit with additive increase and multiplicative decrease."""
+
+    def __init__(self, initial=2, minimum=MIN_CONCURRENCY, maximum=MAX_CONCURRENCY):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = float(initial)
+        self.latency = None  # Moving average of successful request latency
+        self._active = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        with self._condition:
+            while self._active >= int(self.limit):
+                self._condition.wait()
+            self._active += 1
+
+    def release(self):
+        with self._condition:
+            self._active -= 1
+            self._condition.notify_all()
+
+    def success(self, seconds):
+        """Record a successful request; return False if its latency was a spike."""
+        with self._condition:
+            spike = self.latency is not None and seconds > LATENCY_SPIKE * self.latency
+            # The average follows a lasting slowdown, so it stops counting as a spike
+            self.latency = seconds if self.latency is None else 0.8 * self.latency + 0.2 * seconds
+            if spike:
+                self._decrease()
+                return False
+            # One more request per window of successes
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+            return True
+
+    def congestion(self):
+        """Record a 429, 5xx or timeout."""
+        with self._condition:
+            self._decrease()
+
+    def _decrease(self):
+        self.limit = max(self.minimum, self.limit / 2)
+
+class CircuitBreaker:
+    """Fail fast for a host after repeated retryable failures."""
+
+    def __init__(self, threshold=FAILURE_THRESHOLD, cooldown=COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Return True if a request may be made now."""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self._trial or time.monotonic() - self.opened_at < self.cooldown:
+                return False
+            # Half-open: let one trial request through
+            self._trial = True
+            return True
+
+    def record(self, ok):
+        with self._lock:
+            self._trial = False
+            if ok:
+                self.failures = 0
+                self.opened_at = None
+                return
+            self.failures += 1
+            if self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+    def reopens_in(self):
+        """Seconds until an open breaker allows a trial request (0 if closed)."""
+        with self._lock:
+            if self.opened_at is None:
+                return 0.0
+            return max(0.0, self.opened_at + self.cooldown - time.monotonic())
+
+class ImageFetcher:
+    """Fetch images over HTTP through a token bucket, AIMD limiter and per-host breakers.
+
+    deferred maps each article (see fetch_images()) with retryable failures to
+    its deferred URLs; failed maps every URL that could not be fetched to the
+    last error. downloads and download_seconds count the images fetched and
+    the wall-clock time spent fetching: while fetch_all() calls overlap (see
+    build.py), the time is counted once.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST, connect_timeout=CONNECT_TIMEOUT,
+                 read_timeout=READ_TIMEOUT, max_concurrency=MAX_CONCURRENCY, session=None):
+        self.timeout = (connect_timeout, read_timeout)
+        self.bucket = TokenBucket(rate, burst)
+        self.limiter = AIMDLimiter(maximum=max_concurrency)
+        self._session = session
+        self.deferred = {}
+        self.failed = {}
+        self.downloads = 0
+        self.download_seconds = 0.0
+        self._fetching = 0         # fetch_all() calls in progress
+        self._fetching_since = None
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        """The HTTP session, created (and requests imported) on first use."""
+        with self._lock:
+            if self._session is None:
+                import requests
+                import urllib3
+
+                # Framer image URLs are fetched with verify=False
+                urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+                self._session = requests.Session()
+            self._session.headers['User-Agent'] = USER_AGENT
+            return self._session
+
+    def breaker(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker()
+            return self._breakers[host]
+
+    def fetch(self, url):
+        """Return the bytes of url or raise FetchError."""
+        session = self.session
+        import requests
+
+        breaker = self.breaker(url)
+        if not breaker.allow():
+            raise FetchError(f"circuit open for {urlparse(url).netloc}", retryable=True)
+        self.bucket.acquire()
+        self.limiter.acquire()
+        started = time.monotonic()
+        try:
+            response = session.get(url, timeout=self.timeout, verify=False)
+        except requests.Timeout as e:
+            self.limiter.congestion()
+            breaker.record(False)
+            raise FetchError(f"timed out ({e.__class__.__name__})", retryable=True) from e
+        except requests.RequestException as e:
+            breaker.record(False)
+            raise FetchError(str(e), retryable=True) from e
+        finally:
+            self.limiter.release()
+        if response.status_code == 429 or response.status_code >= 500:
+            self.limiter.congestion()
+            breaker.record(False)
+            if response.status_code == 429:
+                self.bucket.pause(retry_after(response.headers.get('Retry-After')))
+            raise FetchError(f"HTTP {response.status_code}", retryable=True)
+        breaker.record(True)
+        if response.status_code >= 400:
+            raise FetchError(f"HTTP {response.status_code}", retryable=False)
+        self.limiter.success(time.monotonic() - started)
+        return response.content
+
+    def fetch_all(self, article, urls):
+        """Fetch urls concurrently; return {url: bytes or None}.
+
+        Retryable failures are recorded under article in deferred.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        def fetch_one(url):
+            try:
+                return url, self.fetch(url), None
+            except FetchError as e:
+                return url, None, e
+
+        results = {}
+        urls = list(dict.fromkeys(urls))
+        with self._lock:
+            if not self._fetching:
+                self._fetching_since = time.monotonic()
+            self._fetching += 1
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, min(len(urls), self.limiter.maximum))) as pool:
+                for url, data, error in pool.map(fetch_one, urls):
+                    results[url] = data
+                    with self._lock:
+                        if error is None:
+                            self.failed.pop(url, None)
+                            self.downloads += 1
+                            continue
+                        self.failed[url] = str(error)
+                        if error.retryable:
+                            self.deferred.setdefault(article, []).append(url)
+                    print(f"    ✗ Error downloading {url}: {error}{' (deferred)' if error.retryable else ''}")
+        finally:
+            with self._lock:
+                self._fetching -= 1
+                if not self._fetching:
+                    self.download_seconds += time.monotonic() - self._fetching_since
+        return results
+
+    def take_deferred(self):
+        """Return the deferred articles and forget them, waiting for open breakers to allow a trial."""
+        with self._lock:
+            deferred, self.deferred = self.deferred, {}
+            wait = max((breaker.reopens_in() for breaker in self._breakers.values()), default=0.0)
+        if deferred and wait:
+            print(f"Waiting {wait:.0f}s for image hosts to recover before retrying...")
+            time.sleep(wait)
+        return deferred
+
+    def report(self):
+        """Print the images left as remote URLs in the MDX, if any."""
+        if self.failed:
+            print(f"✗ {len(self.failed)} image(s) left as remote URLs in the MDX:")
+            for url, error in sorted(self.failed.items()):
+                print(f"    {url} ({error})")
+
+def retry_after(value):
+    """Seconds to wait for a Retry-After header given in seconds, else 1."""
+    try:
+        return min(MAX_RETRY_AFTER, max(0.0, float(value)))
+    except (TypeError, ValueError):
+        return 1.0
+
+_default_fetcher = None
+
+def default_fetcher():
+    """Return the fetcher shared by a conversion run, creating it on first use."""
+    global _default_fetcher
+    if _default_fetcher is None:
+        _default_fetcher = ImageFetcher()
+    return _default_fetcher
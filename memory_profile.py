@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Optional memory instrumentation of conversion runs.
+
+Usage:
+    python3 convert_framer_to_mdx.py <category> --memory
+    python3 convert_onboarding_docs.py --memory
+    python3 memory_profile.py history [--last N]   # Peak memory of recorded runs
+
+With --memory, allocations are traced with tracemalloc and the resident set
+size (RSS) is sampled every SAMPLE_INTERVAL seconds by a background thread.
+At the end of the run the peak traced memory and peak RSS are printed per
+stage (images: reading locked copies and downloading; markdown: converting
+and writing the MDX) and for the heaviest documents, with the TOP_SITES
+source lines whose allocations grew most over the run. Peaks are of the
+whole process, so a stage's growth (its peak less the traced memory when
+it started) shows what the stage itself added.
+
+Each instrumented run is appended to .conversion/memory.jsonl, which
+history lists oldest first, marking runs of a category whose peak grew by
+more than REGRESSION_THRESHOLD over the previous run.
+
+Tracing slows conversion down, so instrumented runs are left out of the
+time estimates of --plan (see run_planner.py).
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from run_journal import JOURNAL_DIR, read_records
+
+BASE_DIR = Path(__file__).parent
+MEMORY_HISTORY_PATH = JOURNAL_DIR / "memory.jsonl"
+SAMPLE_INTERVAL = 0.05
+TOP_SITES = 10
+TOP_DOCUMENTS = 10
+# Frames kept per traced allocation; allocation sites are reported by line
+TRACE_FRAMES = 1
+# Peak growth over the previous run of a category reported as a regression
+REGRESSION_THRESHOLD = 0.10
+MB = 1024 * 1024
+
+def current_rss():
+    """Return the resident set size of this process in bytes, or None if it cannot be read."""
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+def peak_rss():
+    """Return the peak RSS of this process in bytes, or None where getrusage is unavailable."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def site_path(filename):
+    """Show files of this checkout relative to it, others (the standard library) in full."""
+    path = Path(filename)
+    return path.relative_to(BASE_DIR).as_posix() if path.is_relative_to(BASE_DIR) else filename
+
+def format_size(size):
+    return f"{size / MB:.1f} MB" if size is not None else "n/a"
+
+class MemoryProfile:
+    """Peak traced memory and RSS per stage and per document of a run.
+
+    Until start() is called stage() and document() do nothing, so the
+    conversion code can be instrumented unconditionally.
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.enabled = False
+        self.stages = {}     # Stage: {'peak', 'growth', 'rss'} over every time it ran
+        self.documents = {}  # Document name: {'peak', 'growth', 'rss'}
+        self.peak = 0        # Peak traced memory up to the last reset
+        self.rss = None      # Peak sampled RSS
+        self._stack = []     # Open measurements: {'start', 'peak', 'rss'}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._tracemalloc = None
+        self._baseline = None
+
+    def start(self):
+        """Start tracing allocations and sampling RSS."""
+        # Imported here: tracemalloc pulls in pickle, which uninstrumented runs do not need
+        import tracemalloc
+
+        self._tracemalloc = tracemalloc
+        tracemalloc.start(TRACE_FRAMES)
+        self._baseline = tracemalloc.take_snapshot()
+        self.enabled = True
+        if current_rss() is not None:
+            threading.Thread(target=self._sample, name='memory-sampler', daemon=True).start()
+
+    def _sample(self):
+        while not self._stopped.wait(self.interval):
+            self._record_rss(current_rss())
+
+    def _record_rss(self, rss):
+        if rss is None:
+            return
+        with self._lock:
+            self.rss = max(self.rss or 0, rss)
+            for frame in self._stack:
+                frame['rss'] = max(frame['rss'] or 0, rss)
+
+    @contextmanager
+    def _measure(self, table, name):
+        if not self.enabled:
+            yield
+            return
+        with self._lock:
+            traced, peak = self._tracemalloc.get_traced_memory()
+            self.peak = max(self.peak, peak)
+            # The enclosing measurement keeps the peak reached so far before it is reset
+            if self._stack:
+                self._stack[-1]['peak'] = max(self._stack[-1]['peak'], peak)
+            self._tracemalloc.reset_peak()
+            frame = {'start': traced, 'peak': traced, 'rss': None}
+            self._stack.append(frame)
+        self._record_rss(current_rss())
+        try:
+            yield
+        finally:
+            self._record_rss(current_rss())
+            with self._lock:
+                _, peak = self._tracemalloc.get_traced_memory()
+                frame['peak'] = max(frame['peak'], peak)
+                self.peak = max(self.peak, peak)
+                self._stack.remove(frame)
+                if self._stack:
+                    self._stack[-1]['peak'] = max(self._stack[-1]['peak'], frame['peak'])
+                self._tracemalloc.reset_peak()
+                totals = table.setdefault(name, {'peak': 0, 'growth': 0, 'rss': None})
+                totals['peak'] = max(totals['peak'], frame['peak'])
+                totals['growth'] = max(totals['growth'], frame['peak'] - frame['start'])
+                if frame['rss'] is not None:
+                    totals['rss'] = max(totals['rss'] or 0, frame['rss'])
+
+    def stage(self, name):
+        """Context manager measuring one run of a stage."""
+        return self._measure(self.stages, name)
+
+    def document(self, name):
+        """Context manager measuring the conversion of one document."""
+        return self._measure(self.documents, name)
+
+    def top_sites(self, limit=TOP_SITES):
+        """Return [(file:line, size growth, count growth)] of the sites that grew most since start()."""
+        snapshot = self._tracemalloc.take_snapshot().filter_traces((
+            self._tracemalloc.Filter(False, self._tracemalloc.__file__),
+            self._tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+        ))
+        sites = []
+        for stat in snapshot.compare_to(self._baseline, 'lineno')[:limit]:
+            frame = stat.traceback[0]
+            sites.append((f"{site_path(frame.filename)}:{frame.lineno}", stat.size_diff, stat.count_diff))
+        return sites
+
+    def stop(self):
+        """Stop tracing and sampling. Returns the run's summary, the record written by record_memory()."""
+        self._stopped.set()
+        _, peak = self._tracemalloc.get_traced_memory()
+        heaviest = sorted(self.documents.items(), key=lambda item: -item[1]['peak'])[:TOP_DOCUMENTS]
+        summary = {
+            'peak_traced': max(self.peak, peak),
+            'peak_rss': peak_rss() or self.rss,
+            'documents': len(self.documents),
+            'stages': self.stages,
+            'heaviest_documents': dict(heaviest),
+            'top_sites': [{'site': site, 'size': size, 'count': count} for site, size, count in self.top_sites()],
+        }
+        self._tracemalloc.stop()
+        self.enabled = False
+        return summary
+
+def print_memory_report(summary):
+    print(f"Memory: peak traced {format_size(summary['peak_traced'])}, peak RSS {format_size(summary['peak_rss'])}")
+
+    def line(name, totals):
+        return (f"    peak {format_size(totals['peak']):>9} (+{format_size(totals['growth'])})"
+                f"  RSS {format_size(totals['rss']):>9}  {name}")
+
+    print("  Stages:")
+    for name, totals in summary['stages'].items():
+        print(line(name, totals))
+    print(f"  Heaviest documents (of {summary['documents']}):")
+    for name, totals in summary['heaviest_documents'].items():
+        print(line(name, totals))
+    print("  Allocation sites that grew most over the run:")
+    for site in summary['top_sites']:
+        print(f"    {site['size'] / 1024:+9.1f} KB {site['count']:+7} blocks  {site['site']}")
+
+def record_memory(summary, category, path=MEMORY_HISTORY_PATH):
+    """Append an instrumented run's summary to the memory history."""
+    record = {'finished_at': time.strftime('%Y-%m-%dT%H:%M:%S'), 'category': category, **summary}
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record) + '\n')
+
+def regressions(records, threshold=REGRESSION_THRESHOLD):
+    """Return the indexes of records whose peak grew by more than threshold over the previous run of their category."""
+    previous, result = {}, set()
+    for index, record in enumerate(records):
+        before = previous.get(record['category'])
+        if before is not None and record['peak_traced'] > before['peak_traced'] * (1 + threshold):
+            result.add(index)
+        previous[record['category']] = record
+    return result
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="List the peak memory of instrumented conversion runs.")
+    parser.add_argument('command', choices=['history'])
+    parser.add_argument('--last', type=int, default=20, help='Runs to list')
+    args = parser.parse_args()
+
+    if not MEMORY_HISTORY_PATH.exists():
+        print(f"No instrumented runs recorded in {MEMORY_HISTORY_PATH} (run a conversion with --memory)")
+        return 0
+    records, _ = read_records(MEMORY_HISTORY_PATH)
+    regressed = regressions(records)
+    for index, record in list(enumerate(records))[-args.last:]:
+        stages = ', '.join(f"{name} {format_size(totals['peak'])}" for name, totals in record['stages'].items())
+        print(f"{'✗' if index in regressed else '✓'} {record['finished_at']}  {record['category']:<12} "
+              f"{record['documents']:>4} documents  peak traced {format_size(record['peak_traced']):>9}  "
+              f"RSS {format_size(record['peak_rss']):>9}  ({stages})")
+    if regressed:
+        print(f"{len(regressed)} run(s) with peak traced memory more than {REGRESSION_THRESHOLD:.0%} "
+              f"above the previous run of their category")
+    return 0
+
+DEFAULT_PROFILE = MemoryProfile()
+
+if __name__ == "__main__":
+    sys.exit(main())
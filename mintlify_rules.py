@@ -0,0 +1,20 @@
+"""
+Rewrite rules that map Framer markup to Mintlify components.
+
+Loaded by convert_framer_to_mdx.py through RULE_MODULES; add a rule here
+(or in another module listed there) instead of editing convert_fragment().
+"""
+
+import re
+
+from rule_pipeline import Rule, sub_closed
+
+def convert_blockquotes(text, context):
+    """Convert blockquotes (callouts in the Framer exports) to <Note>."""
+    return sub_closed(r'<blockquote>(.*?)</blockquote>', lambda m: f'\n\n<Note>\n{m.group(1).strip()}\n</Note>\n\n',
+                      text, '</blockquote>', flags=re.DOTALL)
+
+def register(pipeline):
+    # After paragraphs and inline markup so the note body is already markdown
+    pipeline.register(Rule('blockquotes', convert_blockquotes, consumes={'blockquote'}, produces={'Note'}),
+                      before='tables')
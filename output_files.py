@@ -0,0 +1,92 @@
+"""
+Writing conversion output only when its content changes.
+
+Rewriting identical bytes still bumps mtimes, which makes the Mintlify dev
+server rebuild and git re-check every page on each run. MDX files and
+images are compared by SHA-256 against what is already on disk and
+identical writes are skipped. Output folders are created once per folder
+per run instead of once per file.
+
+If a RunJournal is attached (see run_journal.py), every write and skipped
+write is recorded in it with the file's hash.
+"""
+
+import hashlib
+import os
+from collections import Counter
+
+CHUNK_SIZE = 1024 * 1024
+
+def file_sha256(path):
+    """Return the SHA-256 hex digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class OutputWriter:
+    """Write output files, skipping those whose content is unchanged.
+
+    counts is a Counter of (kind, 'written' or 'skipped'), where kind is a
+    label such as 'mdx' or 'image'. journal is a RunJournal or None.
+    """
+
+    def __init__(self):
+        self.counts = Counter()
+        self.journal = None
+        self._dirs = set()
+
+    def ensure_dir(self, path):
+        """Create a directory and its parents, at most once per run."""
+        path = os.path.abspath(path)
+        if path not in self._dirs:
+            os.makedirs(path, exist_ok=True)
+            self._dirs.add(path)
+
+    def _unchanged(self, path, size, digest):
+        try:
+            if os.path.getsize(path) != size:
+                return False
+        except OSError:
+            return False
+        return file_sha256(path) == digest
+
+    def _count(self, path, digest, kind, written):
+        self.counts[(kind, 'written' if written else 'skipped')] += 1
+        if self.journal is not None:
+            self.journal.record_write(path, digest, kind, written)
+
+    def write_bytes(self, path, data, kind):
+        """Write data to path unless the file already holds it. Returns True if written."""
+        digest = hashlib.sha256(data).hexdigest()
+        if self._unchanged(path, len(data), digest):
+            self._count(path, digest, kind, False)
+            return False
+        self.ensure_dir(os.path.dirname(path))
+        with open(path, 'wb') as f:
+            f.write(data)
+        self._count(path, digest, kind, True)
+        return True
+
+    def commit(self, temp_path, path, kind):
+        """Move a finished temp file over path, or discard it if path has the same content.
+
+        Returns True if path was written.
+        """
+        digest = file_sha256(temp_path)
+        if self._unchanged(path, os.path.getsize(temp_path), digest):
+            os.unlink(temp_path)
+            self._count(path, digest, kind, False)
+            return False
+        os.replace(temp_path, path)
+        self._count(path, digest, kind, True)
+        return True
+
+    def summary(self):
+        """Describe the counts, e.g. "image 0 written, 212 skipped; mdx 3 written, 41 skipped"."""
+        kinds = sorted({kind for kind, _ in self.counts})
+        return '; '.join(f"{kind} {self.counts[(kind, 'written')]} written, "
+                         f"{self.counts[(kind, 'skipped')]} skipped" for kind in kinds)
+
+DEFAULT_WRITER = OutputWriter()
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Lightweight local preview server for Framer-to-MDX conversion output.
+
+Usage:
+    python3 preview_server.py [--port 8765] [--cache-size 256]
+
+Serves converted pages without the Mintlify toolchain:
+- /                       Index of every export in AAA-Framer-Export/
+- /page/<file>            Rendered HTML of the generated MDX
+- /compare/<file>         Framer HTML and generated MDX side by side
+- /mdx/<file>             Raw generated MDX
+- /images/...             Files from the local images/ tree
+
+Converted pages are kept in an LRU cache keyed by the source file hash, so a
+page is only re-converted after its export changes. Open pages poll the
+source hash and reload themselves as soon as the export is edited.
+"""
+
+import argparse
+import hashlib
+import html
+import mimetypes
+import os
+import re
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import quote, unquote
+
+from convert_framer_to_mdx import (
+    create_image_tag,
+    extract_images,
+    html_to_markdown,
+    image_location,
+    load_file_mapping,
+    mdx_header,
+    sanitize_filename,
+)
+
+BASE_DIR = Path(__file__).parent
+INPUT_DIR = BASE_DIR / "AAA-Framer-Export"
+IMAGES_DIR = BASE_DIR / "images"
+ONBOARDING_FOLDER = "Onboarding Documents"
+
+# Milliseconds between source hash polls from an open page
+POLL_INTERVAL_MS = 300
+
+class RenderCache:
+    """Thread-safe LRU cache of rendered pages keyed by source hash."""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+class SourceHasher:
+    """Hash export files, re-reading them only when their mtime or size changes."""
+
+    def __init__(self):
+        self._known = {}
+        self._lock = threading.Lock()
+
+    def hash(self, path):
+        stat = path.stat()
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            known = self._known.get(path)
+            if known and known[0] == signature:
+                return known[1]
+        digest = hashlib.sha256(path.read_bytes()).hexdigest()
+        with self._lock:
+            self._known[path] = (signature, digest)
+        return digest
+
+def list_sources():
+    """Return export filenames relative to AAA-Framer-Export/, sorted."""
+    sources = [p.name for p in INPUT_DIR.glob("*.txt")]
+    sources += [f"{ONBOARDING_FOLDER}/{p.name}" for p in (INPUT_DIR / ONBOARDING_FOLDER).glob("*.txt")]
+    return sorted(sources, key=str.lower)
+
+def resolve_source(name):
+    """Map a request path segment to an export file, refusing anything outside the input folder."""
+    path = (INPUT_DIR / name).resolve()
+    if INPUT_DIR.resolve() not in path.parents or not path.is_file():
+        return None
+    return path
+
+def read_source(path):
+    """Return (title, html) from an export file."""
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = f.readlines()
+    title = lines[0].strip() if lines else path.stem
+    return title, ''.join(lines[2:])
+
+def preview_image_tags(name, title, html_content, file_mapping):
+    """Build image tags for a preview.
+
+    Local images are used when they exist on disk, otherwise the original Framer
+    URL is kept so the preview still shows the picture.
+    """
+    sanitized_title = sanitize_filename(title)
+    if name.startswith(f"{ONBOARDING_FOLDER}/"):
+        category_path, subcategory_path = "Onboarding-Documents", ""
+    elif name in file_mapping:
+        category_path = file_mapping[name]["category"]
+        subcategory_path = file_mapping[name]["subcategory"]
+    else:
+        category_path = None
+
+    tags = []
+    for i, url in enumerate(extract_images(html_content), 1):
+        if category_path is not None:
+            relative_path, image_path_for_mdx = image_location(category_path, subcategory_path, sanitized_title, i)
+            if (IMAGES_DIR / relative_path).exists():
+                tags.append(create_image_tag(image_path_for_mdx))
+                continue
+        tags.append(f'<img src="{url}" alt="" />')
+    return tags
+
+def render_inline(text):
+    """Render the inline markdown produced by html_to_markdown."""
+    text = html.escape(text, quote=False)
+    text = re.sub(r'`([^`]+)`', r'<code>\1</code>', text)
+    text = re.sub(r'\*\*(.+?)\*\*', r'<strong>\1</strong>', text)
+    text = re.sub(r'(?<!\*)\*([^*\n]+)\*(?!\*)', r'<em>\1</em>', text)
+    text = re.sub(r'\[([^\]]*)\]\(([^)\s]+)\)', r'<a href="\2">\1</a>', text)
+    return text
+
+def render_cell(cell):
+    """Render a pipe-table cell, keeping its <br /> line breaks."""
+    return '<br>'.join(render_inline(part.replace('\\|', '|')) for part in cell.strip().split('<br />'))
+
+def render_mdx(mdx):
+    """Render generated MDX to HTML.
+
+    Only the constructs html_to_markdown emits are handled: frontmatter,
+    imports, headings, paragraphs, bullet lists, pipe tables and raw
+    img/iframe tags. A YouTubeFacade is shown as its poster, linking to the video.
+    """
+    body = re.sub(r'\A---\n.*?\n---\n', '', mdx, flags=re.DOTALL)
+    body = re.sub(r'^import .*;$', '', body, flags=re.MULTILINE)
+    body = re.sub(r'<YouTubeFacade id="([^"]*)" title="([^"]*)" poster="([^"]*)" />',
+                  r'<a href="https://www.youtube.com/watch?v=\1"><img src="\3" alt="\2" /></a>', body)
+    out = []
+    for block in re.split(r'\n{2,}', body.strip()):
+        lines = block.split('\n')
+        first = lines[0].lstrip()
+        heading = re.match(r'(#{1,6})\s+(.*)', block)
+        if heading and len(lines) == 1:
+            level = len(heading.group(1))
+            out.append(f'<h{level}>{render_inline(heading.group(2))}</h{level}>')
+        elif first.startswith('<'):
+            # Raw HTML/JSX (img tags, iframes, preserved-HTML comments)
+            out.append(block)
+        elif all(line.lstrip().startswith('|') for line in lines) and len(lines) >= 2:
+            rows = [[render_cell(cell) for cell in re.split(r'(?<!\\)\|', line.strip()[1:-1])] for line in lines]
+            head = ''.join(f'<th>{c}</th>' for c in rows[0])
+            data = ''.join(
+                '<tr>' + ''.join(f'<td>{c}</td>' for c in row) + '</tr>'
+                for row in rows[2:]
+            )
+            out.append(f'<table><thead><tr>{head}</tr></thead><tbody>{data}</tbody></table>')
+        elif first.startswith('- '):
+            items = ''.join(
+                f'<li>{render_inline(line.lstrip()[2:])}</li>' if line.lstrip().startswith('- ')
+                else f'<li class="cont">{render_inline(line)}</li>'
+                for line in lines if line.strip()
+            )
+            out.append(f'<ul>{items}</ul>')
+        else:
+            out.append('<p>' + '<br>'.join(render_inline(line) for line in lines) + '</p>')
+    return '\n'.join(out)
+
+PAGE_STYLE = """
+body { font-family: -apple-system, system-ui, sans-serif; margin: 0; color: #1f2328; }
+main { max-width: 860px; margin: 0 auto; padding: 24px; }
+img { max-width: 100%; border: 1px solid #d0d7de; border-radius: 6px; }
+iframe { width: 100%; aspect-ratio: 16 / 9; border: 0; }
+table { border-collapse: collapse; } td, th { border: 1px solid #d0d7de; padding: 4px 8px; }
+code { background: #f6f8fa; padding: 0 4px; border-radius: 4px; }
+.compare { display: grid; grid-template-columns: 1fr 1fr 1fr; height: 100vh; }
+.compare > * { overflow: auto; padding: 16px; border-right: 1px solid #d0d7de; margin: 0; }
+.compare pre { white-space: pre-wrap; font-size: 12px; }
+.compare iframe { height: 100%; aspect-ratio: auto; }
+nav { padding: 8px 24px; background: #f6f8fa; font-size: 13px; }
+"""
+
+def page_shell(title, body, name=None, source_hash=None):
+    """Wrap a body in an HTML page that reloads when the source hash changes."""
+    reload_script = ''
+    if name and source_hash:
+        reload_script = f"""<script>
+setInterval(async () => {{
+  const r = await fetch('/_hash/{quote(name)}');
+  if (r.ok && (await r.text()) !== '{source_hash}') location.reload();
+}}, {POLL_INTERVAL_MS});
+</script>"""
+    nav = ''
+    if name:
+        q = quote(name)
+        nav = (f'<nav><a href="/">Index</a> · <a href="/page/{q}">Page</a> · '
+               f'<a href="/compare/{q}">Compare</a> · <a href="/mdx/{q}">MDX</a></nav>')
+    return (f'<!doctype html><html><head><meta charset="utf-8"><title>{html.escape(title)}</title>'
+            f'<style>{PAGE_STYLE}</style></head><body>{nav}{body}{reload_script}</body></html>')
+
+class PreviewServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, cache_size):
+        super().__init__(address, PreviewHandler)
+        self.cache = RenderCache(cache_size)
+        self.hasher = SourceHasher()
+        self.file_mapping = load_file_mapping("all")
+
+    def render(self, name, path):
+        """Return (source_hash, title, framer_html, mdx, rendered_html), converting on cache miss."""
+        source_hash = self.hasher.hash(path)
+        key = (name, source_hash)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        title, html_content = read_source(path)
+        image_tags = preview_image_tags(name, title, html_content, self.file_mapping)
+        markdown = html_to_markdown(html_content, image_tags)
+        mdx = mdx_header(title, '<YouTubeFacade' in markdown) + markdown
+        entry = (source_hash, title, html_content, mdx, render_mdx(mdx))
+        self.cache.put(key, entry)
+        return entry
+
+class PreviewHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        route, _, rest = unquote(self.path.split('?', 1)[0]).lstrip('/').partition('/')
+        if route == '':
+            return self.send_index()
+        if route == 'images':
+            return self.send_image(rest)
+        path = resolve_source(rest)
+        if path is None:
+            return self.send_text(404, 'Not found')
+        if route == '_hash':
+            return self.send_text(200, self.server.hasher.hash(path))
+        source_hash, title, framer_html, mdx, rendered = self.server.render(rest, path)
+        if route == 'page':
+            body = f'<main><h1>{html.escape(title)}</h1>{rendered}</main>'
+            return self.send_html(page_shell(title, body, rest, source_hash))
+        if route == 'compare':
+            body = (
+                '<div class="compare">'
+                f'<iframe srcdoc="{html.escape(framer_html)}"></iframe>'
+                f'<pre>{html.escape(mdx)}</pre>'
+                f'<div><h1>{html.escape(title)}</h1>{rendered}</div>'
+                '</div>'
+            )
+            return self.send_html(page_shell(title, body, rest, source_hash))
+        if route == 'mdx':
+            return self.send_text(200, mdx, 'text/markdown; charset=utf-8')
+        return self.send_text(404, 'Not found')
+
+    def send_index(self):
+        cache = self.server.cache
+        items = ''.join(
+            f'<li><a href="/page/{quote(name)}">{html.escape(name[:-4])}</a> '
+            f'(<a href="/compare/{quote(name)}">compare</a>)</li>'
+            for name in list_sources()
+        )
+        body = (f'<main><h1>Framer export preview</h1>'
+                f'<p>Render cache: {cache.hits} hits, {cache.misses} misses</p><ul>{items}</ul></main>')
+        self.send_html(page_shell('Framer export preview', body))
+
+    def send_image(self, relative):
+        path = (IMAGES_DIR / relative).resolve()
+        if IMAGES_DIR.resolve() not in path.parents or not path.is_file():
+            return self.send_text(404, 'Not found')
+        content_type = mimetypes.guess_type(path.name)[0] or 'application/octet-stream'
+        self.send_bytes(200, path.read_bytes(), content_type)
+
+    def send_html(self, page):
+        self.send_bytes(200, page.encode('utf-8'), 'text/html; charset=utf-8')
+
+    def send_text(self, status, text, content_type='text/plain; charset=utf-8'):
+        self.send_bytes(status, text.encode('utf-8'), content_type)
+
+    def send_bytes(self, status, data, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if os.environ.get('PREVIEW_VERBOSE'):
+            super().log_message(format, *args)
+
+def main():
+    """Start the preview server."""
+    parser = argparse.ArgumentParser(description="Preview converted Framer exports locally.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--cache-size', type=int, default=256, help='Maximum number of rendered pages kept in memory')
+    args = parser.parse_args()
+
+    server = PreviewServer((args.host, args.port), args.cache_size)
+    print(f"Previewing {len(list_sources())} exports at http://{args.host}:{args.port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopped")
+
+if __name__ == "__main__":
+    main()
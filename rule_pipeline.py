@@ -0,0 +1,174 @@
+"""
+Ordered, individually timed rewrite rules for HTML to markdown conversion.
+
+A Rule rewrites the text of a fragment and declares the tags it consumes
+(its triggers) and the tags it produces. Before running, the pipeline
+prescans the fragment once for the tag names it contains, in opening or
+closing tags, and skips every rule none of whose trigger tags appear; tags
+a rule produces become triggers for the rules after it. The time, runs
+and skips of every rule are recorded.
+
+Rules are registered by name, in order, and can be added from outside the
+converter:
+
+    from rule_pipeline import Rule
+
+    def register(pipeline):
+        pipeline.register(Rule('callouts', apply, consumes={'aside'}, produces={'Callout'}),
+                          before='breaks')
+
+Modules listed in convert_framer_to_mdx.RULE_MODULES are loaded this way
+(see mintlify_rules.py). Produced tags are kept by the leftover-tag
+sanitizer, so a rule can emit Mintlify components.
+"""
+
+import importlib
+import re
+import threading
+import time
+
+# Tag names, e.g. "h2" from <h2> and "li" from <li data-preset-tag="p"> or </li>;
+# rules also clean up stray closing tags, so those trigger them too
+PRESCAN_PATTERN = re.compile(r'</?([A-Za-z][A-Za-z0-9]*)')
+
+def sub_closed(pattern, repl, text, closing, flags=0):
+    """re.sub() for patterns whose matches always end with closing.
+
+    closing is a string or tuple of strings. Nothing after the last closing
+    tag can be part of a match, so only the text before it is searched;
+    otherwise every unclosed opening tag (e.g. <h2> without </h2>) rescans
+    the rest of the document, which is quadratic on malformed exports.
+    Without re.DOTALL matches cannot span lines, so each line is bounded by
+    its own last closing tag.
+    """
+    closings = (closing,) if isinstance(closing, str) else closing
+    if not any(c in text for c in closings):
+        return text
+    pattern = re.compile(pattern, flags)
+
+    def sub_before_last(text):
+        end = max((text.rfind(c) + len(c) for c in closings if c in text), default=0)
+        if not end:
+            return text
+        return pattern.sub(repl, text[:end]) + text[end:]
+
+    if flags & re.DOTALL or '\n' not in text:
+        return sub_before_last(text)
+    lines = text.split('\n')
+    for i, line in enumerate(lines):
+        # Lines without a closing tag cannot contain a match
+        if any(c in line for c in closings):
+            lines[i] = sub_before_last(line)
+    return '\n'.join(lines)
+
+class Rule:
+    """One rewrite stage.
+
+    name: unique name, also the stage reported by BudgetExceeded
+    apply: function(text, context) -> text
+    consumes: tag names that trigger the rule; an empty set always runs
+    produces: tag names (or Mintlify components) the rule may emit
+    """
+
+    def __init__(self, name, apply, consumes=(), produces=()):
+        self.name = name
+        self.apply = apply
+        self.consumes = frozenset(consumes)
+        self.produces = frozenset(produces)
+
+    def __repr__(self):
+        return f"Rule({self.name!r})"
+
+class RuleContext:
+    """Per-fragment state shared by the rules.
+
+    image_tags are consumed in order from image_index; budget is a
+    ConversionBudget or None; posters maps YouTube video IDs to the src of
+    their local poster.
+    """
+
+    def __init__(self, image_tags, image_index=0, budget=None, posters=None):
+        self.image_tags = image_tags
+        self.image_index = image_index
+        self.budget = budget
+        self.posters = posters or {}
+
+    def charge(self, stage, text):
+        """Charge the budget for scanning text, if there is one."""
+        if self.budget is not None:
+            self.budget.charge(stage, len(text))
+
+class RulePipeline:
+    """An ordered list of rules with per-rule timings.
+
+    If sanitizer is an html_sanitizer.Sanitizer, the tags produced by every
+    registered rule are added to what it keeps.
+    """
+
+    def __init__(self, rules=(), sanitizer=None):
+        self.rules = []
+        self.sanitizer = sanitizer
+        self._timings = {}
+        self._lock = threading.Lock()
+        for rule in rules:
+            self.register(rule)
+
+    def names(self):
+        return [rule.name for rule in self.rules]
+
+    def register(self, rule, before=None, after=None):
+        """Add a rule at the end, or before or after the named rule."""
+        if rule.name in self.names():
+            raise ValueError(f"Rule already registered: {rule.name}")
+        anchor = before or after
+        if anchor is None:
+            position = len(self.rules)
+        elif anchor in self.names():
+            position = self.names().index(anchor) + (1 if after else 0)
+        else:
+            raise ValueError(f"Unknown rule: {anchor}")
+        self.rules.insert(position, rule)
+        self._timings[rule.name] = [0, 0, 0.0]
+        if self.sanitizer is not None and rule.produces:
+            self.sanitizer.keep(*rule.produces)
+
+    def run(self, text, context):
+        """Apply every triggered rule to text in order and return the result."""
+        present = set(PRESCAN_PATTERN.findall(text))
+        for rule in self.rules:
+            timing = self._timings[rule.name]
+            if rule.consumes and present.isdisjoint(rule.consumes):
+                with self._lock:
+                    timing[1] += 1
+                continue
+            context.charge(rule.name, text)
+            started = time.perf_counter()
+            text = rule.apply(text, context)
+            elapsed = time.perf_counter() - started
+            present |= rule.produces
+            with self._lock:
+                timing[0] += 1
+                timing[2] += elapsed
+        return text
+
+    def timings(self):
+        """Return {rule name: {"runs", "skipped", "seconds"}} in pipeline order."""
+        with self._lock:
+            return {name: {'runs': runs, 'skipped': skipped, 'seconds': round(seconds, 6)}
+                    for name, (runs, skipped, seconds) in
+                    ((rule.name, self._timings[rule.name]) for rule in self.rules)}
+
+    def reset_timings(self):
+        with self._lock:
+            for timing in self._timings.values():
+                timing[:] = [0, 0, 0.0]
+
+def format_timings(timings):
+    """One line per rule, e.g. "  headings      412 runs    96 skipped    18.2 ms"."""
+    return '\n'.join(f"  {name:<12} {t['runs']:>6} runs {t['skipped']:>6} skipped {t['seconds'] * 1000:9.1f} ms"
+                     for name, t in timings.items())
+
+def load_rule_modules(pipeline, modules):
+    """Import each named module and call its register(pipeline)."""
+    for name in modules:
+        importlib.import_module(name).register(pipeline)
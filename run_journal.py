@@ -0,0 +1,166 @@
+"""
+Write-ahead journal for resumable conversion runs.
+
+A conversion run appends one JSON line per event to
+.conversion/journal.jsonl (journal-shard-<i>-of-<N>.jsonl for a shard):
+
+- run:      category, shard and bundle of the run, written first
+- write:    an output file written or skipped as unchanged, with its SHA-256
+- document: a finished export, after its MDX is in place, with its status,
+            the export and MDX hashes, its images (asset lock entries, which carry the
+            URL, path and hash) and its leftover-tag counts
+- end:      the run completed
+
+Lines are flushed and fsynced in batches (every FSYNC_BATCH records or
+FSYNC_INTERVAL seconds), so a crash loses at most the last batch, and a
+lost document record only means that document is converted again.
+
+With --resume, a document whose record is in the journal and whose MDX and
+images still have the recorded hashes is not converted again: its lock
+entries, leftover-tag counts and status are restored from the journal, so
+the resumed run ends with the same output and assets.lock.json as a clean
+one. Documents whose images were deferred (see image_fetcher.py) are always
+converted again.
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+
+from output_files import file_sha256
+
+BASE_DIR = Path(__file__).parent
+JOURNAL_DIR = BASE_DIR / ".conversion"
+JOURNAL_VERSION = 1
+
+FSYNC_BATCH = 32
+FSYNC_INTERVAL = 1.0
+
+# Document statuses that are final; anything else is converted again on resume
+FINISHED = ('converted', 'quarantined', 'invalid')
+
+def journal_path(shard=None, journal_dir=JOURNAL_DIR):
+    """Return the journal path for a run, or for shard (i, N) of a sharded run."""
+    if shard is None:
+        return Path(journal_dir) / "journal.jsonl"
+    return Path(journal_dir) / f"journal-shard-{shard[0]}-of-{shard[1]}.jsonl"
+
+def read_records(path):
+    """Return (records, length in bytes of the intact records) of a journal.
+
+    Reading stops at a torn line (incomplete JSON or no newline), which only
+    the record being written when a run died can be.
+    """
+    records = []
+    length = 0
+    with open(path, 'rb') as f:
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break
+            length += len(line)
+    return records, length
+
+class RunJournal:
+    """An append-only journal of one conversion run.
+
+    run is a dict identifying the run (category, shard, bundle); a journal
+    can only be resumed by a run with the same run dict. documents holds
+    the last document record per export filename found when resuming.
+    Resuming without a journal, or one killed before its header was
+    written, starts a new run.
+    """
+
+    def __init__(self, path, run, resume=False, root=BASE_DIR):
+        self.path = Path(path)
+        self.root = Path(root)
+        self.run = run
+        self.documents = {}
+        resume = resume and self._load()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'a' if resume else 'w', encoding='utf-8')
+        self._pending = 0
+        self._synced = time.monotonic()
+        if not resume:
+            self._append({'type': 'run', 'version': JOURNAL_VERSION, **run}, sync=True)
+
+    def _load(self):
+        """Read the journal to resume; return False if there is nothing to resume."""
+        if not self.path.exists():
+            return False
+        records, length = read_records(self.path)
+        if not records:
+            return False
+        header = records[0]
+        if header.get('type') != 'run' or header.get('version') != JOURNAL_VERSION:
+            raise ValueError(f"{self.path} is not a version {JOURNAL_VERSION} run journal")
+        journaled_run = {key: header.get(key) for key in self.run}
+        if journaled_run != self.run:
+            raise ValueError(f"{self.path} belongs to a different run: {journaled_run}")
+        for record in records:
+            if record['type'] == 'document':
+                self.documents[record['filename']] = record
+        # Drop a torn last line so appended records start on a fresh line
+        if length < self.path.stat().st_size:
+            with open(self.path, 'r+b') as f:
+                f.truncate(length)
+        return True
+
+    def _relative(self, path):
+        path = Path(path)
+        try:
+            return path.resolve().relative_to(self.root.resolve()).as_posix()
+        except ValueError:
+            return str(path)
+
+    def _append(self, record, sync=False):
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._pending += 1
+        if sync or self._pending >= FSYNC_BATCH or time.monotonic() - self._synced >= FSYNC_INTERVAL:
+            self.sync()
+
+    def sync(self):
+        """Flush and fsync the records appended so far."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self._synced = time.monotonic()
+
+    def record_write(self, path, digest, kind, written):
+        self._append({'type': 'write', 'path': self._relative(path), 'sha256': digest, 'kind': kind,
+                      'written': written})
+
+    def record_document(self, filename, status, mdx_path=None, assets=(), tag_counts=None, source_sha256=None):
+        """Record a finished export and return the record; call once its MDX and images are in place."""
+        record = {'type': 'document', 'filename': filename, 'status': status, 'source_sha256': source_sha256}
+        if mdx_path is not None:
+            record['mdx_path'] = self._relative(mdx_path)
+            record['sha256'] = file_sha256(mdx_path)
+        record['assets'] = list(assets)
+        record['leftover'] = [[name, action, count] for (name, action), count in sorted((tag_counts or {}).items())]
+        self._append(record)
+        return record
+
+    def finished(self, filename):
+        """Return the journaled record of an export if it need not be converted again, else None."""
+        record = self.documents.get(filename)
+        if record is None or record['status'] not in FINISHED:
+            return None
+        outputs = [(record['mdx_path'], record['sha256'])] if 'mdx_path' in record else []
+        outputs += [(entry['path'], entry['sha256']) for entry in record['assets']]
+        for relative_path, digest in outputs:
+            path = self.root / relative_path
+            if not path.exists() or file_sha256(path) != digest:
+                return None
+        return record
+
+    def close(self, completed=True):
+        """Record the end of the run (if completed) and close the journal."""
+        if completed:
+            self._append({'type': 'end'})
+        self.sync()
+        self._file.close()
@@ -0,0 +1,202 @@
+"""
+Dry-run planning of conversion runs (convert_framer_to_mdx.py --plan).
+
+The planner reads the exports and their image URLs and checks them against
+the asset lock, the files on disk and the journals of earlier runs (see
+run_journal.py), with no network access and no writes. It reports:
+
+- conversions, and which MDX files are expected to change: those whose
+  export, converter code or MDX on disk differ from the last journaled
+  conversion (exports never journaled count as changing)
+- downloads: images without a locked copy on disk
+- image writes: locked copies that would be copied to a new path
+- deletions: locked images no longer referenced by any article
+
+Locked copies and unchanged images are recognised by size, not hash, to
+keep the plan fast; asset_lock.py verify checks hashes.
+
+Every run appends its conversion and download timings to
+.conversion/history.jsonl, and the plan's time estimate is based on the
+last HISTORY_WINDOW runs there that were not slowed down by --memory.
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+from output_files import file_sha256
+from run_journal import JOURNAL_DIR, read_records
+
+BASE_DIR = Path(__file__).parent
+HISTORY_PATH = JOURNAL_DIR / "history.jsonl"
+HISTORY_WINDOW = 10
+
+# Source files whose changes can change the converted MDX
+CONVERTER_SOURCES = ('convert_framer_to_mdx.py', 'rule_pipeline.py', 'mintlify_rules.py',
+                     'html_sanitizer.py', 'html_tables.py', 'export_sources.py')
+
+# Estimates used until a run has been recorded
+DEFAULT_SECONDS_PER_MB = 1.0
+DEFAULT_SECONDS_PER_DOWNLOAD = 0.5
+
+def converter_fingerprint(base_dir=BASE_DIR):
+    """Return a short hash of the converter sources, recorded in every run journal."""
+    digest = hashlib.sha256()
+    for name in CONVERTER_SOURCES:
+        path = Path(base_dir) / name
+        if path.exists():
+            digest.update(name.encode('utf-8') + b'\0' + path.read_bytes())
+    return digest.hexdigest()[:16]
+
+def journaled_documents(journal_dir=JOURNAL_DIR):
+    """Return {export filename: (document record, converter fingerprint)} from every journal, newest last."""
+    documents = {}
+    for path in sorted(Path(journal_dir).glob("journal*.jsonl"), key=lambda p: p.stat().st_mtime):
+        records, _ = read_records(path)
+        if not records or records[0].get('type') != 'run':
+            continue
+        converter = records[0].get('converter')
+        for record in records:
+            if record['type'] == 'document':
+                documents[record['filename']] = (record, converter)
+    return documents
+
+def record_history(category, documents, size, seconds, downloads, download_seconds, instrumented=False,
+                   path=HISTORY_PATH):
+    """Append one run's timings to the history used for estimates.
+
+    Timings of instrumented runs (--memory) are recorded but not used.
+    """
+    record = {
+        'finished_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'category': category,
+        'documents': documents,
+        'bytes': size,
+        'seconds': round(seconds, 3),
+        'downloads': downloads,
+        'download_seconds': round(download_seconds, 3),
+    }
+    if instrumented:
+        record['instrumented'] = True
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record) + '\n')
+
+def estimate(size, downloads, path=HISTORY_PATH):
+    """Return (conversion seconds, download seconds, runs the estimate is based on)."""
+    history = []
+    if Path(path).exists():
+        history, _ = read_records(path)
+    history = [r for r in history if not r.get('instrumented')][-HISTORY_WINDOW:]
+    converted = sum(r['bytes'] for r in history)
+    fetched = sum(r['downloads'] for r in history)
+    per_byte = sum(r['seconds'] for r in history) / converted if converted else DEFAULT_SECONDS_PER_MB / 1e6
+    per_download = (sum(r['download_seconds'] for r in history) / fetched if fetched
+                    else DEFAULT_SECONDS_PER_DOWNLOAD)
+    return size * per_byte, downloads * per_download, len(history)
+
+class RunPlan:
+    """What a conversion run would do; lists hold paths relative to the checkout."""
+
+    def __init__(self):
+        self.documents = 0
+        self.bytes = 0
+        self.invalid = []
+        self.missing = []
+        self.changed = []     # MDX expected to change
+        self.unchanged = 0    # MDX expected to stay the same
+        self.downloads = []   # (URL, target path)
+        self.copies = []      # Locked copies written to a new path
+        self.unchanged_images = 0
+        self.deletions = []
+
+def plan_run(file_mapping, input_dir, output_dir, images_dir, bundle=None, lock=None):
+    """Plan converting the mapped exports; nothing is written or downloaded."""
+    # Imported here: convert_framer_to_mdx imports this module
+    from asset_lock import AssetLock
+    from convert_framer_to_mdx import document_images, iter_documents, sanitize_filename
+
+    lock = lock or AssetLock()
+    root = lock.root
+    converter = converter_fingerprint()
+    journaled = journaled_documents()
+    by_url = {}
+    for entry in lock.entries():
+        by_url.setdefault(entry['url'], []).append(entry)
+
+    def relative(path):
+        return Path(os.path.relpath(path, root)).as_posix()
+
+    plan = RunPlan()
+    planned_articles = set()
+    targets = set()
+    seen = set()
+    for document in iter_documents(file_mapping, input_dir, bundle):
+        seen.add(document.name)
+        mapping = file_mapping[document.name]
+        if not document.is_valid:
+            plan.invalid.append(document.name)
+            continue
+        plan.documents += 1
+        plan.bytes += document.size
+        category_path, subcategory_path = mapping["category"], mapping["subcategory"]
+        sanitized_title = sanitize_filename(document.title)
+        planned_articles.add((document.filename, '/'.join(p for p in (category_path, subcategory_path) if p)))
+
+        mdx_path = Path(output_dir) / category_path / subcategory_path / f"{sanitized_title}.mdx"
+        record, journaled_converter = journaled.get(document.name, (None, None))
+        if (record is not None and record['status'] == 'converted' and journaled_converter == converter
+                and record.get('source_sha256') == document.sha256()
+                and record.get('mdx_path') == relative(mdx_path) and mdx_path.exists()
+                and file_sha256(mdx_path) == record['sha256']):
+            plan.unchanged += 1
+        else:
+            plan.changed.append(relative(mdx_path))
+
+        # The images, then the video posters (see document_images())
+        for url, relative_path in document_images(document, mapping):
+            target = Path(images_dir) / relative_path
+            targets.add(relative(target))
+            locked = [e for e in by_url.get(url, ())
+                      if (root / e['path']).exists() and os.path.getsize(root / e['path']) == e['size']]
+            if not locked:
+                plan.downloads.append((url, relative(target)))
+            elif any(e['path'] == relative(target) for e in locked) or (
+                    target.exists() and file_sha256(target) == locked[0]['sha256']):
+                plan.unchanged_images += 1
+            else:
+                plan.copies.append(relative(target))
+    plan.missing = [name for name in file_mapping if name not in seen]
+
+    kept = {e['path'] for e in lock.entries() if (e['document'], e['section']) not in planned_articles}
+    plan.deletions = sorted({e['path'] for e in lock.entries()
+                             if (e['document'], e['section']) in planned_articles} - targets - kept)
+    return plan
+
+def print_plan(plan, offline=False):
+    """Print a plan and its time estimate."""
+    def listing(paths, limit=10):
+        for path in paths[:limit]:
+            print(f"    {path}")
+        if len(paths) > limit:
+            print(f"    ... and {len(paths) - limit} more")
+
+    print(f"Plan: {plan.documents} export(s), {plan.bytes / 1e6:.1f} MB (nothing written or downloaded)")
+    print(f"  Conversions:  {plan.documents} ({len(plan.changed)} MDX expected to change, {plan.unchanged} unchanged)")
+    listing(plan.changed)
+    print(f"  Downloads:    {len(plan.downloads)} image(s){' (skipped with --offline)' if offline and plan.downloads else ''}")
+    listing([url for url, _ in plan.downloads])
+    print(f"  Image writes: {len(plan.copies)} from asset lock, {plan.unchanged_images} unchanged")
+    listing(plan.copies)
+    print(f"  Deletions:    {len(plan.deletions)} stale image(s)")
+    listing(plan.deletions)
+    if plan.invalid:
+        print(f"  Invalid:      {', '.join(plan.invalid)}")
+    if plan.missing:
+        print(f"  Missing:      {', '.join(plan.missing)}")
+    convert_seconds, download_seconds, runs = estimate(plan.bytes, 0 if offline else len(plan.downloads))
+    basis = f"from {runs} earlier run(s)" if runs else "no earlier runs recorded, using defaults"
+    print(f"  Estimated time: {convert_seconds + download_seconds:.1f}s "
+          f"(conversion {convert_seconds:.1f}s, downloads {download_seconds:.1f}s; {basis})")
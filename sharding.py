@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Sharded conversion runs and the deterministic merge of their results.
+
+    python3 convert_framer_to_mdx.py all --shard 1/3   # on each of 3 machines
+    python3 sharding.py merge                          # after collecting the shards
+
+The mapped exports are split into N shards by weight (export size plus a
+fixed cost per image), largest first onto the lightest shard, ties broken
+by filename, so every machine computes the same plan from the same exports.
+A shard converts only its exports, leaves assets.lock.json alone and writes
+a partial manifest to .conversion/shards/shard-<i>-of-<N>.json listing its
+documents, the files it wrote with their SHA-256, and its asset lock entries.
+
+merge checks that all N manifests are present and come from the same plan,
+copies outputs from shards run in other checkouts (a manifest's checkout is
+the folder holding its .conversion/), refuses conflicting outputs, applies
+the shards' lock entries to assets.lock.json, indexes the headings of the
+converted pages (see heading_index.py) and writes the navigation for
+the converted pages to .conversion/navigation.json in docs.json format, in
+mapping order whatever order the shards finished in.
+
+To try it locally, run the N shard processes side by side in one checkout,
+then merge.
+"""
+
+import hashlib
+import json
+import sys
+from pathlib import Path
+
+from asset_lock import AssetLock
+from export_sources import iter_bundle, open_export
+from heading_index import HeadingIndex
+from output_files import DEFAULT_WRITER, file_sha256
+
+BASE_DIR = Path(__file__).parent
+SHARD_DIR = BASE_DIR / ".conversion" / "shards"
+NAVIGATION_PATH = BASE_DIR / ".conversion" / "navigation.json"
+MANIFEST_VERSION = 1
+
+# Weight of one image in bytes of export: fetching or copying an image costs
+# about as much as converting this much HTML
+IMAGE_WEIGHT = 50_000
+
+def parse_shard(value):
+    """Parse "i/N" (1 <= i <= N) into (i, N); raise ValueError if malformed."""
+    index, _, count = value.partition('/')
+    try:
+        index, count = int(index), int(count)
+    except ValueError:
+        raise ValueError(f"Shard must be given as i/N, got '{value}'") from None
+    if not 1 <= index <= count:
+        raise ValueError(f"Shard index must be between 1 and {count}, got {index}")
+    return index, count
+
+def document_weight(document):
+    return document.size + IMAGE_WEIGHT * len(document.image_urls())
+
+def export_weights(file_mapping, input_dir, bundle=None):
+    """Return {filename: weight} for the mapped exports; missing exports weigh 0."""
+    weights = dict.fromkeys(file_mapping, 0)
+    if bundle is None:
+        for filename in file_mapping:
+            path = Path(input_dir) / filename
+            if path.exists():
+                with open_export(path) as document:
+                    weights[filename] = document_weight(document)
+        return weights
+    seen = set()
+    for document in iter_bundle(bundle):
+        # The first record for a name is the one converted (see iter_documents())
+        if document.name in weights and document.name not in seen:
+            seen.add(document.name)
+            weights[document.name] = document_weight(document)
+    return weights
+
+def partition(weights, count):
+    """Assign each name to a shard 1..count, balancing total weight.
+
+    Returns ({name: shard}, fingerprint). The fingerprint identifies the plan,
+    so manifests from runs over different exports or shard counts are caught.
+    """
+    loads = [0] * count
+    assignment = {}
+    for name, weight in sorted(weights.items(), key=lambda item: (-item[1], item[0])):
+        shard = min(range(count), key=lambda i: (loads[i], i))
+        loads[shard] += weight
+        assignment[name] = shard + 1
+    plan = json.dumps(sorted(assignment.items()) + [count, sorted(weights.items())])
+    return assignment, hashlib.sha256(plan.encode('utf-8')).hexdigest()[:16]
+
+def manifest_path(shard, count, shard_dir=SHARD_DIR):
+    return Path(shard_dir) / f"shard-{shard}-of-{count}.json"
+
+class ShardManifest:
+    """The partial manifest of one shard run.
+
+    documents: {export filename: dict with its mapping order and a status
+        of converted, quarantined, invalid or missing}; adding an export
+        again (e.g. in the image retry pass) replaces its entry
+    outputs: {path relative to the checkout: SHA-256} of the MDX and images
+    assets: {(document, section): asset lock entries} of the shard's articles
+    """
+
+    def __init__(self, shard, count, category, plan, root=BASE_DIR):
+        self.shard = shard
+        self.count = count
+        self.category = category
+        self.plan = plan
+        self.root = Path(root)
+        self.documents = {}
+        self.outputs = {}
+        self.assets = {}
+
+    def add(self, filename, mapping, order, status, mdx_path=None, lock_entries=()):
+        entry = {
+            'filename': filename,
+            'order': order,
+            'status': status,
+            'category': mapping['category'],
+            'subcategory': mapping['subcategory'],
+        }
+        if mdx_path is not None:
+            relative_path = Path(mdx_path).resolve().relative_to(self.root.resolve()).as_posix()
+            entry['mdx_path'] = relative_path
+            self.outputs[relative_path] = file_sha256(mdx_path)
+        for lock_entry in lock_entries:
+            self.outputs[lock_entry['path']] = lock_entry['sha256']
+        if lock_entries:
+            self.assets[(lock_entries[0]['document'], lock_entries[0]['section'])] = list(lock_entries)
+        self.documents[filename] = entry
+
+    def save(self, shard_dir=SHARD_DIR):
+        path = manifest_path(self.shard, self.count, shard_dir)
+        DEFAULT_WRITER.ensure_dir(path.parent)
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'shard': self.shard,
+            'count': self.count,
+            'category': self.category,
+            'plan': self.plan,
+            'documents': sorted(self.documents.values(), key=lambda d: d['order']),
+            'outputs': dict(sorted(self.outputs.items())),
+            'assets': [entry for article in sorted(self.assets) for entry in self.assets[article]],
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+            f.write('\n')
+        return path
+
+def load_manifests(paths):
+    """Load manifests, each with its checkout under "root"; raise ValueError if a set is incomplete."""
+    manifests = []
+    for path in paths:
+        path = Path(path)
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('version') != MANIFEST_VERSION:
+            raise ValueError(f"{path}: unsupported manifest version {manifest.get('version')!r}")
+        manifest['root'] = path.resolve().parent.parent.parent
+        manifests.append(manifest)
+    if not manifests:
+        raise ValueError("No shard manifests found")
+    plans = {(m['count'], m['plan'], m['category']) for m in manifests}
+    if len(plans) > 1:
+        raise ValueError("Manifests come from different shard plans: "
+                         + ', '.join(f"{category} {count} shards, plan {plan}" for count, plan, category in sorted(plans)))
+    count = manifests[0]['count']
+    shards = sorted(m['shard'] for m in manifests)
+    if shards != list(range(1, count + 1)):
+        missing = sorted(set(range(1, count + 1)) - set(shards))
+        duplicate = sorted({s for s in shards if shards.count(s) > 1})
+        raise ValueError(f"Incomplete shard set: missing {missing}, duplicated {duplicate}")
+    return sorted(manifests, key=lambda m: m['shard'])
+
+def find_conflicts(manifests):
+    """Return descriptions of outputs or lock articles claimed differently by two shards."""
+    conflicts = []
+    owners = {}
+    for manifest in manifests:
+        for path, digest in manifest['outputs'].items():
+            owner = owners.setdefault(path, (manifest['shard'], digest))
+            if owner[1] != digest:
+                conflicts.append(f"{path}: shard {owner[0]} and shard {manifest['shard']} wrote different content")
+    articles = {}
+    for manifest in manifests:
+        for article in {(e['document'], e['section']) for e in manifest['assets']}:
+            owner = articles.setdefault(article, manifest['shard'])
+            if owner != manifest['shard']:
+                conflicts.append(f"{article[0]} ({article[1]}): images locked by shard {owner} and shard {manifest['shard']}")
+    return conflicts
+
+def check_outputs(manifest):
+    """Raise ValueError unless every output of a shard is in its checkout unchanged."""
+    for relative_path, digest in manifest['outputs'].items():
+        source = manifest['root'] / relative_path
+        if not source.exists() or file_sha256(source) != digest:
+            raise ValueError(f"Shard {manifest['shard']}: {source} is missing or changed since the shard ran")
+
+def copy_outputs(manifest, root=BASE_DIR):
+    """Copy a shard's outputs from its checkout into root, if it ran elsewhere."""
+    root = Path(root)
+    if manifest['root'] == root.resolve():
+        return
+    for relative_path in manifest['outputs']:
+        DEFAULT_WRITER.write_bytes(root / relative_path, (manifest['root'] / relative_path).read_bytes(),
+                                   'mdx' if relative_path.endswith('.mdx') else 'image')
+
+def build_navigation(manifests):
+    """Return docs.json-style {"tabs": [...]} for the converted pages, in mapping order."""
+    documents = sorted((d for m in manifests for d in m['documents'] if d['status'] == 'converted'),
+                       key=lambda d: d['order'])
+    tabs = {}
+    for document in documents:
+        groups = tabs.setdefault(document['category'], {})
+        group = document['subcategory'] or document['category']
+        groups.setdefault(group, []).append(document['mdx_path'][:-len('.mdx')])
+    return {'tabs': [{'tab': tab, 'groups': [{'group': group, 'pages': pages} for group, pages in groups.items()]}
+                     for tab, groups in tabs.items()]}
+
+def merge(paths, root=BASE_DIR, lock_path=None, navigation_path=NAVIGATION_PATH):
+    """Merge shard manifests into root. Returns the number of problems found."""
+    try:
+        manifests = load_manifests(paths)
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        return 1
+    conflicts = find_conflicts(manifests)
+    for conflict in conflicts:
+        print(f"  ✗ Conflict: {conflict}")
+    if conflicts:
+        return len(conflicts)
+
+    # Check every shard before copying anything, so a failed merge changes nothing
+    try:
+        for manifest in manifests:
+            check_outputs(manifest)
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        return 1
+
+    lock = AssetLock(lock_path or Path(root) / "assets.lock.json")
+    headings = HeadingIndex(root=root)
+    for manifest in manifests:
+        copy_outputs(manifest, root)
+        for document in manifest['documents']:
+            if document['status'] == 'converted':
+                headings.update(Path(root) / document['mdx_path'])
+        articles = {}
+        for entry in manifest['assets']:
+            articles.setdefault((entry['document'], entry['section']), []).append(entry)
+        for article, entries in sorted(articles.items()):
+            lock.update(article, entries)
+
+    statuses = {}
+    for document in (d for m in manifests for d in m['documents']):
+        statuses[document['status']] = statuses.get(document['status'], 0) + 1
+    print(f"Merged {len(manifests)} shard(s) of plan {manifests[0]['plan']}: "
+          + ', '.join(f"{count} {status}" for status, count in sorted(statuses.items())))
+    print(f"Checked {sum(len(m['outputs']) for m in manifests)} output file(s)")
+    if DEFAULT_WRITER.counts:
+        print(f"Output: {DEFAULT_WRITER.summary()}")
+    if lock.save():
+        print(f"Updated asset lock: {lock.path.name} ({len(lock.entries())} images)")
+    if headings.save():
+        print(f"Updated heading index: {headings.path.name} ({len(headings.pages)} pages)")
+
+    navigation = json.dumps(build_navigation(manifests), indent=2, ensure_ascii=False) + '\n'
+    DEFAULT_WRITER.ensure_dir(Path(navigation_path).parent)
+    DEFAULT_WRITER.write_bytes(navigation_path, navigation.encode('utf-8'), 'navigation')
+    print(f"Navigation: {navigation_path}")
+    return 0
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Merge sharded conversion runs.")
+    parser.add_argument('command', choices=['merge'])
+    parser.add_argument('manifests', nargs='*',
+                        help='Shard manifests (default: .conversion/shards/*.json in this checkout)')
+    args = parser.parse_args()
+    paths = args.manifests or sorted(SHARD_DIR.glob("shard-*-of-*.json"))
+    return 1 if merge(paths) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
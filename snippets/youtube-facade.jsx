@@ -0,0 +1,43 @@
+// Click-to-load YouTube embed: shows the video's poster and only loads the
+// player iframe (and YouTube's scripts) once the reader presses play.
+export const YouTubeFacade = ({ id, title = 'YouTube video player', poster }) => {
+  const [playing, setPlaying] = useState(false);
+
+  if (playing) {
+    return (
+      <iframe
+        className="w-full aspect-video rounded-xl"
+        src={`https://www.youtube.com/embed/${id}?autoplay=1&rel=0&playsinline=1`}
+        title={title}
+        frameBorder="0"
+        allow="accelerometer; autoplay; clipboard-write; encrypted-media; gyroscope; picture-in-picture"
+        allowFullScreen
+      ></iframe>
+    );
+  }
+
+  return (
+    <button
+      type="button"
+      className="relative block w-full aspect-video rounded-xl overflow-hidden bg-black p-0 border-0 cursor-pointer"
+      onClick={() => setPlaying(true)}
+      aria-label={`Play video: ${title}`}
+    >
+      <img
+        src={poster || `https://i.ytimg.com/vi/${id}/hqdefault.jpg`}
+        alt=""
+        loading="lazy"
+        className="w-full h-full object-cover m-0"
+        noZoom
+      />
+      <svg
+        className="absolute inset-0 m-auto w-16 h-12"
+        viewBox="0 0 68 48"
+        aria-hidden="true"
+      >
+        <path d="M66.5 7.7a8.6 8.6 0 0 0-6-6C55.2.3 34 .3 34 .3s-21.2 0-26.5 1.4a8.6 8.6 0 0 0-6 6C.1 13 .1 24 .1 24s0 11 1.4 16.3a8.6 8.6 0 0 0 6 6C12.8 47.7 34 47.7 34 47.7s21.2 0 26.5-1.4a8.6 8.6 0 0 0 6-6C67.9 35 67.9 24 67.9 24s0-11-1.4-16.3z" fill="#f00" />
+        <path d="M45 24 27 14v20" fill="#fff" />
+      </svg>
+    </button>
+  );
+};